@@ -0,0 +1,86 @@
+"""Benchmark of the concatenation of the partitions of large files.
+
+The benchmark writes the partitions of a synthetic partitioned file (256 MiB by default, in
+5 MiB partitions as in the concurrent download) to a temporary directory, and times
+concatenate_partitions with each copy method: copy_file_range and sendfile, which move
+the bytes in kernel space, and the user-space copy through shutil.copyfileobj with a
+5 MiB buffer. The partitions are written again before each run, since they are deleted
+by the concatenation. The page cache is not dropped between the runs, so the timings
+compare the copy paths rather than the disk; on file systems that share extents on
+copy_file_range (e.g. Btrfs, XFS with reflink), the kernel copy is close to free.
+
+Run with:
+
+    python benchmarks/concatenation_benchmark.py [--size-in-mib SIZE] [--directory PATH]
+
+where --size-in-mib sets the size of the synthetic file (256 MiB by default; sizes of a few
+GiB are closer to the largest files of the DataVault API), and --directory sets where the
+temporary directory is created, which should be on the file system where the data is
+downloaded.
+"""
+import argparse
+import os
+import pathlib
+import tempfile
+import time
+
+from datavault_api_client import post_download_processing
+
+
+PARTITION_SIZE = 5 * 1024 * 1024
+DEFAULT_SIZE_IN_MIB = 256
+COPY_METHODS = ("copy_file_range", "sendfile", "userspace")
+
+
+def write_partitions(path_to_output_file: pathlib.Path, size_in_bytes: int) -> None:
+    """Writes the partition files of a synthetic partitioned file.
+
+    Parameters
+    ----------
+    path_to_output_file: pathlib.Path
+        The path to the concatenated file, next to which the partitions are written.
+    size_in_bytes: int
+        The total size of the partitions.
+    """
+    partition_content = os.urandom(PARTITION_SIZE)
+    file_stem = path_to_output_file.name.split(".")[0]
+    for partition_index, offset in enumerate(range(0, size_in_bytes, PARTITION_SIZE), 1):
+        path_to_output_file.with_name(f"{file_stem}_{partition_index}.txt").write_bytes(
+            partition_content[:min(PARTITION_SIZE, size_in_bytes - offset)],
+        )
+
+
+def main() -> None:
+    """Times the concatenation of the partitions with each copy method."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--size-in-mib",
+        type=float,
+        default=DEFAULT_SIZE_IN_MIB,
+        help=f"The size of the synthetic file in MiB (default: {DEFAULT_SIZE_IN_MIB}).",
+    )
+    parser.add_argument(
+        "--directory",
+        default=None,
+        help="The directory in which the temporary directory is created.",
+    )
+    arguments = parser.parse_args()
+    size_in_bytes = int(arguments.size_in_mib * 1024 ** 2)
+    size_in_gib = size_in_bytes / 1024 ** 3
+    with tempfile.TemporaryDirectory(dir=arguments.directory) as path:
+        path_to_output_file = pathlib.Path(path).joinpath("COREREF_207_20200717.txt.bz2")
+        print(f"{size_in_gib:.2f} GiB in {-(-size_in_bytes // PARTITION_SIZE)} partitions")
+        print(f"{'copy method':>16} {'seconds':>10} {'GiB/s':>10}")
+        for copy_method in COPY_METHODS:
+            write_partitions(path_to_output_file, size_in_bytes)
+            if path_to_output_file.exists():
+                path_to_output_file.unlink()
+            start = time.perf_counter()
+            post_download_processing.concatenate_partitions(path_to_output_file, copy_method)
+            elapsed = time.perf_counter() - start
+            assert path_to_output_file.stat().st_size == size_in_bytes
+            print(f"{copy_method:>16} {elapsed:>10.3f} {size_in_gib / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Micro-benchmark of the crawler's directory tree traversal.
+
+The benchmark builds in-memory mocked DataVault directory trees of increasing size (up to
+100k directory nodes) and times the depth-first traversal shared by all the crawlers of
+the library. Since no request is sent over the network, the timings measure only the CPU
+cost of the traversal, which should grow linearly with the number of nodes: the time per
+node reported for each tree size should stay roughly constant.
+
+Run with:
+
+    python benchmarks/crawler_benchmark.py
+"""
+import datetime
+import time
+from typing import Dict, List, Tuple
+
+from datavault_api_client import crawler
+
+
+FILE_TYPES = ("CORE", "CROSS")
+
+
+def build_mocked_tree(number_of_nodes: int) -> Tuple[str, Dict[str, List[Dict]]]:
+    """Builds the listings of a mocked directory tree with at least number_of_nodes nodes.
+
+    Parameters
+    ----------
+    number_of_nodes: int
+        The minimum number of directory nodes in the mocked tree.
+
+    Returns
+    -------
+    Tuple[str, Dict[str, List[Dict]]]
+        The url of the root node and a dictionary mapping each node url to its listing.
+    """
+    root_url = crawler.create_node_url("/v2/list")
+    listings: Dict[str, List[Dict]] = {root_url: []}
+    date = datetime.date(2000, 1, 1)
+    nodes = 0
+    while nodes < number_of_nodes:
+        year, month, day = f"{date:%Y}", f"{date:%m}", f"{date:%d}"
+        path = "/v2/list"
+        for component in (year, month, day):
+            child_path = f"{path}/{component}"
+            child_url = crawler.create_node_url(child_path)
+            if child_url not in listings:
+                listings[crawler.create_node_url(path)].append(
+                    {"name": component, "url": child_path, "directory": True},
+                )
+                listings[child_url] = []
+                nodes += 1
+            path = child_path
+        for source_id in range(100, 150):
+            source_path = f"{path}/S{source_id}"
+            listings[crawler.create_node_url(path)].append(
+                {"name": f"S{source_id}", "url": source_path, "directory": True},
+            )
+            listings[crawler.create_node_url(source_path)] = []
+            nodes += 1
+            for file_type in FILE_TYPES:
+                type_path = f"{source_path}/{file_type}"
+                listings[crawler.create_node_url(source_path)].append(
+                    {"name": file_type, "url": type_path, "directory": True},
+                )
+                listings[crawler.create_node_url(type_path)] = [
+                    {
+                        "name": f"{file_type}REF_{source_id}_{date:%Y%m%d}.txt.bz2",
+                        "url": type_path.replace("/list/", "/data/") + "/ALL_0_0",
+                        "size": 1024,
+                        "md5sum": "0" * 32,
+                        "directory": False,
+                    },
+                ]
+                nodes += 1
+        date += datetime.timedelta(days=1)
+    return root_url, listings
+
+
+def main() -> None:
+    """Times the traversal of mocked trees of increasing size."""
+    print(f"{'nodes':>10} {'files':>10} {'seconds':>10} {'us/node':>10}")
+    for number_of_nodes in (12_500, 25_000, 50_000, 100_000):
+        root_url, listings = build_mocked_tree(number_of_nodes)
+        start = time.perf_counter()
+        discovered_files = crawler.assemble_discovered_files(root_url, listings)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(listings):>10} {len(discovered_files):>10} {elapsed:>10.3f} "
+            f"{elapsed / len(listings) * 1e6:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
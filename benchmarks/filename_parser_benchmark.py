@@ -0,0 +1,75 @@
+"""Micro-benchmark of the parsing of DataVault file names.
+
+The benchmark generates 1M synthetic file names, following both the
+'<FILE-TYPE>_<SOURCE-ID>_<DATE>' and the WATCHLIST name grammars and spread over a few
+years of reference dates, and times the per-name cost of the component-wise parsing
+(clean_raw_filename, parse_source_from_name and parse_reference_date, as originally used
+by create_discovered_file_object) against the single-pass parse_file_name.
+
+Run with:
+
+    python benchmarks/filename_parser_benchmark.py
+"""
+import datetime
+import time
+from typing import List
+
+from datavault_api_client import crawler
+from datavault_api_client.helpers import parse_file_name
+
+
+FILE_TYPES = ("COREREF", "CROSSREF", "PREMREF", "REPLAY", "WATCHLIST")
+
+
+def generate_file_names(number_of_names: int) -> List[str]:
+    """Generates synthetic DataVault file names.
+
+    Parameters
+    ----------
+    number_of_names: int
+        The number of file names to generate.
+
+    Returns
+    -------
+    List[str]
+        The list of the generated file names.
+    """
+    first_date = datetime.date(2018, 1, 1)
+    file_names = []
+    for index in range(number_of_names):
+        file_type = FILE_TYPES[index % len(FILE_TYPES)]
+        source_id = 100 + index % 900
+        date = first_date + datetime.timedelta(days=index % 1000)
+        if file_type == "WATCHLIST":
+            file_names.append(f"WATCHLIST_username_{source_id}_{date:%Y%m%d}.txt.bz2")
+        else:
+            file_names.append(f"{file_type}_{source_id}_{date:%Y%m%d}.txt.bz2")
+    return file_names
+
+
+def parse_component_wise(raw_filename: str) -> tuple:
+    """Parses a file name as originally done by create_discovered_file_object."""
+    return (
+        crawler.clean_raw_filename(raw_filename),
+        int(crawler.parse_source_from_name(crawler.clean_raw_filename(raw_filename))),
+        crawler.parse_reference_date(crawler.clean_raw_filename(raw_filename)),
+    )
+
+
+def main() -> None:
+    """Times the parsing of 1M synthetic file names."""
+    file_names = generate_file_names(1_000_000)
+    print(f"{'parser':>15} {'seconds':>10} {'ns/name':>10}")
+    for parser_name, parser in (
+        ("component-wise", parse_component_wise),
+        ("single-pass", parse_file_name),
+    ):
+        start = time.perf_counter()
+        for file_name in file_names:
+            parser(file_name)
+        elapsed = time.perf_counter() - start
+        print(f"{parser_name:>15} {elapsed:>10.3f} {elapsed / len(file_names) * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark of the generation of the date-specific download manifest files.
+
+The benchmark generates synthetic DownloadDetails named-tuples for 5 years of reference
+dates and 200 sources (one file per source and day), and times:
+
+- the grouping of the files by date-specific manifest, carried out by scanning all the
+  files once per date (filter_date_specific_info, as originally used by
+  generate_manifest_file) against the single pass of group_items_by_manifest_path;
+- the writing of the manifest files to a temporary directory, one file after the other
+  against the concurrent writing of generate_manifest_file.
+
+Run with:
+
+    python benchmarks/manifest_generation_benchmark.py
+"""
+import datetime
+import pathlib
+import tempfile
+import time
+from typing import Dict, List
+
+from datavault_api_client import pre_download_processing
+from datavault_api_client.data_structures import DownloadDetails, ItemToDownload
+
+
+NUMBER_OF_YEARS = 5
+NUMBER_OF_SOURCES = 200
+
+
+def generate_download_details(path_to_data_directory: str) -> List[DownloadDetails]:
+    """Generates synthetic download details for multiple years and sources.
+
+    Parameters
+    ----------
+    path_to_data_directory: str
+        The full path to the directory where the manifest files are written.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        The list of the DownloadDetails named-tuples of the generated files.
+    """
+    first_date = datetime.datetime(2016, 1, 1)
+    download_details = []
+    for day in range(NUMBER_OF_YEARS * 365):
+        date = first_date + datetime.timedelta(days=day)
+        for source_id in range(100, 100 + NUMBER_OF_SOURCES):
+            file_name = f"COREREF_{source_id}_{date:%Y%m%d}.txt.bz2"
+            download_details.append(
+                DownloadDetails(
+                    file_name=file_name,
+                    download_url=(
+                        f"https://api.icedatavault.icedataservices.com/v2/data/{date:%Y/%m/%d}/"
+                        f"S{source_id}/CORE/{date:%Y%m%d}-S{source_id}_CORE_ALL_0_0"
+                    ),
+                    file_path=pathlib.Path(path_to_data_directory).joinpath(
+                        f"{date:%Y/%m/%d}/S{source_id}/CORE/{file_name}"
+                    ),
+                    source_id=source_id,
+                    reference_date=date,
+                    size=1024 * source_id,
+                    md5sum="0" * 32,
+                    is_partitioned=False,
+                )
+            )
+    return download_details
+
+
+def group_date_by_date(
+    download_details: List[DownloadDetails],
+) -> Dict[str, List[ItemToDownload]]:
+    """Groups the files as originally done by generate_manifest_file."""
+    items_by_manifest_path = {}
+    for date in {file.reference_date for file in download_details}:
+        date_specific_items = pre_download_processing.filter_date_specific_info(
+            download_details, date,
+        )
+        items_by_manifest_path[
+            pre_download_processing.generate_date_specific_path(date_specific_items[0])
+        ] = date_specific_items
+    return items_by_manifest_path
+
+
+def main() -> None:
+    """Times the grouping and the writing of the manifest files."""
+    with tempfile.TemporaryDirectory() as path_to_data_directory:
+        download_details = generate_download_details(path_to_data_directory)
+        print(f"{len(download_details)} files over {NUMBER_OF_YEARS * 365} days")
+        print(f"{'step':>24} {'seconds':>10}")
+
+        start = time.perf_counter()
+        group_date_by_date(download_details)
+        print(f"{'grouping date by date':>24} {time.perf_counter() - start:>10.3f}")
+
+        start = time.perf_counter()
+        items_by_manifest_path = pre_download_processing.group_items_by_manifest_path(
+            download_details,
+        )
+        print(f"{'single-pass grouping':>24} {time.perf_counter() - start:>10.3f}")
+
+        start = time.perf_counter()
+        for manifest_path, date_specific_items in items_by_manifest_path.items():
+            pre_download_processing.write_manifest_to_json(
+                date_specific_items,
+                manifest_path.replace(".json", "_sequential.json"),
+            )
+        print(f"{'sequential writing':>24} {time.perf_counter() - start:>10.3f}")
+
+        start = time.perf_counter()
+        pre_download_processing.generate_manifest_file(download_details)
+        print(f"{'generate_manifest_file':>24} {time.perf_counter() - start:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
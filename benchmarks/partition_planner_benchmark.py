@@ -0,0 +1,104 @@
+"""Benchmark of the planning of the partitions of the concurrent download manifest.
+
+The benchmark generates synthetic DownloadDetails named-tuples of partitioned files, with
+sizes spread between 3 and 20 partitions, and times the file-by-file planning
+(create_list_of_file_specific_partition_download_info, as originally used by
+generate_partitions_download_manifest) against the batched
+plan_partitions_download_manifest, for manifests growing up to 1M partitions. A linear
+planner keeps a constant cost per partition as the manifest grows. The batched planner
+uses NumPy if it is installed, and the array module otherwise.
+
+Run with:
+
+    python benchmarks/partition_planner_benchmark.py
+"""
+import datetime
+import gc
+import itertools
+import pathlib
+import time
+from typing import List
+
+from datavault_api_client import pre_download_processing
+from datavault_api_client.data_structures import DownloadDetails
+
+
+PARTITION_SIZE_IN_MIB = 5.0
+
+
+def generate_files_to_partition(number_of_partitions: int) -> List[DownloadDetails]:
+    """Generates synthetic partitioned files summing up to a number of partitions.
+
+    Parameters
+    ----------
+    number_of_partitions: int
+        The approximate total number of partitions of the generated files.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        The list of the DownloadDetails named-tuples of the generated files.
+    """
+    partition_size = pre_download_processing.convert_mib_to_bytes(PARTITION_SIZE_IN_MIB)
+    files_to_partition = []
+    total_number_of_partitions = 0
+    index = 0
+    while total_number_of_partitions < number_of_partitions:
+        file_number_of_partitions = 3 + index % 18
+        file_name = f"COREREF_{100 + index % 900}_20200716_{index}.txt.bz2"
+        files_to_partition.append(
+            DownloadDetails(
+                file_name=file_name,
+                download_url=(
+                    "https://api.icedatavault.icedataservices.com/v2/data/2020/07/16/"
+                    f"S{100 + index % 900}/CORE/20200716-S{100 + index % 900}_CORE_ALL_{index}"
+                ),
+                file_path=pathlib.Path(f"/data/2020/07/16/S{100 + index % 900}/CORE/{file_name}"),
+                source_id=100 + index % 900,
+                reference_date=datetime.datetime(2020, 7, 16),
+                size=(file_number_of_partitions - 1) * partition_size + 1 + index % 1000,
+                md5sum="0" * 32,
+                is_partitioned=True,
+            )
+        )
+        total_number_of_partitions += file_number_of_partitions
+        index += 1
+    return files_to_partition
+
+
+def plan_file_by_file(files_to_partition: List[DownloadDetails]) -> list:
+    """Plans the partitions as originally done by generate_partitions_download_manifest."""
+    return list(itertools.chain.from_iterable(
+        pre_download_processing.create_list_of_file_specific_partition_download_info(
+            file, PARTITION_SIZE_IN_MIB,
+        )
+        for file in files_to_partition
+    ))
+
+
+def main() -> None:
+    """Times the planning of manifests of up to 1M partitions."""
+    backend = "numpy" if pre_download_processing.numpy is not None else "array"
+    print(f"batched planner backend: {backend}")
+    print(f"{'planner':>12} {'partitions':>11} {'seconds':>10} {'ns/partition':>13}")
+    for number_of_partitions in (125_000, 250_000, 500_000, 1_000_000):
+        files_to_partition = generate_files_to_partition(number_of_partitions)
+        for planner_name, planner in (
+            ("file-by-file", plan_file_by_file),
+            ("batched", lambda files: pre_download_processing.plan_partitions_download_manifest(
+                files, PARTITION_SIZE_IN_MIB,
+            )),
+        ):
+            gc.collect()
+            start = time.perf_counter()
+            partitions = planner(files_to_partition)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{planner_name:>12} {len(partitions):>11} {elapsed:>10.3f} "
+                f"{elapsed / len(partitions) * 1e9:>13.0f}"
+            )
+            del partitions
+
+
+if __name__ == "__main__":
+    main()
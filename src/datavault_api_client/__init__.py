@@ -6,14 +6,26 @@
 
 
 from datavault_api_client import (
+    checksum_cache,
     connectivity,
+    crawl_checkpoint,
     crawler,
     data_integrity,
     data_structures,
+    discovered_files_table,
     downloaders,
     helpers,
+    high_water_marks,
+    json_backend,
+    listing_cache,
+    local_inventory,
+    manifest_store,
+    partition_hashing,
+    partition_writes,
     post_download_processing,
     pre_download_processing,
+    rate_control,
+    snapshots,
 )
 
 
@@ -30,12 +42,24 @@ __copyright__ = "copyright (c) 2020 Jacopo Abbate"
 
 
 __all__ = [
+    "checksum_cache",
     "connectivity",
+    "crawl_checkpoint",
     "crawler",
     "data_integrity",
     "data_structures",
+    "discovered_files_table",
     "downloaders",
     "helpers",
+    "high_water_marks",
+    "json_backend",
+    "listing_cache",
+    "local_inventory",
+    "manifest_store",
+    "partition_hashing",
+    "partition_writes",
     "post_download_processing",
     "pre_download_processing",
+    "rate_control",
+    "snapshots",
 ]
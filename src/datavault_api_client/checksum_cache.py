@@ -0,0 +1,134 @@
+"""Implements a persistent checksum cache stored in a SQLite database.
+
+Every data integrity test re-reads and re-hashes the tested files from disk, which is the
+dominant cost of verifying (or re-running a download over) a large existing tree. The
+PersistentChecksumCache records the md5sum of each hashed file under a key made of its
+inode, size and modification time in nanoseconds, so that the md5sum of an unchanged file
+is looked up instead of being calculated again. Since any modification or replacement of
+a file changes its key, entries are never served for modified files; their stale entries
+are simply never looked up again.
+"""
+import pathlib
+import sqlite3
+import threading
+from types import TracebackType
+from typing import Dict, Iterator, MutableMapping, Optional, Tuple, Type
+
+
+CacheKey = Tuple[int, int, int]
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checksums (
+        inode INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        md5sum TEXT NOT NULL,
+        PRIMARY KEY (inode, size, mtime_ns)
+    ) WITHOUT ROWID
+"""
+
+
+class PersistentChecksumCache(MutableMapping[CacheKey, str]):
+    """A mapping from the inode, size and modification time of a file to its md5sum.
+
+    The new entries are buffered in memory and written to the database in batches of
+    batch_size entries, and when the cache is flushed or closed. The cache can be shared
+    by multiple threads, since all the accesses to the database connection are serialised
+    by a lock.
+
+    Parameters
+    ----------
+    path_to_database: str
+        The full path to the SQLite database file. Its parent directory is created if it
+        does not exist.
+    batch_size: int
+        The number of new entries buffered before they are written to the database. By
+        default is set equal to 1000.
+    """
+
+    def __init__(self, path_to_database: str, batch_size: int = 1000) -> None:
+        pathlib.Path(path_to_database).parent.mkdir(parents=True, exist_ok=True)
+        self.path_to_database = path_to_database
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.pending_entries: Dict[CacheKey, str] = {}
+        self.connection = sqlite3.connect(path_to_database, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(SCHEMA)
+
+    def __getitem__(self, key: CacheKey) -> str:
+        with self.lock:
+            if key in self.pending_entries:
+                return self.pending_entries[key]
+            row = self.connection.execute(
+                "SELECT md5sum FROM checksums WHERE inode = ? AND size = ? AND mtime_ns = ?",
+                key,
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return str(row[0])
+
+    def __setitem__(self, key: CacheKey, md5sum: str) -> None:
+        with self.lock:
+            inode, size, mtime_ns = key
+            self.pending_entries[(inode, size, mtime_ns)] = md5sum
+            if len(self.pending_entries) >= self.batch_size:
+                self.write_pending_entries()
+
+    def __delitem__(self, key: CacheKey) -> None:
+        with self.lock:
+            was_pending = self.pending_entries.pop(key, None) is not None
+            with self.connection:
+                cursor = self.connection.execute(
+                    "DELETE FROM checksums WHERE inode = ? AND size = ? AND mtime_ns = ?",
+                    key,
+                )
+        if not was_pending and cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[CacheKey]:
+        self.flush()
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT inode, size, mtime_ns FROM checksums",
+            ).fetchall()
+        return iter(rows)
+
+    def __len__(self) -> int:
+        self.flush()
+        with self.lock:
+            return int(self.connection.execute("SELECT COUNT(*) FROM checksums").fetchone()[0])
+
+    def write_pending_entries(self) -> None:
+        """Writes the buffered entries to the database, with the lock already acquired."""
+        if not self.pending_entries:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO checksums (inode, size, mtime_ns, md5sum) "
+                "VALUES (?, ?, ?, ?)",
+                [(*key, md5sum) for key, md5sum in self.pending_entries.items()],
+            )
+        self.pending_entries.clear()
+
+    def flush(self) -> None:
+        """Writes the buffered entries to the database."""
+        with self.lock:
+            self.write_pending_entries()
+
+    def close(self) -> None:
+        """Writes the buffered entries and closes the connection to the database."""
+        with self.lock:
+            self.write_pending_entries()
+            self.connection.close()
+
+    def __enter__(self) -> "PersistentChecksumCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
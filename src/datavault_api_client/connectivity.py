@@ -18,6 +18,7 @@ def create_session(
     total_retries: int = 5,
     backoff_factor: float = 0.1,
     status_forcelist: Tuple[int, ...] = (401, 500, 502, 503, 504),
+    respect_retry_after_header: bool = True,
 ) -> requests.Session:
     """Creates a session object with support for a retry logic.
 
@@ -29,6 +30,9 @@ def create_session(
         The backoff factor used to calculate the waiting time between each retry.
     status_forcelist: tuple
         A tuple of status codes that will trigger a retry in case of occurrence.
+    respect_retry_after_header: bool
+        Whether the 413, 429 and 503 responses carrying a Retry-After header are retried
+        after the requested delay. By default is set equal to True.
 
     Returns
     -------
@@ -43,6 +47,7 @@ def create_session(
                 total=total_retries,
                 backoff_factor=backoff_factor,
                 status_forcelist=status_forcelist,
+                respect_retry_after_header=respect_retry_after_header,
             ),
         ),
     )
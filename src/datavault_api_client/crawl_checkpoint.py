@@ -0,0 +1,291 @@
+"""Implements the checkpointing of the DataVault crawls to a local file.
+
+A crawl over a large endpoint lists thousands of directories, and a single failed request
+deep in the directory tree used to discard all the state discovered up to that point. A
+crawl checkpoint periodically saves the state of the depth-first traversal (the stack of
+the directories still to visit, the set of the visited directories and the files
+discovered so far) to local files, so that a crawl interrupted by a failure can be
+resumed from the last saved state by the next invocation of the crawler.
+
+The visited directories and the discovered files only grow during a crawl, and are
+appended to a JSON-lines journal next to the checkpoint file (e.g. crawl.json.journal),
+so that each save only writes the records added since the previous one. The checkpoint
+file itself, rewritten atomically at each save, holds the stack of the directories still
+to visit together with the size of the journal at the time of the save: the records
+appended to the journal by a save that was interrupted before the checkpoint file was
+replaced are ignored, and the saved state is always consistent.
+"""
+import datetime
+import functools
+import json
+import pathlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, TypeVar, Union
+
+from datavault_api_client.data_structures import (
+    CrawlParameters,
+    CrawlState,
+    DiscoveredFileInfo,
+)
+from datavault_api_client.helpers import write_file_atomically
+
+
+JOURNAL_SUFFIX = ".journal"
+
+SelectedValue = TypeVar("SelectedValue", int, str)
+
+
+class CrawlCheckpoint:
+    """A file storing the state of a crawl, saved at regular intervals.
+
+    Parameters
+    ----------
+    path_to_checkpoint_file: str
+        The full path to the file where the state of the crawl is saved. Its parent
+        directory is created if it does not exist. The journal of the visited directories
+        and of the discovered files is saved next to it, with the .journal suffix.
+    checkpoint_interval: int
+        The number of directory nodes visited between two consecutive saves of the state
+        of the crawl. By default is set equal to 100.
+    """
+
+    def __init__(self, path_to_checkpoint_file: str, checkpoint_interval: int = 100) -> None:
+        self.path_to_checkpoint_file = pathlib.Path(path_to_checkpoint_file)
+        self.path_to_checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        self.path_to_journal = self.path_to_checkpoint_file.with_name(
+            self.path_to_checkpoint_file.name + JOURNAL_SUFFIX,
+        )
+        self.checkpoint_interval = checkpoint_interval
+        self.journal_size: Optional[int] = None
+        self.journaled_visited_nodes: Set[str] = set()
+        self.number_of_journaled_leaf_nodes = 0
+
+    def load(self, url: str, parameters: CrawlParameters) -> Optional[CrawlState]:
+        """Loads the state of an interrupted crawl.
+
+        Parameters
+        ----------
+        url: str
+            The url from which the crawl starts.
+        parameters: CrawlParameters
+            The filters applied to the crawl, as returned by get_crawl_parameters.
+
+        Returns
+        -------
+        Optional[CrawlState]
+            The state of the interrupted crawl, or None if there is no checkpoint, if the
+            checkpoint cannot be read, or if it was saved by a crawl with a different url
+            or different filters.
+        """
+        try:
+            with self.path_to_checkpoint_file.open("r") as infile:
+                raw_state = json.load(infile)
+            if raw_state["url"] != url or raw_state["parameters"] != parameters:
+                return None
+            journal_size = raw_state["journal_size"]
+            visited_nodes, leaf_nodes = self.read_journal(journal_size)
+            crawl_state = CrawlState(
+                url=raw_state["url"],
+                parameters=raw_state["parameters"],
+                stack=raw_state["stack"],
+                visited_nodes=visited_nodes,
+                leaf_nodes=leaf_nodes,
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self.journal_size = journal_size
+        self.journaled_visited_nodes = set(visited_nodes)
+        self.number_of_journaled_leaf_nodes = len(leaf_nodes)
+        return crawl_state
+
+    def read_journal(self, journal_size: int) -> Tuple[Set[str], List[DiscoveredFileInfo]]:
+        """Reads the visited nodes and the leaf nodes recorded in the journal.
+
+        Parameters
+        ----------
+        journal_size: int
+            The size in Bytes of the journal at the time of the last completed save. The
+            records appended after it are ignored.
+
+        Returns
+        -------
+        Tuple[Set[str], List[DiscoveredFileInfo]]
+            The set of the visited nodes and the list of the leaf nodes, in the order in
+            which they were discovered.
+
+        Raises
+        ------
+        ValueError
+            If the journal is shorter than journal_size.
+        """
+        with self.path_to_journal.open("rb") as infile:
+            content = infile.read(journal_size)
+        if len(content) != journal_size:
+            raise ValueError("Truncated crawl journal")
+        visited_nodes = set()
+        leaf_nodes = []
+        for line in content.splitlines():
+            record = json.loads(line)
+            if "visited_node" in record:
+                visited_nodes.add(record["visited_node"])
+            else:
+                leaf_nodes.append(convert_dict_to_discovered_file(record["leaf_node"]))
+        return visited_nodes, leaf_nodes
+
+    def save(self, crawl_state: CrawlState) -> None:
+        """Saves the state of a crawl, appending the new records to the journal.
+
+        The visited nodes and the leaf nodes are expected to only grow between two
+        consecutive saves of the same crawl: otherwise, the journal is written again from
+        scratch.
+
+        Parameters
+        ----------
+        crawl_state: CrawlState
+            The state of the crawl to save.
+        """
+        has_fewer_leaf_nodes = len(crawl_state.leaf_nodes) < self.number_of_journaled_leaf_nodes
+        has_fewer_visited_nodes = len(crawl_state.visited_nodes) < len(self.journaled_visited_nodes)
+        if self.journal_size is None or has_fewer_leaf_nodes or has_fewer_visited_nodes:
+            self.journal_size = 0
+            self.journaled_visited_nodes = set()
+            self.number_of_journaled_leaf_nodes = 0
+        new_visited_nodes = crawl_state.visited_nodes - self.journaled_visited_nodes
+        records = [
+            json.dumps({"visited_node": visited_node}) for visited_node in sorted(new_visited_nodes)
+        ]
+        records.extend(
+            json.dumps({"leaf_node": convert_discovered_file_to_dict(leaf_node)})
+            for leaf_node in crawl_state.leaf_nodes[self.number_of_journaled_leaf_nodes:]
+        )
+        # Any record left after the last completed save by an interrupted save is dropped.
+        with self.path_to_journal.open("ab") as journal:
+            journal.truncate(self.journal_size)
+            journal.seek(self.journal_size)
+            journal.write("".join(f"{record}\n" for record in records).encode())
+            journal_size = journal.tell()
+        raw_state = {
+            "url": crawl_state.url,
+            "parameters": crawl_state.parameters,
+            "stack": crawl_state.stack,
+            "journal_size": journal_size,
+        }
+        write_file_atomically(
+            self.path_to_checkpoint_file, functools.partial(json.dump, raw_state),
+        )
+        self.journal_size = journal_size
+        self.journaled_visited_nodes.update(new_visited_nodes)
+        self.number_of_journaled_leaf_nodes = len(crawl_state.leaf_nodes)
+
+    def remove(self) -> None:
+        """Removes the checkpoint file and its journal once the crawl is completed."""
+        for path_to_file in (self.path_to_checkpoint_file, self.path_to_journal):
+            if path_to_file.is_file():
+                path_to_file.unlink()
+        self.journal_size = None
+        self.journaled_visited_nodes = set()
+        self.number_of_journaled_leaf_nodes = 0
+
+
+def get_crawl_parameters(
+    source_ids: Optional[FrozenSet[int]] = None,
+    file_types: Optional[FrozenSet[str]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+) -> CrawlParameters:
+    """Returns the filters applied to a crawl in a JSON serialisable form.
+
+    Parameters
+    ----------
+    source_ids: Optional[FrozenSet[int]]
+        The set of the selected source ids, if any.
+    file_types: Optional[FrozenSet[str]]
+        The set of the selected file types, if any.
+    from_date: Optional[datetime.date]
+        The first reference date of the crawl, if any.
+    to_date: Optional[datetime.date]
+        The last reference date of the crawl, if any.
+
+    Returns
+    -------
+    CrawlParameters
+        A dictionary with the filters of the crawl.
+    """
+    return {
+        "source_ids": sort_selection(source_ids),
+        "file_types": sort_selection(file_types),
+        "from_date": from_date.isoformat() if from_date is not None else None,
+        "to_date": to_date.isoformat() if to_date is not None else None,
+    }
+
+
+def sort_selection(
+    selection: Optional[Iterable[SelectedValue]],
+) -> Optional[List[SelectedValue]]:
+    """Converts an optional selection into a sorted list.
+
+    Parameters
+    ----------
+    selection: Optional[Iterable[SelectedValue]]
+        An optional collection of selected source ids or file types.
+
+    Returns
+    -------
+    Optional[List[SelectedValue]]
+        The sorted list of the selected values, or None if there is no selection.
+    """
+    if selection is None:
+        return None
+    return sorted(selection)
+
+
+def convert_discovered_file_to_dict(
+    discovered_file: DiscoveredFileInfo,
+) -> Dict[str, Union[str, int]]:
+    """Converts a DiscoveredFileInfo named-tuple into a JSON serialisable dictionary.
+
+    Parameters
+    ----------
+    discovered_file: DiscoveredFileInfo
+        A DiscoveredFileInfo named-tuple.
+
+    Returns
+    -------
+    Dict[str, Union[str, int]]
+        A dictionary with the fields of the named-tuple, with the reference date in the
+        ISO format.
+    """
+    return {
+        "file_name": discovered_file.file_name,
+        "download_url": discovered_file.download_url,
+        "source_id": discovered_file.source_id,
+        "reference_date": discovered_file.reference_date.isoformat(),
+        "size": discovered_file.size,
+        "md5sum": discovered_file.md5sum,
+    }
+
+
+def convert_dict_to_discovered_file(
+    raw_discovered_file: Dict[str, Union[str, int]],
+) -> DiscoveredFileInfo:
+    """Converts a dictionary created by convert_discovered_file_to_dict into a named-tuple.
+
+    Parameters
+    ----------
+    raw_discovered_file: Dict[str, Union[str, int]]
+        A dictionary with the fields of a DiscoveredFileInfo named-tuple.
+
+    Returns
+    -------
+    DiscoveredFileInfo
+        The corresponding DiscoveredFileInfo named-tuple.
+    """
+    return DiscoveredFileInfo(
+        file_name=str(raw_discovered_file["file_name"]),
+        download_url=str(raw_discovered_file["download_url"]),
+        source_id=int(raw_discovered_file["source_id"]),
+        reference_date=datetime.datetime.fromisoformat(
+            str(raw_discovered_file["reference_date"]),
+        ),
+        size=int(raw_discovered_file["size"]),
+        md5sum=str(raw_discovered_file["md5sum"]),
+    )
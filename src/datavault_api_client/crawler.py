@@ -2,16 +2,59 @@
 
 The crawler uses a depth-first search traversal algorithm to scan the directory tree
 underlying a pre-defined Datavault API endpoint, to discover all the files available to
-download in the tree underneath that specific endpoint.
+download in the tree underneath that specific endpoint. Besides the sequential crawler,
+the module implements an asynchronous crawler and a thread-pool crawler that list the
+directory nodes concurrently before traversing the tree in memory, returning the same list
+of discovered files.
 """
+import asyncio
+import concurrent.futures
 import datetime
-from typing import Dict, List, Optional, Tuple
+import functools
+import itertools
+import time
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 import urllib.parse
 
 import requests
 
 from datavault_api_client.connectivity import create_session
-from datavault_api_client.data_structures import DiscoveredFileInfo
+from datavault_api_client.crawl_checkpoint import CrawlCheckpoint, get_crawl_parameters
+from datavault_api_client.data_structures import (
+    CrawlState,
+    DiscoveredFileInfo,
+    ListingNode,
+    ParsedFileName,
+)
+from datavault_api_client.discovered_files_table import DiscoveredFilesTable
+from datavault_api_client.downloaders import thread_get_session
+from datavault_api_client.helpers import (
+    get_node_date_range,
+    get_node_path_components,
+    parse_file_name,
+)
+from datavault_api_client.high_water_marks import (
+    get_incremental_from_date,
+    HighWaterMarkStore,
+)
+from datavault_api_client.json_backend import decode_node_listing
+from datavault_api_client.listing_cache import get_revalidation_headers, ListingCache
+from datavault_api_client.rate_control import (
+    AdaptiveConcurrencyLimiter,
+    RATE_LIMITING_STATUS_CODES,
+    thread_get_rate_controlled_session,
+)
 
 
 def clean_raw_filename(raw_filename: str) -> str:
@@ -93,7 +136,38 @@ def parse_reference_date(file_name: str) -> datetime.datetime:
     return datetime.datetime.strptime(file_name.split("_")[2].split(".")[0], "%Y%m%d")
 
 
-def create_discovered_file_object(file_node: Dict) -> DiscoveredFileInfo:
+def parse_leaf_node_name(raw_filename: str) -> ParsedFileName:
+    """Parses the components of the name of a leaf node.
+
+    The file name is parsed in a single pass by parse_file_name, falling back to the
+    component-wise parsing functions for names that do not match its grammars.
+
+    Parameters
+    ----------
+    raw_filename: str
+        The name of a leaf node of the DataVault API directory tree.
+
+    Returns
+    -------
+    ParsedFileName
+        A ParsedFileName named-tuple with the cleaned file name, the source id and the
+        reference date.
+    """
+    parsed_file_name = parse_file_name(raw_filename)
+    if parsed_file_name is not None:
+        return parsed_file_name
+    file_name = clean_raw_filename(raw_filename)
+    return ParsedFileName(
+        file_name=file_name,
+        source_id=int(parse_source_from_name(file_name)),
+        reference_date=parse_reference_date(file_name),
+    )
+
+
+def create_discovered_file_object(
+    file_node: ListingNode,
+    parsed_file_name: Optional[ParsedFileName] = None,
+) -> DiscoveredFileInfo:
     """Creates a DiscoveredFileInfo named-tuple from the information in the leaf nodes of the API.
 
     Each leaf node of the DataVault API directory tree consists of a dictionary containing
@@ -104,10 +178,13 @@ def create_discovered_file_object(file_node: Dict) -> DiscoveredFileInfo:
 
     Parameters
     ----------
-    file_node: Dict
+    file_node: ListingNode
         The dictionary obtained as a response to the API call at the instrument-type-level
         url of the DataVault API. The dictionary contains all the information that is
         necessary to describe a DataVault file.
+    parsed_file_name: Optional[ParsedFileName]
+        The components of the name of the file, if already parsed by parse_leaf_node_name.
+        If omitted, the name is parsed by the function.
 
     Returns
     -------
@@ -115,22 +192,567 @@ def create_discovered_file_object(file_node: Dict) -> DiscoveredFileInfo:
         A named tuple that organises the file information retrieved through the API call.
 
     """
+    if parsed_file_name is None:
+        parsed_file_name = parse_leaf_node_name(file_node["name"])
     return DiscoveredFileInfo(
-        file_name=clean_raw_filename(file_node["name"]),
+        file_name=parsed_file_name.file_name,
         download_url=create_node_url(file_node["url"]),
-        source_id=int(parse_source_from_name(clean_raw_filename(file_node["name"]))),
-        reference_date=parse_reference_date(clean_raw_filename(file_node["name"])),
+        source_id=parsed_file_name.source_id,
+        reference_date=parsed_file_name.reference_date,
         size=file_node["size"],
         md5sum=file_node["md5sum"],
     )
 
 
+def send_listing_request(
+    url: str,
+    credentials: Tuple[str, str],
+    session: requests.Session,
+    headers: Optional[Dict[str, str]] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    max_number_of_attempts: int = 5,
+) -> requests.Response:
+    """Sends a listing request, under the control of an optional concurrency limiter.
+
+    If a concurrency limiter is passed, the request is sent only once the limiter allows
+    it, and its outcome is reported back to the limiter. The requests rejected with a 429
+    or 503 status code are sent again, after any delay requested by the server through
+    the Retry-After header, up to max_number_of_attempts times.
+
+    Parameters
+    ----------
+    url: str
+        The full url of the node to list.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    session: requests.Session
+        A session object.
+    headers: Optional[Dict[str, str]]
+        Optional additional headers of the request.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter of the number of listing requests in flight.
+    max_number_of_attempts: int
+        The maximum number of times a rate-limited request is sent. By default is set
+        equal to 5.
+
+    Returns
+    -------
+    requests.Response
+        The response of the DataVault API.
+    """
+    if concurrency_limiter is None:
+        return session.get(url, auth=credentials, headers=headers)
+    for attempt in range(1, max_number_of_attempts + 1):
+        concurrency_limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = session.get(url, auth=credentials, headers=headers)
+        except requests.exceptions.RequestException:
+            concurrency_limiter.release(time.monotonic() - start)
+            raise
+        concurrency_limiter.release(
+            time.monotonic() - start,
+            response.status_code,
+            response.headers.get("Retry-After"),
+        )
+        is_rate_limited = response.status_code in RATE_LIMITING_STATUS_CODES
+        if not is_rate_limited or attempt == max_number_of_attempts:
+            break
+        response.close()
+    return response
+
+
+def get_node_listing(
+    url: str,
+    credentials: Tuple[str, str],
+    session: requests.Session,
+    listing_cache: Optional[ListingCache] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> List[ListingNode]:
+    """Retrieves the list of child nodes of a node of the DataVault API directory tree.
+
+    If a listing cache is passed, a fresh cached listing is returned without contacting
+    the server. An expired cached listing is revalidated with a conditional request and
+    reused if the server reports that it has not changed. Any listing retrieved from the
+    server is stored in the cache.
+
+    Parameters
+    ----------
+    url: str
+        The full url of the node to list.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    session: requests.Session
+        A session object.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter of the number of listing requests in flight. The listings
+        served from the listing cache do not count towards the limit.
+
+    Returns
+    -------
+    List[ListingNode]
+        A list of dictionaries, each describing a child node (either a directory or a
+        file) of the node that was queried.
+
+    Raises
+    ------
+    requests.exceptions.HTTPError
+        If the DataVault API responds with an error status code.
+    """
+    if listing_cache is None:
+        with send_listing_request(
+            url, credentials, session, concurrency_limiter=concurrency_limiter,
+        ) as response:
+            response.raise_for_status()
+            return decode_node_listing(response.content)
+    cached_listing = listing_cache.load(url)
+    if cached_listing is not None and listing_cache.is_fresh(cached_listing):
+        return cached_listing.listing
+    with send_listing_request(
+        url,
+        credentials,
+        session,
+        get_revalidation_headers(cached_listing),
+        concurrency_limiter,
+    ) as response:
+        if response.status_code == 304 and cached_listing is not None:
+            listing_cache.refresh(cached_listing)
+            return cached_listing.listing
+        response.raise_for_status()
+        listing = decode_node_listing(response.content)
+    listing_cache.store(url, listing, response.headers)
+    return listing
+
+
+def get_selected_source_ids(
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+) -> Optional[FrozenSet[int]]:
+    """Normalises a source id selection into a frozenset of integer source ids.
+
+    The crawlers normalise the selection once per crawl, and pass the frozenset to the
+    functions that filter the nodes of each listing.
+
+    Parameters
+    ----------
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids. Source ids passed as strings
+        are converted to integers.
+
+    Returns
+    -------
+    Optional[FrozenSet[int]]
+        The frozenset of selected source ids, or None if no source id is selected.
+    """
+    if not source_id:
+        return None
+    if isinstance(source_id, (int, str)):
+        return frozenset((int(source_id),))
+    return frozenset(int(selected_source_id) for selected_source_id in source_id)
+
+
+def get_selected_file_types(
+    file_types: Optional[Iterable[str]] = None,
+) -> Optional[FrozenSet[str]]:
+    """Normalises a file type selection into a frozenset of upper case file types.
+
+    Parameters
+    ----------
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types.
+
+    Returns
+    -------
+    Optional[FrozenSet[str]]
+        The frozenset of selected file types, or None if no file type is selected.
+    """
+    if not file_types:
+        return None
+    return frozenset(file_type.upper() for file_type in file_types)
+
+
+def is_matching_source(
+    parsed_file_name: ParsedFileName,
+    selected_source_ids: Optional[FrozenSet[int]] = None,
+) -> bool:
+    """Checks whether a leaf node belongs to one of the selected sources.
+
+    Parameters
+    ----------
+    parsed_file_name: ParsedFileName
+        The components of the name of the file, as returned by parse_leaf_node_name.
+    selected_source_ids: Optional[FrozenSet[int]]
+        The selected source ids, as normalised by get_selected_source_ids. If None, every
+        file is considered a match.
+
+    Returns
+    -------
+    bool
+        True if no source id is specified or if the file belongs to one of the specified
+        sources, False otherwise.
+    """
+    if selected_source_ids is None:
+        return True
+    return parsed_file_name.source_id in selected_source_ids
+
+
+def is_matching_file_type(
+    file_node: ListingNode,
+    selected_file_types: Optional[FrozenSet[str]] = None,
+) -> bool:
+    """Checks whether a leaf node is of one of the selected file types.
+
+    The file type of a file is the first component of its name (e.g. COREREF for
+    'COREREF_945_20201201.txt.bz2').
+
+    Parameters
+    ----------
+    file_node: ListingNode
+        The dictionary describing a file, as returned by the DataVault API.
+    selected_file_types: Optional[FrozenSet[str]]
+        The selected file types, as normalised by get_selected_file_types. If None, every
+        file is considered a match.
+
+    Returns
+    -------
+    bool
+        True if no file type is specified or if the file is of one of the specified
+        types, False otherwise.
+    """
+    if selected_file_types is None:
+        return True
+    return file_node["name"].split("_")[0].upper() in selected_file_types
+
+
+def is_file_type_directory_selected(
+    directory_name: str,
+    selected_file_types: FrozenSet[str],
+) -> bool:
+    """Checks whether a file-type directory contains files of one of the selected types.
+
+    The file-type directories are named either after the file type they contain (e.g.
+    WATCHLIST, REPLAY) or after the file type without its 'REF' suffix (e.g. the CORE
+    directory contains the COREREF files and the CROSS directory the CROSSREF files).
+
+    Parameters
+    ----------
+    directory_name: str
+        The name of the file-type directory.
+    selected_file_types: FrozenSet[str]
+        The selected upper case file types.
+
+    Returns
+    -------
+    bool
+        True if the directory contains one of the selected file types, False otherwise.
+    """
+    directory_name = directory_name.upper()
+    return directory_name in selected_file_types or f"{directory_name}REF" in selected_file_types
+
+
+def is_directory_selected(
+    directory_node: ListingNode,
+    selected_source_ids: Optional[FrozenSet[int]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    selected_file_types: Optional[FrozenSet[str]] = None,
+) -> bool:
+    """Checks whether a directory node can contain any of the files selected for the crawl.
+
+    The check relies only on the url path of the directory, structured as
+    <year>/<month>/<day>/S<source-id>/<file-type>, so that the directories that cannot
+    contain any selected file are pruned before being requested.
+
+    Parameters
+    ----------
+    directory_node: ListingNode
+        The dictionary describing a directory, as returned by the DataVault API.
+    selected_source_ids: Optional[FrozenSet[int]]
+        The selected source ids, as normalised by get_selected_source_ids. If set, the
+        source directories of the other sources are pruned.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    selected_file_types: Optional[FrozenSet[str]]
+        The selected file types, as normalised by get_selected_file_types. If set, the
+        file-type directories of the other types are pruned.
+
+    Returns
+    -------
+    bool
+        True if the directory can contain selected files, False otherwise.
+    """
+    if not is_directory_in_date_range(directory_node, from_date, to_date):
+        return False
+    path_components = get_node_path_components(directory_node["url"])
+    if selected_source_ids is not None and len(path_components) > 3:
+        source_directory = path_components[3]
+        if source_directory[1:].isdigit() and int(source_directory[1:]) not in selected_source_ids:
+            return False
+    if selected_file_types is not None and len(path_components) > 4:
+        if not is_file_type_directory_selected(path_components[4], selected_file_types):
+            return False
+    return True
+
+
+def is_directory_in_date_range(
+    directory_node: ListingNode,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+) -> bool:
+    """Checks whether a directory node covers any date within a date range.
+
+    The range of dates covered by a directory is inferred from the year, month and day
+    components of its url path, so that the check does not require any request to the
+    DataVault API. Directories above the year level are always in range.
+
+    Parameters
+    ----------
+    directory_node: ListingNode
+        The dictionary describing a directory, as returned by the DataVault API.
+    from_date: Optional[datetime.date]
+        The first date of the range. If omitted, the range is open on the left.
+    to_date: Optional[datetime.date]
+        The last date of the range. If omitted, the range is open on the right.
+
+    Returns
+    -------
+    bool
+        True if the directory covers at least one date within the range, False otherwise.
+    """
+    if from_date is None and to_date is None:
+        return True
+    date_range = get_node_date_range(directory_node["url"])
+    if date_range is None:
+        return True
+    first_date, last_date = date_range
+    if from_date is not None and last_date < from_date:
+        return False
+    if to_date is not None and first_date > to_date:
+        return False
+    return True
+
+
+def process_node_listing(
+    node_listing: List[ListingNode],
+    stack: List[ListingNode],
+    leaf_nodes: List[DiscoveredFileInfo],
+    selected_source_ids: Optional[FrozenSet[int]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    selected_file_types: Optional[FrozenSet[str]] = None,
+) -> None:
+    """Sorts the child nodes of a listed node between the stack and the leaf nodes.
+
+    The child nodes that are directories that can contain selected files are appended to
+    the stack so that they can be visited later on, while the child nodes that are files
+    matching the (optional) source ids and file types are converted into
+    DiscoveredFileInfo named-tuples and appended to the leaf nodes.
+
+    Parameters
+    ----------
+    node_listing: List[ListingNode]
+        The list of child nodes returned by the DataVault API for a specific node.
+    stack: List[ListingNode]
+        The list of directory nodes still to visit. It is updated in place.
+    leaf_nodes: List[DiscoveredFileInfo]
+        The list of discovered files. It is updated in place.
+    selected_source_ids: Optional[FrozenSet[int]]
+        The selected source ids, as normalised by get_selected_source_ids, used to filter
+        the discovered files.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    selected_file_types: Optional[FrozenSet[str]]
+        The selected file types, as normalised by get_selected_file_types. If set, only
+        the files of the selected types are discovered, and the file-type directories of
+        the other types are pruned.
+    """
+    for neighbour in node_listing:
+        if neighbour["directory"] is True:
+            if is_directory_selected(
+                neighbour, selected_source_ids, from_date, to_date, selected_file_types,
+            ):
+                stack.append(neighbour)
+        elif is_matching_file_type(neighbour, selected_file_types):
+            parsed_file_name = parse_leaf_node_name(neighbour["name"])
+            if is_matching_source(parsed_file_name, selected_source_ids):
+                leaf_nodes.append(create_discovered_file_object(neighbour, parsed_file_name))
+
+
+def iter_traversed_leaf_nodes(
+    stack: List[ListingNode],
+    list_node: Callable[[str], List[ListingNode]],
+    visited_nodes: Set[str],
+    selected_source_ids: Optional[FrozenSet[int]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    selected_file_types: Optional[FrozenSet[str]] = None,
+    checkpoint: Optional[Callable[[], None]] = None,
+    checkpoint_interval: int = 100,
+) -> Iterator[List[DiscoveredFileInfo]]:
+    """Traverses the directory tree depth-first, yielding the files listed in each node.
+
+    The generator implements the depth-first traversal shared by traverse_node_listings
+    and iter_datavault_crawler. The stack and the visited nodes are updated in place.
+
+    Parameters
+    ----------
+    stack: List[ListingNode]
+        A list of the details of the directory nodes to visit.
+    list_node: Callable[[str], List[ListingNode]]
+        A callable that takes the full url of a node and returns the list of its child
+        nodes.
+    visited_nodes: Set[str]
+        A set with the canonical urls of the nodes that were already visited.
+    selected_source_ids: Optional[FrozenSet[int]]
+        The selected source ids, as normalised by get_selected_source_ids, used to filter
+        the discovered files.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    selected_file_types: Optional[FrozenSet[str]]
+        The selected file types, as normalised by get_selected_file_types. If set, only
+        the files of the selected types are discovered, and the file-type directories of
+        the other types are pruned.
+    checkpoint: Optional[Callable[[], None]]
+        An optional callable that saves the state of the traversal. It is called every
+        checkpoint_interval visited nodes, once the files of the last visited node were
+        taken by the caller, and, if the listing of a node cannot be retrieved or
+        processed, after the node is put back on the stack.
+    checkpoint_interval: int
+        The number of nodes visited between two consecutive calls of checkpoint. By
+        default is set equal to 100.
+
+    Yields
+    ------
+    List[DiscoveredFileInfo]
+        The DiscoveredFileInfo named-tuples of the selected files listed in a visited node.
+    """
+    number_of_visited_nodes = 0
+    while len(stack) != 0:
+        node_to_visit = stack.pop()
+        node_url = create_canonical_node_url(node_to_visit["url"])
+        if node_url in visited_nodes:
+            continue
+        # The children of the node are collected apart, so that a node whose listing
+        # cannot be retrieved or processed leaves the state of the traversal unchanged.
+        child_nodes: List[ListingNode] = []
+        child_leaf_nodes: List[DiscoveredFileInfo] = []
+        try:
+            process_node_listing(
+                list_node(create_node_url(node_to_visit["url"])),
+                child_nodes,
+                child_leaf_nodes,
+                selected_source_ids,
+                from_date,
+                to_date,
+                selected_file_types,
+            )
+        except BaseException:
+            if checkpoint is not None:
+                stack.append(node_to_visit)
+                checkpoint()
+            raise
+        visited_nodes.add(node_url)
+        stack.extend(child_nodes)
+        yield child_leaf_nodes
+        number_of_visited_nodes += 1
+        if checkpoint is not None and number_of_visited_nodes % checkpoint_interval == 0:
+            checkpoint()
+
+
+def traverse_node_listings(
+    stack: List[ListingNode],
+    leaf_nodes: List[DiscoveredFileInfo],
+    list_node: Callable[[str], List[ListingNode]],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    visited_nodes: Optional[Set[str]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    checkpoint: Optional[Callable[[], None]] = None,
+    checkpoint_interval: int = 100,
+) -> List[DiscoveredFileInfo]:
+    """Traverses the directory tree depth-first, obtaining node listings from a callable.
+
+    The function collects the files yielded by iter_traversed_leaf_nodes, which implements
+    the depth-first traversal shared by all the crawlers of the library. Decoupling the
+    traversal from the way in which node listings are retrieved allows the concurrent
+    crawlers to fetch the listings in parallel, and then to assemble the discovered files
+    in exactly the same order as the sequential crawler.
+
+    Parameters
+    ----------
+    stack: List[ListingNode]
+        A list of the details of the directory nodes to visit.
+    leaf_nodes: List[DiscoveredFileInfo]
+        A list of DiscoveredFileInfo named-tuples with the details of the files eventually
+        discovered during initialisation.
+    list_node: Callable[[str], List[ListingNode]]
+        A callable that takes the full url of a node and returns the list of its child
+        nodes.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, used to filter the discovered
+        files.
+    visited_nodes: Optional[Set[str]]
+        An optional set with the canonical urls of the nodes that were already visited.
+        It is updated in place. If omitted, a new empty set is used.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    checkpoint: Optional[Callable[[], None]]
+        An optional callable that saves the state of the traversal (stack, visited nodes
+        and leaf nodes). It is called every checkpoint_interval visited nodes and, if the
+        listing of a node cannot be retrieved or processed (whatever the error), after
+        the node is put back on the stack, so that the saved state always allows to
+        resume the traversal.
+    checkpoint_interval: int
+        The number of nodes visited between two consecutive calls of checkpoint. By
+        default is set equal to 100.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        A list of DiscoveredFileInfo named-tuples with the details of the discovered files.
+    """
+    if visited_nodes is None:
+        visited_nodes = set()
+    for child_leaf_nodes in iter_traversed_leaf_nodes(
+        stack,
+        list_node,
+        visited_nodes,
+        get_selected_source_ids(source_id),
+        from_date,
+        to_date,
+        get_selected_file_types(file_types),
+        checkpoint,
+        checkpoint_interval,
+    ):
+        leaf_nodes.extend(child_leaf_nodes)
+    return leaf_nodes
+
+
 def initialise_search(
     url: str,
     credentials: Tuple[str, str],
     session: requests.Session,
-    source_id: Optional[int] = None,
-) -> Tuple[List, List[DiscoveredFileInfo]]:
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    visited_nodes: Optional[Set[str]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+) -> Tuple[List[ListingNode], List[DiscoveredFileInfo]]:
     """Initialises the tree search by discovering the child nodes of the passed url.
 
     Parameters
@@ -141,13 +763,27 @@ def initialise_search(
         A tuple containing the username and password used to access the DataVault API.
     session: requests.Session
         A session object.
-    source_id: Optional[str]
-        An optional string that allows to specify a specific source id for which we
-        want to discover the available files to download.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download. The source directories of the other sources are
+        not visited.
+    visited_nodes: Optional[Set[str]]
+        An optional set with the canonical urls of the visited nodes, to be shared with
+        the traversal. If passed, the canonical url of the starting node is added to it.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
 
     Returns
     -------
-    Tuple[List, List[DiscoveredFileInfo]]
+    Tuple[List[ListingNode], List[DiscoveredFileInfo]]
         A tuple containing the stack list and the leaf_nodes list. The stack list
         contains the details of the neighbour nodes that are directories, while the
         leaf_nodes list contains the DiscoveredFileInfo named-tuples with the details of
@@ -156,25 +792,19 @@ def initialise_search(
         while the stack list will be populated with the information of the child nodes
         of the passed url.
     """
-    stack = []
-    leaf_nodes = []
-    with session.get(url, auth=credentials) as initial_response:
-        # if initial_response.status_code == 200:
-        initial_response.raise_for_status()
-        for neighbour in initial_response.json():
-            if neighbour["directory"] is True:
-                stack.append(neighbour)
-            else:
-                if not source_id:
-                    leaf_nodes.append(create_discovered_file_object(neighbour))
-                else:
-                    if (
-                        int(
-                            parse_source_from_name(
-                            clean_raw_filename(neighbour["name"])),
-                        ) == int(source_id)
-                    ):
-                        leaf_nodes.append(create_discovered_file_object(neighbour))
+    stack: List[ListingNode] = []
+    leaf_nodes: List[DiscoveredFileInfo] = []
+    process_node_listing(
+        get_node_listing(url, credentials, session, listing_cache),
+        stack,
+        leaf_nodes,
+        get_selected_source_ids(source_id),
+        from_date,
+        to_date,
+        get_selected_file_types(file_types),
+    )
+    if visited_nodes is not None:
+        visited_nodes.add(create_canonical_node_url(url))
     return stack, leaf_nodes
 
 
@@ -198,12 +828,39 @@ def create_node_url(url_path: str) -> str:
     )
 
 
+def create_canonical_node_url(url_path: str) -> str:
+    """Creates the canonical url of a node, used to keep track of the visited nodes.
+
+    The canonical url is the full node url stripped of any trailing slash, so that
+    the same node is identified by the same url regardless of how its path was written.
+
+    Parameters
+    ----------
+    url_path: str
+        A url path (or a full url) pointing to the location of the node within the API
+        directory tree.
+
+    Returns
+    -------
+    str
+        The canonical url of the node.
+    """
+    return create_node_url(url_path).rstrip("/")
+
+
 def traverse_api_directory_tree(
     session: requests.Session,
     credentials: Tuple[str, str],
-    stack: List,
+    stack: List[ListingNode],
     leaf_nodes: List[DiscoveredFileInfo],
-    source_id: Optional[int] = None,
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    visited_nodes: Optional[Set[str]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    checkpoint: Optional[Callable[[], None]] = None,
+    checkpoint_interval: int = 100,
 ) -> List[DiscoveredFileInfo]:
     """Transverses the DataVault API directory tree and returns the discovered files.
 
@@ -213,17 +870,37 @@ def traverse_api_directory_tree(
         A session object.
     credentials: Tuple[str, str]
         A tuple containing the username and password used to access the DataVault API.
-    stack: List
+    stack: List[ListingNode]
         A list of the details of the neighbour nodes that are directories as returned by
         the DataVault API.
     leaf_nodes: List[DiscoveredFileInfo]
         A list of DiscoveredFileInfo named-tuples with the details of the files eventually
         discovered during initialisation.
-    source_id: Optional[str]
-        A source id as a string. It controls what files are included in the returned list
-        of DiscoveredFileInfo named-tuples. If not specified, all the discovered files are
-        returned. If source_id is, instead, specified, only the files that belong to the
-        specified source are included in the list.
+    source_id: Optional[Union[int, Iterable[int]]]
+        A source id, or a collection of source ids. It controls what files are included in
+        the returned list of DiscoveredFileInfo named-tuples. If not specified, all the
+        discovered files are returned. If source_id is, instead, specified, only the files
+        that belong to the specified sources are included in the list, and the source
+        directories of the other sources are not visited.
+    visited_nodes: Optional[Set[str]]
+        An optional set with the canonical urls of the nodes already visited, as populated
+        by initialise_search. Nodes whose url is in the set are not visited again.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    checkpoint: Optional[Callable[[], None]]
+        An optional callable that saves the state of the traversal, called every
+        checkpoint_interval visited nodes and when the listing of a node fails.
+    checkpoint_interval: int
+        The number of nodes visited between two consecutive calls of checkpoint. By
+        default is set equal to 100.
 
     Returns
     -------
@@ -231,51 +908,61 @@ def traverse_api_directory_tree(
         A list of DiscoveredFileInfo named-tuples with the details of the files discovered
         while traversing the directory tree of the DataVault API.
     """
-    visited_nodes = []
-    while len(stack) != 0:
-        node_to_visit = stack.pop()
-        if node_to_visit not in visited_nodes:
-            visited_nodes.append(node_to_visit)
-            url_to_query = create_node_url(node_to_visit["url"])
-            with session.get(url_to_query, auth=credentials) as response:
-                # if response.status_code == 200:
-                response.raise_for_status()
-                discovered_neighbours = response.json()
-                for neighbour in discovered_neighbours:
-                    if neighbour["directory"] is True:
-                        stack.append(neighbour)
-                    else:
-                        if not source_id:
-                            leaf_nodes.append(
-                                create_discovered_file_object(neighbour),
-                            )
-                        else:
-                            if (
-                                int(
-                                    parse_source_from_name(
-                                    clean_raw_filename(neighbour["name"])),
-                                ) == int(source_id)
-                            ):
-                                leaf_nodes.append(
-                                    create_discovered_file_object(neighbour),
-                                )
-    return leaf_nodes
+    return traverse_node_listings(
+        stack,
+        leaf_nodes,
+        lambda node_url: get_node_listing(node_url, credentials, session, listing_cache),
+        source_id,
+        visited_nodes,
+        from_date,
+        to_date,
+        file_types,
+        checkpoint,
+        checkpoint_interval,
+    )
 
 
 def datavault_crawler(
-    url: str, credentials: Tuple[str, str], source_id: Optional[int] = None,
+    url: str,
+    credentials: Tuple[str, str],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    crawl_checkpoint: Optional[CrawlCheckpoint] = None,
 ) -> List[DiscoveredFileInfo]:
     """Crawls the directory tree of the DataVault API to discover files available to download.
 
+    If a crawl checkpoint is passed, the state of the crawl is saved to the checkpoint
+    file at regular intervals and when a listing request fails. If the checkpoint file
+    contains the state of an interrupted crawl of the same url with the same filters, the
+    crawl is resumed from that state instead of starting again from the url. The
+    checkpoint file is removed once the crawl is completed.
+
     Parameters
     ----------
     url: str
         The url from which the crawler will start traversing the directory tree.
     credentials: Tuple[str, str]
         A tuple containing the username and password used to access the DataVault API.
-    source_id: Optional[str]
-        An optional string that allows to specify a specific source id for which we
-        want to discover the available files to download.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download. The source directories of the other sources are
+        not visited.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    crawl_checkpoint: Optional[CrawlCheckpoint]
+        An optional crawl checkpoint, used to save the state of the crawl and to resume
+        an interrupted crawl.
 
     Returns
     -------
@@ -284,5 +971,733 @@ def datavault_crawler(
         of each of the discovered files available to download.
     """
     session = create_session()
-    stack, leaf_nodes = initialise_search(url, credentials, session, source_id)
-    return traverse_api_directory_tree(session, credentials, stack, leaf_nodes, source_id)
+    crawl_parameters = get_crawl_parameters(
+        get_selected_source_ids(source_id),
+        get_selected_file_types(file_types),
+        from_date,
+        to_date,
+    )
+    crawl_state = None
+    if crawl_checkpoint is not None:
+        crawl_state = crawl_checkpoint.load(url, crawl_parameters)
+    if crawl_state is not None:
+        stack, visited_nodes, leaf_nodes = (
+            crawl_state.stack, crawl_state.visited_nodes, crawl_state.leaf_nodes,
+        )
+    else:
+        visited_nodes = set()
+        stack, leaf_nodes = initialise_search(
+            url,
+            credentials,
+            session,
+            source_id,
+            visited_nodes,
+            listing_cache,
+            from_date,
+            to_date,
+            file_types,
+        )
+    checkpoint: Optional[Callable[[], None]] = None
+    checkpoint_interval = 100
+    if crawl_checkpoint is not None:
+        # The crawl state refers to the same stack, set and list updated by the traversal.
+        checkpoint = functools.partial(
+            crawl_checkpoint.save,
+            CrawlState(url, crawl_parameters, stack, visited_nodes, leaf_nodes),
+        )
+        checkpoint_interval = crawl_checkpoint.checkpoint_interval
+    discovered_files = traverse_api_directory_tree(
+        session,
+        credentials,
+        stack,
+        leaf_nodes,
+        source_id,
+        visited_nodes,
+        listing_cache,
+        from_date,
+        to_date,
+        file_types,
+        checkpoint,
+        checkpoint_interval,
+    )
+    if crawl_checkpoint is not None:
+        crawl_checkpoint.remove()
+    return discovered_files
+
+
+def incremental_datavault_crawler(
+    url: str,
+    credentials: Tuple[str, str],
+    high_water_mark_store: HighWaterMarkStore,
+    look_back_days: int = 1,
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    crawl_checkpoint: Optional[CrawlCheckpoint] = None,
+    advance_high_water_mark: bool = True,
+) -> List[DiscoveredFileInfo]:
+    """Crawls only the days of the directory tree published since the previous crawl.
+
+    The high-water mark of the crawl, moved back by the look-back window, is used as the
+    first reference date of the crawl, so that the year, month and day directories covering
+    only earlier dates are pruned. Once the crawl is completed, the high-water mark is
+    advanced to the latest reference date of the discovered files, unless the caller
+    advances it later (e.g. once the discovered files are downloaded).
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    high_water_mark_store: HighWaterMarkStore
+        The store of the high-water marks of the previous crawls.
+    look_back_days: int
+        The number of days before the high-water mark that are crawled again to discover
+        the files published late. By default is set equal to 1.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned,
+        even if they are later than the high-water mark.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST).
+    crawl_checkpoint: Optional[CrawlCheckpoint]
+        An optional crawl checkpoint, used to save the state of the crawl and to resume
+        an interrupted crawl.
+    advance_high_water_mark: bool
+        If False, the high-water mark is left untouched. By default is set equal to True.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        A list containing DiscoveredFileInfo named-tuples with the download information
+        of each of the files discovered since the high-water mark.
+    """
+    discovered_files = datavault_crawler(
+        url,
+        credentials,
+        source_id,
+        listing_cache,
+        get_high_water_mark_from_date(
+            url, high_water_mark_store, look_back_days, source_id, file_types, from_date,
+        ),
+        to_date,
+        file_types,
+        crawl_checkpoint,
+    )
+    if advance_high_water_mark:
+        high_water_mark_store.update(
+            url,
+            discovered_files,
+            get_selected_source_ids(source_id),
+            get_selected_file_types(file_types),
+        )
+    return discovered_files
+
+
+def get_high_water_mark_from_date(
+    url: str,
+    high_water_mark_store: HighWaterMarkStore,
+    look_back_days: int = 1,
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    file_types: Optional[Iterable[str]] = None,
+    from_date: Optional[datetime.date] = None,
+) -> Optional[datetime.date]:
+    """Returns the first reference date of an incremental crawl.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    high_water_mark_store: HighWaterMarkStore
+        The store of the high-water marks of the previous crawls.
+    look_back_days: int
+        The number of days before the high-water mark that are crawled again. By default
+        is set equal to 1.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, selected for the crawl.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types selected for the crawl.
+    from_date: Optional[datetime.date]
+        An optional first reference date requested for the crawl.
+
+    Returns
+    -------
+    Optional[datetime.date]
+        The high-water mark of the crawl moved back by the look-back window, or from_date
+        if later, or None if the crawl has no high-water mark and no from_date is set.
+    """
+    high_water_mark = high_water_mark_store.get(
+        url, get_selected_source_ids(source_id), get_selected_file_types(file_types),
+    )
+    return get_incremental_from_date(high_water_mark, look_back_days, from_date)
+
+
+def iter_datavault_crawler(
+    url: str,
+    credentials: Tuple[str, str],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+) -> Iterator[DiscoveredFileInfo]:
+    """Lazily crawls the directory tree of the DataVault API, yielding the discovered files.
+
+    The generator performs the same depth-first traversal as datavault_crawler, but
+    yields the files listed in each node as soon as the node is listed, instead of
+    accumulating all the discovered files before returning. The files are yielded in the
+    same order as they appear in the list returned by datavault_crawler. The memory used
+    by the crawl is bounded by the size of the stack of directories still to visit, and
+    the processing of the first discovered files can start before the crawl is
+    completed.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download. The source directories of the other sources are
+        not visited.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+
+    Yields
+    ------
+    DiscoveredFileInfo
+        A DiscoveredFileInfo named-tuple with the download information of a discovered
+        file available to download.
+    """
+    session = create_session()
+    selected_source_ids = get_selected_source_ids(source_id)
+    selected_file_types = get_selected_file_types(file_types)
+    visited_nodes: Set[str] = set()
+    stack, leaf_nodes = initialise_search(
+        url,
+        credentials,
+        session,
+        selected_source_ids,
+        visited_nodes,
+        listing_cache,
+        from_date,
+        to_date,
+        selected_file_types,
+    )
+    yield from leaf_nodes
+    for child_leaf_nodes in iter_traversed_leaf_nodes(
+        stack,
+        lambda node_url: get_node_listing(node_url, credentials, session, listing_cache),
+        visited_nodes,
+        selected_source_ids,
+        from_date,
+        to_date,
+        selected_file_types,
+    ):
+        yield from child_leaf_nodes
+
+
+def columnar_datavault_crawler(
+    url: str,
+    credentials: Tuple[str, str],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+) -> DiscoveredFilesTable:
+    """Crawls the directory tree of the DataVault API, storing the files in columns.
+
+    The files yielded by iter_datavault_crawler are appended to a DiscoveredFilesTable as
+    soon as they are discovered, so that no list of DiscoveredFileInfo named-tuples is
+    held in memory during the crawl. The table can be passed to the size helpers and to
+    the pre-download processors in place of the list returned by datavault_crawler.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST).
+
+    Returns
+    -------
+    DiscoveredFilesTable
+        A DiscoveredFilesTable with the download information of each of the discovered
+        files, in the same order as the list returned by datavault_crawler.
+    """
+    return DiscoveredFilesTable(
+        iter_datavault_crawler(
+            url,
+            credentials,
+            source_id,
+            listing_cache,
+            from_date,
+            to_date,
+            file_types,
+        )
+    )
+
+
+def thread_safe_get_node_listing(
+    url: str,
+    credentials: Tuple[str, str],
+    listing_cache: Optional[ListingCache] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> List[ListingNode]:
+    """Retrieves the child nodes of a node using a thread-specific session object.
+
+    Parameters
+    ----------
+    url: str
+        The full url of the node to list.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter of the number of listing requests in flight. If passed, the
+        thread-specific session leaves the 429 and 503 responses to the limiter.
+
+    Returns
+    -------
+    List[ListingNode]
+        A list of dictionaries, each describing a child node of the node that was queried.
+    """
+    if concurrency_limiter is None:
+        return get_node_listing(url, credentials, thread_get_session(), listing_cache)
+    return get_node_listing(
+        url,
+        credentials,
+        thread_get_rate_controlled_session(),
+        listing_cache,
+        concurrency_limiter,
+    )
+
+
+def get_child_directory_urls(
+    node_listing: List[ListingNode],
+    selected_source_ids: Optional[FrozenSet[int]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    selected_file_types: Optional[FrozenSet[str]] = None,
+) -> List[str]:
+    """Returns the full urls of the child nodes of a listing that are directories.
+
+    Parameters
+    ----------
+    node_listing: List[ListingNode]
+        The list of child nodes returned by the DataVault API for a specific node.
+    selected_source_ids: Optional[FrozenSet[int]]
+        The selected source ids, as normalised by get_selected_source_ids. If set, the
+        source directories of the other sources are pruned.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    selected_file_types: Optional[FrozenSet[str]]
+        The selected file types, as normalised by get_selected_file_types. If set, the
+        file-type directories of the other types are pruned.
+
+    Returns
+    -------
+    List[str]
+        The full urls of the selected child directories, in listing order. The
+        directories with the same canonical url are only returned once.
+    """
+    child_urls = []
+    seen_urls: Set[str] = set()
+    for neighbour in node_listing:
+        if neighbour["directory"] is True and is_directory_selected(
+            neighbour, selected_source_ids, from_date, to_date, selected_file_types,
+        ):
+            canonical_url = create_canonical_node_url(neighbour["url"])
+            if canonical_url not in seen_urls:
+                seen_urls.add(canonical_url)
+                child_urls.append(create_node_url(neighbour["url"]))
+    return child_urls
+
+
+def assemble_discovered_files(
+    url: str,
+    node_listings: Dict[str, List[ListingNode]],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+) -> List[DiscoveredFileInfo]:
+    """Traverses a set of pre-fetched node listings and returns the discovered files.
+
+    The listings are traversed depth-first starting from the passed url, using the
+    same traversal as the sequential crawler, so that the discovered files are returned
+    in the same order regardless of the order in which the listings were fetched.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawl started.
+    node_listings: Dict[str, List[ListingNode]]
+        A dictionary mapping the canonical url of every listed node to its child nodes.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, used to filter the discovered
+        files.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        A list containing DiscoveredFileInfo named-tuples with the download information
+        of each of the discovered files available to download.
+    """
+    selected_source_ids = get_selected_source_ids(source_id)
+    selected_file_types = get_selected_file_types(file_types)
+    stack: List[ListingNode] = []
+    leaf_nodes: List[DiscoveredFileInfo] = []
+    process_node_listing(
+        node_listings[create_canonical_node_url(url)],
+        stack,
+        leaf_nodes,
+        selected_source_ids,
+        from_date,
+        to_date,
+        selected_file_types,
+    )
+    return traverse_node_listings(
+        stack,
+        leaf_nodes,
+        lambda node_url: node_listings[create_canonical_node_url(node_url)],
+        selected_source_ids,
+        {create_canonical_node_url(url)},
+        from_date,
+        to_date,
+        selected_file_types,
+    )
+
+
+async def fetch_node_listings_asynchronously(
+    url: str,
+    credentials: Tuple[str, str],
+    max_concurrent_requests: int = 10,
+    listing_cache: Optional[ListingCache] = None,
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> Dict[str, List[ListingNode]]:
+    """Fetches the listing of every directory node underneath a url using asyncio.
+
+    Each node is expanded as soon as its parent listing is available, so that up to
+    max_concurrent_requests listing requests are in flight at any given time. As a
+    consequence, the time required to list the whole tree scales with the depth of the
+    tree, rather than with its number of nodes. The blocking requests are carried out on
+    a pool of threads, each using its own session object.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    max_concurrent_requests: int
+        The maximum number of listing requests in flight at the same time.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids. If set, the source
+        directories of the other sources are pruned.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter that adapts the number of listing requests in flight to the
+        load of the server, within the bound set by max_concurrent_requests.
+
+    Returns
+    -------
+    Dict[str, List[ListingNode]]
+        A dictionary mapping the canonical url of every listed node to its child nodes.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+    selected_source_ids = get_selected_source_ids(source_id)
+    selected_file_types = get_selected_file_types(file_types)
+    node_listings: Dict[str, List[ListingNode]] = {}
+    scheduled_urls = {create_canonical_node_url(url)}
+
+    async def expand_node(node_url: str) -> None:
+        async with semaphore:
+            node_listing = await loop.run_in_executor(
+                executor,
+                thread_safe_get_node_listing,
+                node_url,
+                credentials,
+                listing_cache,
+                concurrency_limiter,
+            )
+        node_listings[create_canonical_node_url(node_url)] = node_listing
+        child_urls = [
+            child_url
+            for child_url in get_child_directory_urls(
+                node_listing, selected_source_ids, from_date, to_date, selected_file_types,
+            )
+            if create_canonical_node_url(child_url) not in scheduled_urls
+        ]
+        scheduled_urls.update(create_canonical_node_url(child_url) for child_url in child_urls)
+        await asyncio.gather(*(expand_node(child_url) for child_url in child_urls))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_requests) as executor:
+        await expand_node(url)
+    return node_listings
+
+
+def asynchronous_datavault_crawler(
+    url: str,
+    credentials: Tuple[str, str],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    max_concurrent_requests: int = 10,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> List[DiscoveredFileInfo]:
+    """Crawls the directory tree of the DataVault API issuing listing requests concurrently.
+
+    The directory tree is first listed with asyncio, with up to max_concurrent_requests
+    listing requests in flight. The listings are then traversed depth-first in memory,
+    so that the returned list is identical to the one returned by datavault_crawler.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download. The source directories of the other sources are
+        not visited.
+    max_concurrent_requests: int
+        The maximum number of listing requests in flight at the same time. By default is
+        set equal to 10.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter that adapts the number of listing requests in flight to the
+        load of the server, within the bound set by max_concurrent_requests.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        A list containing DiscoveredFileInfo named-tuples with the download information
+        of each of the discovered files available to download.
+    """
+    node_listings = asyncio.run(
+        fetch_node_listings_asynchronously(
+            url,
+            credentials,
+            max_concurrent_requests,
+            listing_cache,
+            source_id,
+            from_date,
+            to_date,
+            file_types,
+            concurrency_limiter,
+        ),
+    )
+    return assemble_discovered_files(
+        url, node_listings, source_id, from_date, to_date, file_types,
+    )
+
+
+def fetch_node_listings_concurrently(
+    url: str,
+    credentials: Tuple[str, str],
+    max_number_of_workers: Optional[int] = None,
+    listing_cache: Optional[ListingCache] = None,
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> Dict[str, List[ListingNode]]:
+    """Fetches the listing of every directory node underneath a url, one tree level at a time.
+
+    The directory tree is expanded breadth-first: all the directory nodes found at a given
+    level of the tree are listed in parallel by a thread pool, and the directories they
+    contain make up the next level to expand. Each worker thread uses its own session
+    object.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    max_number_of_workers: Optional[int]
+        The maximum number of worker threads. If omitted, the executor sets the number of
+        workers to the minimum between 32 and the number of CPUs in the system plus 4.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids. If set, the source
+        directories of the other sources are pruned.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter that adapts the number of listing requests in flight to the
+        load of the server, within the bound set by the number of worker threads.
+
+    Returns
+    -------
+    Dict[str, List[ListingNode]]
+        A dictionary mapping the canonical url of every listed node to its child nodes.
+    """
+    selected_source_ids = get_selected_source_ids(source_id)
+    selected_file_types = get_selected_file_types(file_types)
+    node_listings: Dict[str, List[ListingNode]] = {}
+    nodes_to_expand = [url]
+    scheduled_urls = {create_canonical_node_url(url)}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_number_of_workers) as executor:
+        while len(nodes_to_expand) != 0:
+            level_listings = executor.map(
+                thread_safe_get_node_listing,
+                nodes_to_expand,
+                itertools.repeat(credentials),
+                itertools.repeat(listing_cache),
+                itertools.repeat(concurrency_limiter),
+            )
+            next_level = []
+            for node_url, node_listing in zip(nodes_to_expand, level_listings):
+                node_listings[create_canonical_node_url(node_url)] = node_listing
+                for child_url in get_child_directory_urls(
+                    node_listing, selected_source_ids, from_date, to_date, selected_file_types,
+                ):
+                    canonical_url = create_canonical_node_url(child_url)
+                    if canonical_url not in scheduled_urls:
+                        scheduled_urls.add(canonical_url)
+                        next_level.append(child_url)
+            nodes_to_expand = next_level
+    return node_listings
+
+
+def concurrent_datavault_crawler(
+    url: str,
+    credentials: Tuple[str, str],
+    source_id: Optional[Union[int, Iterable[int]]] = None,
+    max_number_of_workers: Optional[int] = None,
+    listing_cache: Optional[ListingCache] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    file_types: Optional[Iterable[str]] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> List[DiscoveredFileInfo]:
+    """Crawls the directory tree of the DataVault API expanding each tree level in parallel.
+
+    The crawler is a drop-in replacement for datavault_crawler that does not rely on
+    asyncio. The directory tree is listed level by level with a bounded thread pool, and
+    the listings are then traversed depth-first in memory, so that the returned list is
+    identical to the one returned by datavault_crawler.
+
+    Parameters
+    ----------
+    url: str
+        The url from which the crawler will start traversing the directory tree.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    source_id: Optional[Union[int, Iterable[int]]]
+        An optional source id, or collection of source ids, for which we want to discover
+        the available files to download. The source directories of the other sources are
+        not visited.
+    max_number_of_workers: Optional[int]
+        The maximum number of worker threads listing the directory nodes.
+    listing_cache: Optional[ListingCache]
+        An optional cache of directory listings, consulted before querying the server.
+    from_date: Optional[datetime.date]
+        If set, the directories covering only dates earlier than from_date are pruned.
+    to_date: Optional[datetime.date]
+        If set, the directories covering only dates later than to_date are pruned.
+    file_types: Optional[Iterable[str]]
+        An optional collection of file types (e.g. COREREF, CROSSREF, WATCHLIST). If set,
+        only the files of the selected types are discovered, and the file-type
+        directories of the other types are pruned.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        An optional limiter that adapts the number of listing requests in flight to the
+        load of the server, within the bound set by the number of worker threads.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        A list containing DiscoveredFileInfo named-tuples with the download information
+        of each of the discovered files available to download.
+    """
+    node_listings = fetch_node_listings_concurrently(
+        url,
+        credentials,
+        max_number_of_workers,
+        listing_cache,
+        source_id,
+        from_date,
+        to_date,
+        file_types,
+        concurrency_limiter,
+    )
+    return assemble_discovered_files(
+        url, node_listings, source_id, from_date, to_date, file_types,
+    )
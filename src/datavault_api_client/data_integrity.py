@@ -1,11 +1,15 @@
 """Implements the functions checking for the integrity of the downloaded data."""
 import hashlib
+import os
 import pathlib
-from typing import List
+from typing import List, MutableMapping, Optional, Tuple
 
 from datavault_api_client.data_structures import DownloadDetails
 
 
+ChecksumCache = MutableMapping[Tuple[int, int, int], str]
+
+
 def calculate_checksum(path_to_file: pathlib.Path, hash_constructor=hashlib.md5) -> str:
     """Calculates the checksum of a file, given a specific hash algorithm.
 
@@ -56,31 +60,90 @@ def check_size(path_to_file: pathlib.Path) -> int:
     return path_to_file.stat().st_size
 
 
-def data_integrity_test(file_download_details: DownloadDetails) -> bool:
+def get_checksum_cache_key(file_status: os.stat_result) -> Tuple[int, int, int]:
+    """Returns the key of a file in a checksum cache.
+
+    Parameters
+    ----------
+    file_status: os.stat_result
+        The result of the stat call of the file.
+
+    Returns
+    -------
+    Tuple[int, int, int]
+        A tuple with the inode, the size and the modification time in nanoseconds of the
+        file, which changes whenever the content of the file is replaced or modified.
+    """
+    return file_status.st_ino, file_status.st_size, file_status.st_mtime_ns
+
+
+def get_cached_checksum(
+    path_to_file: pathlib.Path,
+    file_status: os.stat_result,
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> str:
+    """Returns the md5sum of a file, looking it up in a checksum cache if passed.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the file.
+    file_status: os.stat_result
+        The result of the stat call of the file.
+    checksum_cache: Optional[ChecksumCache]
+        An optional mapping from the inode, size and modification time of a file to its
+        md5sum. The calculated md5sums are added to the cache. Since the key changes
+        whenever the file is modified, the md5sum of a modified file is never looked up
+        from a stale entry.
+
+    Returns
+    -------
+    str
+        The md5sum of the file.
+    """
+    if checksum_cache is None:
+        return calculate_checksum(path_to_file)
+    cache_key = get_checksum_cache_key(file_status)
+    checksum = checksum_cache.get(cache_key)
+    if checksum is None:
+        checksum = calculate_checksum(path_to_file)
+        checksum_cache[cache_key] = checksum
+    return checksum
+
+
+def data_integrity_test(
+    file_download_details: DownloadDetails,
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> bool:
     """Checks if the checksum digest and size of the downloaded file match the expected values.
 
+    The md5sum of the file is only calculated if its size matches the expected one.
+
     Parameters
     ----------
     file_download_details: DownloadDetails
         A DownloadDetails named tuple containing, among others, the expected
         characteristics of a specific file (size and md5sum digest).
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of the files that
+        did not change since they were last tested.
 
     Returns
     -------
     bool
         True if the downloaded file passes the test, False otherwise.
     """
-    test_results = (
-        check_size(file_download_details.file_path) == file_download_details.size,
-        calculate_checksum(file_download_details.file_path) == file_download_details.md5sum,
-    )
-    if all(test_results) is True:
-        return True
-    return False
+    path_to_file = pathlib.Path(file_download_details.file_path)
+    file_status = path_to_file.stat()
+    if file_status.st_size != file_download_details.size:
+        return False
+    checksum = get_cached_checksum(path_to_file, file_status, checksum_cache)
+    return checksum == file_download_details.md5sum
 
 
 def get_list_of_failed_downloads(
     downloaded_files_info: List[DownloadDetails],
+    checksum_cache: Optional[ChecksumCache] = None,
 ) -> List[DownloadDetails]:
     """Tests the integrity of a list of files and collects those files that failed the test.
 
@@ -90,6 +153,9 @@ def get_list_of_failed_downloads(
         A list of DownloadDetails named-tuples containing, for each file, the file name,
         the download URL, the file path, the file size, the md5sum and the is_partitioned
         flag.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of the files that
+        did not change since they were last tested.
 
     Returns
     -------
@@ -98,4 +164,7 @@ def get_list_of_failed_downloads(
         integrity test.
 
     """
-    return [file for file in downloaded_files_info if data_integrity_test(file) is False]
+    return [
+        file for file in downloaded_files_info
+        if data_integrity_test(file, checksum_cache) is False
+    ]
@@ -1,7 +1,7 @@
 """Collects the data structures used across the datavault_api_client library."""
 import datetime
 import pathlib
-from typing import List, NamedTuple, Optional, TypedDict
+from typing import List, NamedTuple, Optional, Set, TypedDict
 
 
 class DiscoveredFileInfo(NamedTuple):
@@ -106,3 +106,130 @@ class ConcurrentDownloadManifest(NamedTuple):
     files_reference_data: List[DownloadDetails]
     whole_files_to_download: List[DownloadDetails]
     partitions_to_download: List[PartitionDownloadDetails]
+
+
+class ListingNode(TypedDict, total=False):
+    """Represents a child node in the listing of a directory of the DataVault API.
+
+    The name field contains the name of the directory or of the file.
+    The url field contains the url path of the node: a listing url for the directories
+    and a download url for the files.
+    The size field indicates the size in bytes of the file (0 for the directories).
+    The md5sum field is the md5 checksum of the file. It is missing for the directories.
+    The directory flag is True for the directories and False for the files.
+    The DataVault API may return other fields, which are not used by the library.
+    """
+
+    name: str
+    url: str
+    size: int
+    md5sum: str
+    directory: bool
+
+
+class CachedListing(NamedTuple):
+    """Represents the listing of a directory node stored in the listing cache.
+
+    The url field contains the full url of the listed node.
+    The listing field contains the child nodes as returned by the DataVault API.
+    The fetched_at field is the POSIX timestamp of the moment the listing was last
+    retrieved or revalidated.
+    The etag and last_modified fields contain the values of the ETag and Last-Modified
+    headers returned by the DataVault API, if any, and are used to revalidate the listing.
+    """
+
+    url: str
+    listing: List[ListingNode]
+    fetched_at: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ParsedFileName(NamedTuple):
+    """Collects the components parsed from the name of a DataVault file.
+
+    The file_name field contains the cleaned file name, structured according to the
+    '<FILE-TYPE>_<SOURCE-ID>_<DATE>' naming convention (the user name of WATCHLIST files
+    is removed).
+    The source_id field refers to the market source ID from which the file originates.
+    The reference_date is a datetime.datetime object with the date on which the data
+    within the file was originally created.
+    """
+
+    file_name: str
+    source_id: int
+    reference_date: datetime.datetime
+
+
+class CrawlParameters(TypedDict):
+    """Represents the filters applied to a crawl in a JSON serialisable form.
+
+    The source_ids and file_types fields contain the sorted lists of the selected source
+    ids and file types, or None if the crawl is not filtered on them.
+    The from_date and to_date fields contain the first and last reference dates of the
+    crawl in the ISO format, or None if the date range is open on that side.
+    """
+
+    source_ids: Optional[List[int]]
+    file_types: Optional[List[str]]
+    from_date: Optional[str]
+    to_date: Optional[str]
+
+
+class CrawlState(NamedTuple):
+    """Represents the state of an interrupted crawl stored in a crawl checkpoint.
+
+    The url field contains the url from which the crawl started.
+    The parameters field contains the filters applied to the crawl (source ids, file types
+    and date range), in a JSON serialisable form, so that a checkpoint is only resumed by
+    an equivalent crawl.
+    The stack field contains the directory nodes still to visit.
+    The visited_nodes field contains the canonical urls of the nodes already visited.
+    The leaf_nodes field contains the DiscoveredFileInfo named-tuples of the files
+    discovered so far.
+    """
+
+    url: str
+    parameters: CrawlParameters
+    stack: List[ListingNode]
+    visited_nodes: Set[str]
+    leaf_nodes: List[DiscoveredFileInfo]
+
+
+class SnapshotDiff(NamedTuple):
+    """Collects the differences between two snapshots of the files discovered by a crawl.
+
+    The added field contains the DiscoveredFileInfo named-tuples of the files found only in
+    the new snapshot.
+    The removed field contains the DiscoveredFileInfo named-tuples of the files found only
+    in the old snapshot.
+    The changed field contains the DiscoveredFileInfo named-tuples, as found in the new
+    snapshot, of the files found in both snapshots whose md5sum or size differ.
+    """
+
+    added: List[DiscoveredFileInfo]
+    removed: List[DiscoveredFileInfo]
+    changed: List[DiscoveredFileInfo]
+
+
+class ManifestRecord(NamedTuple):
+    """Represents a file recorded in the SQLite manifest store.
+
+    The file_name, download_url, file_path, source_id, reference_date, size, md5sum and
+    is_partitioned fields have the same meaning as in the DownloadDetails named-tuple.
+    The status field contains the download status of the file: 'pending' until the file
+    passes or fails the data integrity test, 'verified' or 'failed' afterwards.
+    The verified_md5sum field contains the md5sum of the downloaded file that passed the
+    data integrity test, or None if the file was not verified.
+    """
+
+    file_name: str
+    download_url: str
+    file_path: pathlib.Path
+    source_id: int
+    reference_date: datetime.datetime
+    size: int
+    md5sum: str
+    is_partitioned: Optional[bool]
+    status: str
+    verified_md5sum: Optional[str]
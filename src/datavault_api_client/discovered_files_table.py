@@ -0,0 +1,264 @@
+"""Implements a columnar, array-backed store for the files discovered by the crawler.
+
+A crawl of several years of the DataVault API discovers millions of files. Stored as
+DiscoveredFileInfo named-tuples, each file costs a tuple, a datetime.datetime object, two
+long strings and a few boxed integers. The DiscoveredFilesTable keeps the same information
+in columns of machine integers: the reference dates are stored as 32-bit integers in the
+YYYYMMDD format, the source ids as 32-bit integers, the sizes as 64-bit integers and the
+md5sums as 16 raw bytes each. The file names and the download urls are not stored: the
+date and the source id in them are replaced by placeholders, and the resulting pair of
+templates (e.g. "COREREF_{source_id}_{date}.txt.bz2" and
+".../v2/data/{date_path}/S{source_id}/CORE/{date}-S{source_id}_CORE_ALL_0_0") is interned,
+so that each file only stores the 32-bit id of its templates. The rows of the table are
+materialised as DiscoveredFileInfo named-tuples on access, with the file name and the
+download url rendered once from the templates.
+"""
+import array
+import datetime
+import functools
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, overload, Sequence, Tuple, Union
+
+from datavault_api_client.data_structures import DiscoveredFileInfo, DownloadDetails
+
+
+MD5_DIGEST_SIZE = 16
+
+
+@functools.lru_cache(maxsize=4096)
+def convert_compact_date_to_datetime(compact_date: int) -> datetime.datetime:
+    """Converts a date stored as an integer in the YYYYMMDD format into a datetime object.
+
+    Parameters
+    ----------
+    compact_date: int
+        A date stored as an integer in the YYYYMMDD format (e.g. 20200716).
+
+    Returns
+    -------
+    datetime.datetime
+        A datetime.datetime object with the year, the month and the day of the date.
+    """
+    year, month_and_day = divmod(compact_date, 10000)
+    month, day = divmod(month_and_day, 100)
+    return datetime.datetime(year, month, day)
+
+
+def format_date_path(compact_date: int) -> str:
+    """Formats a date stored as an integer in the YYYYMMDD format as a YYYY/MM/DD path.
+
+    Parameters
+    ----------
+    compact_date: int
+        A date stored as an integer in the YYYYMMDD format (e.g. 20200716).
+
+    Returns
+    -------
+    str
+        The date in the YYYY/MM/DD format used in the DataVault urls (e.g. 2020/07/16).
+    """
+    year, month_and_day = divmod(compact_date, 10000)
+    month, day = divmod(month_and_day, 100)
+    return f"{year:04d}/{month:02d}/{day:02d}"
+
+
+def create_template(text: str, source_id: int, compact_date: int) -> str:
+    """Replaces the date and the source id in a file name or download url with placeholders.
+
+    The braces of the text are escaped, the date path (e.g. 2020/07/21) is replaced with
+    {date_path}, the compact date (e.g. 20200721) with {date}, and the source id, when not
+    part of a longer number, with {source_id}. Formatting the template with the same date
+    and source id gives back the original text.
+
+    Parameters
+    ----------
+    text: str
+        A file name or a download url.
+    source_id: int
+        The source id of the file.
+    compact_date: int
+        The reference date of the file, as an integer in the YYYYMMDD format.
+
+    Returns
+    -------
+    str
+        The template of the text, shared by the files of the same type.
+    """
+    template = text.replace("{", "{{").replace("}", "}}")
+    template = template.replace(format_date_path(compact_date), "{date_path}")
+    template = template.replace(str(compact_date), "{date}")
+    return re.sub(rf"(?<![0-9]){source_id}(?![0-9])", "{source_id}", template)
+
+
+class DiscoveredFilesTable(Sequence[DiscoveredFileInfo]):
+    """A columnar store of the files discovered by the crawler.
+
+    The table is a sequence of DiscoveredFileInfo named-tuples: indexing and iteration
+    materialise each accessed row as a named-tuple, rendering its file name and download
+    url once, so that the table can be passed wherever a sequence of DiscoveredFileInfo
+    named-tuples is read. The code that only needs some fields (e.g. the sizes) can read
+    the columns directly. The md5sums that are not 32 lowercase hexadecimal digits are
+    kept aside as strings. The file name and download url templates are interned in the
+    templates list, and template_ids holds the position of the templates of each file.
+
+    Parameters
+    ----------
+    discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]]
+        The files with which the table is initialised. By default the table is empty.
+    """
+
+    def __init__(
+        self,
+        discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]] = (),
+    ) -> None:
+        self.templates: List[Tuple[str, str]] = []
+        self.template_index: Dict[Tuple[str, str], int] = {}
+        self.template_ids = array.array("i")
+        self.source_ids = array.array("i")
+        self.reference_dates = array.array("i")
+        self.sizes = array.array("q")
+        self.md5sums = bytearray()
+        self.irregular_md5sums: Dict[int, str] = {}
+        self.extend(discovered_files)
+
+    def append(self, discovered_file: Union[DiscoveredFileInfo, DownloadDetails]) -> None:
+        """Appends a file to the table.
+
+        Parameters
+        ----------
+        discovered_file: Union[DiscoveredFileInfo, DownloadDetails]
+            A DiscoveredFileInfo (or DownloadDetails) named-tuple.
+        """
+        source_id = discovered_file.source_id
+        reference_date = discovered_file.reference_date
+        compact_date = reference_date.year * 10000 + reference_date.month * 100
+        compact_date += reference_date.day
+        templates = (
+            create_template(discovered_file.file_name, source_id, compact_date),
+            create_template(discovered_file.download_url, source_id, compact_date),
+        )
+        template_id = self.template_index.get(templates)
+        if template_id is None:
+            template_id = len(self.templates)
+            self.template_index[templates] = template_id
+            self.templates.append(templates)
+        md5sum = discovered_file.md5sum
+        try:
+            md5_digest = bytes.fromhex(md5sum)
+        except (TypeError, ValueError):
+            md5_digest = b""
+        if len(md5_digest) != MD5_DIGEST_SIZE or md5_digest.hex() != md5sum:
+            self.irregular_md5sums[len(self)] = md5sum
+            md5_digest = bytes(MD5_DIGEST_SIZE)
+        self.template_ids.append(template_id)
+        self.source_ids.append(source_id)
+        self.reference_dates.append(compact_date)
+        self.sizes.append(discovered_file.size)
+        self.md5sums += md5_digest
+
+    def extend(
+        self,
+        discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]],
+    ) -> None:
+        """Appends multiple files to the table.
+
+        Parameters
+        ----------
+        discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]]
+            An iterable of DiscoveredFileInfo (or DownloadDetails) named-tuples. The
+            iterable is consumed lazily, so it can be a generator of discovered files.
+        """
+        for discovered_file in discovered_files:
+            self.append(discovered_file)
+
+    def render_template(self, template: str, index: int) -> str:
+        """Renders a file name or download url template with the values of a row.
+
+        Parameters
+        ----------
+        template: str
+            A template created by create_template.
+        index: int
+            The index of the row in the table.
+
+        Returns
+        -------
+        str
+            The file name or the download url of the file in the row.
+        """
+        compact_date = self.reference_dates[index]
+        return template.format(
+            date=compact_date,
+            date_path=format_date_path(compact_date),
+            source_id=self.source_ids[index],
+        )
+
+    def total_size(self) -> int:
+        """Returns the total size in bytes of the files in the table."""
+        return sum(self.sizes)
+
+    def to_list(self) -> List[DiscoveredFileInfo]:
+        """Materialises the table as a list of DiscoveredFileInfo named-tuples.
+
+        Returns
+        -------
+        List[DiscoveredFileInfo]
+            The list of DiscoveredFileInfo named-tuples of the files in the table.
+        """
+        return list(self)
+
+    def get_row(self, index: int) -> DiscoveredFileInfo:
+        """Materialises a row of the table as a DiscoveredFileInfo named-tuple.
+
+        Parameters
+        ----------
+        index: int
+            The index of the row in the table, between 0 and the length of the table.
+
+        Returns
+        -------
+        DiscoveredFileInfo
+            A DiscoveredFileInfo named-tuple with the values of the row.
+        """
+        file_name_template, download_url_template = self.templates[self.template_ids[index]]
+        md5sum = self.irregular_md5sums.get(index)
+        if md5sum is None:
+            offset = index * MD5_DIGEST_SIZE
+            md5sum = self.md5sums[offset:offset + MD5_DIGEST_SIZE].hex()
+        return DiscoveredFileInfo(
+            file_name=self.render_template(file_name_template, index),
+            download_url=self.render_template(download_url_template, index),
+            source_id=self.source_ids[index],
+            reference_date=convert_compact_date_to_datetime(self.reference_dates[index]),
+            size=self.sizes[index],
+            md5sum=md5sum,
+        )
+
+    def __len__(self) -> int:
+        return len(self.template_ids)
+
+    @overload
+    def __getitem__(self, index: int) -> DiscoveredFileInfo:
+        ...
+
+    @overload
+    def __getitem__(
+        self,
+        index: "slice[Optional[int], Optional[int], Optional[int]]",
+    ) -> List[DiscoveredFileInfo]:
+        ...
+
+    def __getitem__(
+        self,
+        index: Union[int, "slice[Optional[int], Optional[int], Optional[int]]"],
+    ) -> Union[DiscoveredFileInfo, List[DiscoveredFileInfo]]:
+        if isinstance(index, slice):
+            return [self.get_row(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("DiscoveredFilesTable index out of range")
+        return self.get_row(index)
+
+    def __iter__(self) -> Iterator[DiscoveredFileInfo]:
+        return (self.get_row(index) for index in range(len(self)))
@@ -1,11 +1,14 @@
 """Implements the downloading functions."""
 
 import concurrent.futures
+import hashlib
 import itertools
 from itertools import repeat
+import os
 import pathlib
+import queue
 import threading
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple, Union
 
 import click
 import requests
@@ -13,9 +16,35 @@ from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 
 from datavault_api_client.connectivity import create_session
-from datavault_api_client.data_integrity import get_list_of_failed_downloads
-from datavault_api_client.data_structures import ConcurrentDownloadManifest, DownloadDetails
+from datavault_api_client.data_integrity import (
+    ChecksumCache,
+    get_checksum_cache_key,
+    get_list_of_failed_downloads,
+)
+from datavault_api_client.data_structures import (
+    ConcurrentDownloadManifest,
+    DiscoveredFileInfo,
+    DownloadDetails,
+    PartitionDownloadDetails,
+)
+from datavault_api_client.manifest_store import ManifestStore
+from datavault_api_client.partition_hashing import create_partition_hashers, PartitionHashers
+from datavault_api_client.partition_writes import (
+    prepare_all_direct_partition_writes,
+    prepare_direct_partition_writes,
+    write_partition_at_offset,
+)
 from datavault_api_client.post_download_processing import post_concurrent_download_processing
+from datavault_api_client.pre_download_processing import (
+    generate_manifest_file,
+    generate_partitions_download_manifest,
+    generate_whole_files_download_manifest,
+    plan_discovered_file_download,
+)
+
+# The items put on the download queue of the pipelined download, None being the sentinel
+# that stops a download worker.
+QueuedDownload = Optional[Union[DownloadDetails, PartitionDownloadDetails]]
 
 
 thread_local = threading.local()
@@ -50,68 +79,214 @@ def thread_get_session() -> requests.Session:
     return thread_local.session
 
 
-def download_file(download_info: DownloadDetails, credentials: tuple, session: requests.Session):
+def download_file(
+    download_info: Union[DownloadDetails, PartitionDownloadDetails],
+    credentials: Tuple[str, str],
+    session: requests.Session,
+    checksum_cache: Optional[ChecksumCache] = None,
+    partition_hashers: Optional[PartitionHashers] = None,
+    direct_partition_writes: bool = False,
+) -> Optional[str]:
+    """Downloads a whole file or a file partition, hashing the data as it is written.
+
+    The md5sum of a whole file is updated with each chunk written to disk and, if a
+    checksum cache is passed, it is recorded under the key of the written file, so that
+    the data integrity test does not read the file back from disk. The chunks of a
+    partition are fed into the ordered hasher of its parent file, if any.
+
+    Parameters
+    ----------
+    download_info: Union[DownloadDetails, PartitionDownloadDetails]
+        The DownloadDetails named-tuple of a whole file, or the PartitionDownloadDetails
+        named-tuple of a file partition.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    session: requests.Session
+        The session used to send the request.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache where the md5sum of the downloaded whole file is
+        recorded.
+    partition_hashers: Optional[PartitionHashers]
+        The optional ordered hashers of the partitioned files being downloaded.
+    direct_partition_writes: bool
+        If True, a partition is written at its offset in its preallocated parent file
+        instead of to its own partition file. By default is set equal to False.
+
+    Returns
+    -------
+    Optional[str]
+        The md5sum of the downloaded whole file, or None if a partition was downloaded or
+        the download failed.
+    """
     download_url = download_info.download_url
     file_path = download_info.file_path
     pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    checksum = None
     # TODO: add logging to the function instead of using click.echo().
     click.echo(f"# Downloading {download_url} ...")
     with session.get(download_url, auth=credentials, stream=True) as response:
         # TODO: think about inserting a try-except block instead of using the status code check.
         if response.status_code == 200:
-            with file_path.open("wb") as output:
-                for chunk in response.iter_content(chunk_size=3 * 1024 * 1024):
-                    output.write(chunk)
+            chunks = response.iter_content(chunk_size=3 * 1024 * 1024)
+            if isinstance(download_info, PartitionDownloadDetails):
+                write_downloaded_partition(
+                    download_info, chunks, partition_hashers, direct_partition_writes,
+                )
+            else:
+                checksum = write_downloaded_file(download_info, chunks, checksum_cache)
     # TODO: add logging to the function instead of using click.echo()
     click.echo(f"+ Download completed: {pathlib.Path(file_path).as_posix()}")
+    return checksum
+
+
+def write_downloaded_file(
+    file_download_details: DownloadDetails,
+    chunks: Iterable[bytes],
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> str:
+    """Writes the chunks of a whole file to disk, hashing them as they are written.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the file.
+    chunks: Iterable[bytes]
+        The chunks of the file, as they are received.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache where the md5sum of the file is recorded.
+
+    Returns
+    -------
+    str
+        The md5sum of the written file.
+    """
+    file_hash = hashlib.md5()
+    with file_download_details.file_path.open("wb") as output:
+        for chunk in chunks:
+            output.write(chunk)
+            file_hash.update(chunk)
+    checksum = file_hash.hexdigest()
+    if checksum_cache is not None:
+        checksum_cache[get_checksum_cache_key(os.stat(file_download_details.file_path))] = checksum
+    return checksum
+
+
+def write_downloaded_partition(
+    partition: PartitionDownloadDetails,
+    chunks: Iterable[bytes],
+    partition_hashers: Optional[PartitionHashers] = None,
+    direct_partition_writes: bool = False,
+) -> None:
+    """Writes the chunks of a partition to disk, feeding them into the hasher of its file.
+
+    Parameters
+    ----------
+    partition: PartitionDownloadDetails
+        The PartitionDownloadDetails named-tuple of the partition.
+    chunks: Iterable[bytes]
+        The chunks of the partition, as they are received.
+    partition_hashers: Optional[PartitionHashers]
+        The optional ordered hashers of the partitioned files being downloaded.
+    direct_partition_writes: bool
+        If True, the partition is written at its offset in its preallocated parent file
+        instead of to its own partition file. By default is set equal to False.
+    """
+    partition_hasher = None
+    if partition_hashers is not None:
+        partition_hasher = partition_hashers.get(partition.parent_file_name)
+    if direct_partition_writes:
+        write_partition_at_offset(partition, chunks, partition_hasher)
+        return
+    with partition.file_path.open("wb") as output:
+        if partition_hasher is None:
+            for chunk in chunks:
+                output.write(chunk)
+            return
+        pending_chunks = partition_hasher.write_partition(
+            partition.partition_index, chunks, output,
+        )
+    partition_hasher.complete_partition(
+        partition.partition_index, partition.file_path, pending_chunks,
+    )
 
 
 def download_files_synchronously(
     download_manifest: List[DownloadDetails],
     credentials: Tuple[str, str],
     max_number_of_download_attempts: int = 5,
-    current_attempt=None,
-) -> None:
+    current_attempt: Optional[int] = None,
+    manifest_store: Optional[ManifestStore] = None,
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> List[DownloadDetails]:
     if current_attempt is None:
         current_attempt = 1
+    # The md5sums calculated while downloading spare the integrity test a second read.
+    if checksum_cache is None:
+        checksum_cache = {}
 
     session = create_session()
     for file in download_manifest:
-        download_file(file, credentials, session)
+        download_file(file, credentials, session, checksum_cache)
 
-    failed_downloads = get_list_of_failed_downloads(download_manifest)
+    failed_downloads = get_list_of_failed_downloads(download_manifest, checksum_cache)
+    if manifest_store is not None:
+        manifest_store.record_integrity_test_results(download_manifest, failed_downloads)
 
     if len(failed_downloads) > 0:
         if current_attempt <= max_number_of_download_attempts:
-            download_files_synchronously(
+            return download_files_synchronously(
                 failed_downloads,
                 credentials,
                 max_number_of_download_attempts=max_number_of_download_attempts,
                 current_attempt=current_attempt+1,
+                manifest_store=manifest_store,
+                checksum_cache=checksum_cache,
             )
-        else:
-            for failed_download in failed_downloads:
-                # TODO: add logging to the function instead of using click.echo()
-                click.echo(f"- Failed to download: {failed_download.file_name}")
+        for failed_download in failed_downloads:
+            # TODO: add logging to the function instead of using click.echo()
+            click.echo(f"- Failed to download: {failed_download.file_name}")
     else:
         # TODO: add logging to the function instead of using click.echo()
         click.echo("All files successfully downloaded.")
+    return failed_downloads
 
 
-def thread_safe_download(download_info: DownloadDetails, credentials: Tuple[str, str]):
+def thread_safe_download(
+    download_info: Union[DownloadDetails, PartitionDownloadDetails],
+    credentials: Tuple[str, str],
+    checksum_cache: Optional[ChecksumCache] = None,
+    partition_hashers: Optional[PartitionHashers] = None,
+    direct_partition_writes: bool = False,
+) -> Optional[str]:
     session = thread_get_session()
-    download_file(download_info, credentials, session)
+    return download_file(
+        download_info,
+        credentials,
+        session,
+        checksum_cache,
+        partition_hashers,
+        direct_partition_writes,
+    )
 
 
 def download_files_concurrently(
     concurrent_download_manifest: ConcurrentDownloadManifest,
     credentials: Tuple[str, str],
-    max_number_of_workers: int = None,
+    max_number_of_workers: Optional[int] = None,
     max_number_of_download_attempts: int = 5,
-    current_attempt: int = None,
-) -> None:
+    current_attempt: Optional[int] = None,
+    manifest_store: Optional[ManifestStore] = None,
+    checksum_cache: Optional[ChecksumCache] = None,
+    direct_partition_writes: bool = False,
+) -> List[DownloadDetails]:
     if current_attempt is None:
         current_attempt = 1
+    # The md5sums calculated while downloading spare the integrity test a second read.
+    if checksum_cache is None:
+        checksum_cache = {}
+    partition_hashers = create_partition_hashers(concurrent_download_manifest)
+    if direct_partition_writes:
+        prepare_all_direct_partition_writes(concurrent_download_manifest)
 
     files_to_download = list(itertools.chain(
         concurrent_download_manifest.whole_files_to_download,
@@ -122,21 +297,307 @@ def download_files_concurrently(
             thread_safe_download,
             files_to_download,
             repeat(credentials),
+            repeat(checksum_cache),
+            repeat(partition_hashers),
+            repeat(direct_partition_writes),
         )
 
-    failed_downloads = post_concurrent_download_processing(concurrent_download_manifest)
+    failed_downloads = post_concurrent_download_processing(
+        concurrent_download_manifest,
+        checksum_cache,
+        partition_hashers.get_checksums(),
+        direct_partition_writes,
+    )
+    if manifest_store is not None:
+        manifest_store.record_integrity_test_results(
+            concurrent_download_manifest.files_reference_data,
+            failed_downloads.files_reference_data,
+        )
 
     if len(failed_downloads.files_reference_data) > 0:
         click.echo(f'Failed to download {len(failed_downloads.files_reference_data)} file(s).')
         if current_attempt <= max_number_of_download_attempts:
-            download_files_concurrently(
+            return download_files_concurrently(
                 failed_downloads,
                 credentials,
                 max_number_of_workers=max_number_of_workers,
                 max_number_of_download_attempts=max_number_of_download_attempts,
-                current_attempt=current_attempt + 1)
-        else:
-            for failed_download in failed_downloads.files_reference_data:
-                click.echo(f'- Failed to download: {failed_download.file_name}')
+                current_attempt=current_attempt + 1,
+                manifest_store=manifest_store,
+                checksum_cache=checksum_cache,
+                direct_partition_writes=direct_partition_writes)
+        for failed_download in failed_downloads.files_reference_data:
+            click.echo(f'- Failed to download: {failed_download.file_name}')
+    else:
+        click.echo('All files successfully downloaded.')
+    return failed_downloads.files_reference_data
+
+
+def download_worker(
+    download_queue: "queue.Queue[QueuedDownload]",
+    credentials: Tuple[str, str],
+    checksum_cache: Optional[ChecksumCache] = None,
+    partition_hashers: Optional[PartitionHashers] = None,
+    direct_partition_writes: bool = False,
+    worker_errors: Optional[List[Exception]] = None,
+) -> None:
+    """Downloads the items taken from a queue until a None sentinel is received.
+
+    A network or file system error only fails the item being downloaded: the item is
+    detected by the post-download integrity test and downloaded again in a subsequent
+    attempt. Any other error is a programming error: it is appended to worker_errors, to
+    be raised by the thread that started the workers, and the remaining items are taken
+    from the queue without being downloaded, so that the planning stage is never blocked
+    on a full queue.
+
+    Parameters
+    ----------
+    download_queue: queue.Queue[QueuedDownload]
+        The queue of the items (whole files or partitions) to download.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache where the md5sums of the downloaded whole files are
+        recorded.
+    partition_hashers: Optional[PartitionHashers]
+        The optional ordered hashers of the partitioned files being downloaded.
+    direct_partition_writes: bool
+        If True, the partitions are written at their offset in their preallocated parent
+        file. By default is set equal to False.
+    worker_errors: Optional[List[Exception]]
+        An optional list shared by the workers, where the unexpected errors are appended.
+        If omitted, the unexpected errors are raised by the worker.
+    """
+    while True:
+        item_to_download = download_queue.get()
+        try:
+            if item_to_download is None:
+                return
+            if worker_errors:
+                continue
+            thread_safe_download(
+                item_to_download,
+                credentials,
+                checksum_cache,
+                partition_hashers,
+                direct_partition_writes,
+            )
+        except (requests.exceptions.RequestException, OSError) as download_error:
+            click.echo(f"- Download error: {download_error!r}")
+        except Exception as unexpected_error:
+            if worker_errors is None:
+                raise
+            worker_errors.append(unexpected_error)
+        finally:
+            download_queue.task_done()
+
+
+def download_files_pipelined(
+    discovered_files: Iterable[DiscoveredFileInfo],
+    path_to_data_directory: str,
+    credentials: Tuple[str, str],
+    partition_size_in_mib: float = 5.0,
+    max_number_of_workers: Optional[int] = None,
+    max_number_of_download_attempts: int = 5,
+    max_queue_size: int = 100,
+    manifest_store: Optional[ManifestStore] = None,
+    checksum_cache: Optional[ChecksumCache] = None,
+    direct_partition_writes: bool = False,
+    failed_downloads: Optional[List[DownloadDetails]] = None,
+) -> ConcurrentDownloadManifest:
+    """Plans and downloads files concurrently, as soon as they are discovered.
+
+    Instead of waiting for the crawl to complete and for the whole download manifest to be
+    generated, each discovered file is planned (and split in partitions, if larger than
+    the multi-part threshold) as soon as it is yielded by discovered_files, and its items
+    are put on a bounded queue from which a pool of download workers takes them
+    immediately. When discovered_files is a lazy crawler, such as iter_datavault_crawler,
+    the crawl latency overlaps with the transfer time. Since the queue is bounded, the
+    crawl is paused whenever the download workers fall behind.
+
+    Once all the discovered files are downloaded, the download manifest files are written,
+    and the partitioned files are concatenated and tested as in the concurrent download,
+    with the failed downloads being downloaded again concurrently.
+
+    Parameters
+    ----------
+    discovered_files: Iterable[DiscoveredFileInfo]
+        An iterable of DiscoveredFileInfo named-tuples containing the raw download
+        information of the files to download.
+    path_to_data_directory: str
+        The full path to the directory where the data has to be written.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    partition_size_in_mib: float
+        The size of the partitions in MiB. By default is set equal to 5.0 MiB.
+    max_number_of_workers: Optional[int]
+        The number of download workers. If omitted, it is set to the same default used by
+        concurrent.futures.ThreadPoolExecutor.
+    max_number_of_download_attempts: int
+        The maximum number of download attempts of the files whose download failed.
+    max_queue_size: int
+        The maximum number of items waiting in the queue between the planning and the
+        download stages. By default is set equal to 100.
+    manifest_store: Optional[ManifestStore]
+        An optional SQLite manifest store where the files and their download status are
+        recorded.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of the files that
+        did not change since they were last tested. The md5sums of the whole files,
+        calculated while they are downloaded, are recorded in it.
+    direct_partition_writes: bool
+        If True, each partitioned file is preallocated when it is planned, and its
+        partitions are written at their offset in it instead of being concatenated. By
+        default is set equal to False.
+    failed_downloads: Optional[List[DownloadDetails]]
+        An optional list that is extended with the DownloadDetails named-tuples of the
+        files whose download still failed after the last download attempt.
+
+    Returns
+    -------
+    ConcurrentDownloadManifest
+        The download manifest of all the discovered files.
+    """
+    if max_number_of_workers is None:
+        max_number_of_workers = min(32, (os.cpu_count() or 1) + 4)
+    if checksum_cache is None:
+        checksum_cache = {}
+    partition_hashers = PartitionHashers()
+    download_queue: "queue.Queue[QueuedDownload]" = queue.Queue(maxsize=max_queue_size)
+    worker_errors: List[Exception] = []
+    workers = [
+        threading.Thread(
+            target=download_worker,
+            args=(
+                download_queue,
+                credentials,
+                checksum_cache,
+                partition_hashers,
+                direct_partition_writes,
+                worker_errors,
+            ),
+            daemon=True,
+        )
+        for _ in range(max_number_of_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        download_details = plan_and_queue_discovered_files(
+            discovered_files,
+            path_to_data_directory,
+            partition_size_in_mib,
+            download_queue,
+            partition_hashers,
+            direct_partition_writes,
+            worker_errors,
+        )
+    finally:
+        for _ in workers:
+            download_queue.put(None)
+        for worker in workers:
+            worker.join()
+    if worker_errors:
+        raise worker_errors[0]
+
+    click.echo(f"Discovered {len(download_details)} file(s) to download.")
+    download_manifest = ConcurrentDownloadManifest(
+        files_reference_data=download_details,
+        whole_files_to_download=generate_whole_files_download_manifest(download_details),
+        partitions_to_download=generate_partitions_download_manifest(
+            download_details,
+            partition_size_in_mib,
+        ),
+    )
+    if len(download_details) == 0:
+        return download_manifest
+    generate_manifest_file(download_details, manifest_store=manifest_store)
+
+    failed_downloads_manifest = post_concurrent_download_processing(
+        download_manifest,
+        checksum_cache,
+        partition_hashers.get_checksums(),
+        direct_partition_writes,
+    )
+    if manifest_store is not None:
+        manifest_store.record_integrity_test_results(
+            download_details, failed_downloads_manifest.files_reference_data,
+        )
+    remaining_failed_downloads = []
+    if len(failed_downloads_manifest.files_reference_data) > 0:
+        click.echo(
+            f'Failed to download {len(failed_downloads_manifest.files_reference_data)} file(s).'
+        )
+        remaining_failed_downloads = download_files_concurrently(
+            failed_downloads_manifest,
+            credentials,
+            max_number_of_workers=max_number_of_workers,
+            max_number_of_download_attempts=max_number_of_download_attempts,
+            current_attempt=2,
+            manifest_store=manifest_store,
+            checksum_cache=checksum_cache,
+            direct_partition_writes=direct_partition_writes,
+        )
     else:
         click.echo('All files successfully downloaded.')
+    if failed_downloads is not None:
+        failed_downloads.extend(remaining_failed_downloads)
+    return download_manifest
+
+
+def plan_and_queue_discovered_files(
+    discovered_files: Iterable[DiscoveredFileInfo],
+    path_to_data_directory: str,
+    partition_size_in_mib: float,
+    download_queue: "queue.Queue[QueuedDownload]",
+    partition_hashers: PartitionHashers,
+    direct_partition_writes: bool = False,
+    worker_errors: Optional[List[Exception]] = None,
+) -> List[DownloadDetails]:
+    """Plans the download of each discovered file and puts its items on the download queue.
+
+    Parameters
+    ----------
+    discovered_files: Iterable[DiscoveredFileInfo]
+        An iterable of DiscoveredFileInfo named-tuples of the files to download.
+    path_to_data_directory: str
+        The full path to the directory where the data has to be written.
+    partition_size_in_mib: float
+        The size of the partitions in MiB.
+    download_queue: queue.Queue[QueuedDownload]
+        The queue from which the download workers take the items to download.
+    partition_hashers: PartitionHashers
+        The ordered hashers of the partitioned files, to which each planned partitioned
+        file is added.
+    direct_partition_writes: bool
+        If True, each partitioned file is preallocated when it is planned. By default is
+        set equal to False.
+    worker_errors: Optional[List[Exception]]
+        The unexpected errors raised by the download workers. The planning stops as soon
+        as the list is not empty.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        The DownloadDetails named-tuples of the planned files.
+    """
+    download_details = []
+    for discovered_file in discovered_files:
+        if worker_errors:
+            break
+        file_download_details, items_to_download = plan_discovered_file_download(
+            discovered_file,
+            path_to_data_directory,
+            partition_size_in_mib,
+        )
+        download_details.append(file_download_details)
+        if file_download_details.is_partitioned is True:
+            partitions = [
+                item for item in items_to_download if isinstance(item, PartitionDownloadDetails)
+            ]
+            partition_hashers.add_file(file_download_details, partitions)
+            if direct_partition_writes:
+                prepare_direct_partition_writes(file_download_details, partitions)
+        for item_to_download in items_to_download:
+            download_queue.put(item_to_download)
+    return download_details
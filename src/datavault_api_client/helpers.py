@@ -1,8 +1,27 @@
 """Implements helper functions."""
 
-from typing import List, Tuple
-
-from datavault_api_client.data_structures import DiscoveredFileInfo
+import calendar
+import datetime
+import functools
+import os
+import pathlib
+import re
+import tempfile
+from typing import Callable, IO, List, Optional, Sequence, Tuple, Union
+import urllib.parse
+
+from datavault_api_client.data_structures import DiscoveredFileInfo, ParsedFileName
+from datavault_api_client.discovered_files_table import DiscoveredFilesTable
+
+
+FILE_NAME_PATTERN = re.compile(
+    r"^(?P<file_type>[A-Z]+)_(?P<source_id>[0-9]+)_(?P<date>[0-9]{8})(?P<extension>\..*)?$"
+)
+WATCHLIST_FILE_NAME_PATTERN = re.compile(
+    r"^(?P<file_type>WATCHLIST)_[^_]+_(?P<source_id>[0-9]+)_(?P<date>[0-9]{8})"
+    r"(?P<extension>\..*)?$"
+)
+DATE_CACHE_SIZE = 4096
 
 
 ##########################################################################################
@@ -69,14 +88,14 @@ def validate_credentials(credentials: Tuple[str, str]) -> None:
 ##########################################################################################
 
 
-def calculate_number_of_discovered_files(discovered_files: List[DiscoveredFileInfo]) -> int:
+def calculate_number_of_discovered_files(discovered_files: Sequence[DiscoveredFileInfo]) -> int:
     """Calculates the number of files discovered by the DataVault crawler.
 
     Parameters
     ----------
-    discovered_files: List[DiscoveredFileInfo]
-        A list of DiscoveredFileInfo named-tuples containing the file-specific information
-        of each file that was discovered by the DataVault crawler.
+    discovered_files: Sequence[DiscoveredFileInfo]
+        A sequence of DiscoveredFileInfo named-tuples containing the file-specific
+        information of each file that was discovered by the DataVault crawler.
 
     Returns
     -------
@@ -119,13 +138,16 @@ def generate_human_readable_size(byte_size: int) -> str:
     # return f'{round(byte_size/divisor, 1)} {suffix}'
 
 
-def calculate_total_download_size(discovered_files: List[DiscoveredFileInfo]) -> str:
+def calculate_total_download_size(discovered_files: Sequence[DiscoveredFileInfo]) -> str:
     """Calculate the total download size and returns the size in a human readable format.
 
+    If the discovered files are stored in a DiscoveredFilesTable, its sizes column is
+    summed directly, without materialising each of the rows.
+
     Parameters
     ----------
-    discovered_files: List[DiscoveredFileInfo]
-        A list of DiscoveredFileInfo named-tuples containing the file-specific information
+    discovered_files: Sequence[DiscoveredFileInfo]
+        A sequence of DiscoveredFileInfo named-tuples containing the file-specific information
         of each file that was discovered by the DataVault crawler.
 
     Returns
@@ -133,6 +155,234 @@ def calculate_total_download_size(discovered_files: List[DiscoveredFileInfo]) ->
     str
         The total download size in a human readable form.
     """
-    file_sizes = [discovered_file.size for discovered_file in discovered_files]
-    total_download_size = sum(file_sizes)
+    if isinstance(discovered_files, DiscoveredFilesTable):
+        total_download_size = discovered_files.total_size()
+    else:
+        total_download_size = sum(discovered_file.size for discovered_file in discovered_files)
     return generate_human_readable_size(total_download_size)
+
+
+##########################################################################################
+
+
+def get_node_path_components(node_url: str) -> List[str]:
+    """Returns the components of a node url path that follow the API version and endpoint.
+
+    The directory tree of the DataVault API is structured as
+    <year>/<month>/<day>/<source>/<file-type>, and is mounted on an url path of the form
+    /<version>/<endpoint>/ (e.g. /v2/list/). The function returns the components of the
+    directory tree found in the passed url.
+
+    Parameters
+    ----------
+    node_url: str
+        The full url (or the url path) of a node of the DataVault API directory tree.
+
+    Returns
+    -------
+    List[str]
+        The components of the directory tree contained in the node url path. For example,
+        the components of '/v2/list/2020/12/01/S945' are ['2020', '12', '01', 'S945'].
+    """
+    path = urllib.parse.urlsplit(node_url).path
+    return [component for component in path.split("/")[3:] if component]
+
+
+def get_node_date_range(node_url: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """Returns the range of reference dates covered by a node of the directory tree.
+
+    A year node covers the whole year, a month node the whole month, while day nodes and
+    all the nodes underneath them cover a single day.
+
+    Parameters
+    ----------
+    node_url: str
+        The full url (or the url path) of a node of the DataVault API directory tree.
+
+    Returns
+    -------
+    Optional[Tuple[datetime.date, datetime.date]]
+        A tuple containing the first and last date covered by the node, or None if the
+        node is above the year level or its path does not contain a valid date.
+    """
+    date_components = get_node_path_components(node_url)[:3]
+    try:
+        year, *month_and_day = (int(component) for component in date_components)
+        if len(month_and_day) == 0:
+            return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+        if len(month_and_day) == 1:
+            month = month_and_day[0]
+            last_day = calendar.monthrange(year, month)[1]
+            return datetime.date(year, month, 1), datetime.date(year, month, last_day)
+        day = datetime.date(year, month_and_day[0], month_and_day[1])
+        return day, day
+    except ValueError:
+        return None
+
+
+##########################################################################################
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_compact_date(date_string: str) -> datetime.datetime:
+    """Converts a date in the YYYYMMDD format into a datetime.datetime object.
+
+    The conversion is considerably faster than datetime.datetime.strptime, and its results
+    are kept in a bounded cache, since all the files listed in a day share the same date.
+
+    Parameters
+    ----------
+    date_string: str
+        A date in the YYYYMMDD format.
+
+    Returns
+    -------
+    datetime.datetime
+        A datetime.datetime object with the year, the month and the day of the date.
+    """
+    return datetime.datetime(int(date_string[:4]), int(date_string[4:6]), int(date_string[6:8]))
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def convert_iso_date_to_compact_date(iso_date: str) -> str:
+    """Converts a date in the ISO format into a date in the YYYYMMDD format.
+
+    Parameters
+    ----------
+    iso_date: str
+        A date (or datetime) in the ISO format.
+
+    Returns
+    -------
+    str
+        The date in the YYYYMMDD format.
+    """
+    return datetime.datetime.fromisoformat(iso_date).strftime("%Y%m%d")
+
+
+def parse_file_name(raw_filename: str) -> Optional[ParsedFileName]:
+    """Parses the components of a DataVault file name in a single pass.
+
+    COREREF, CROSSREF, CUSIP, PREMREF, REPLAY and SEDOL file names are structured as
+    '<FILE-TYPE>_<SOURCE-ID>_<DATE>', while WATCHLIST file names have the user name as an
+    additional term included between the <FILE-TYPE> and <SOURCE-ID> components. Both
+    name grammars are matched by precompiled regular expressions, and the date is
+    converted through a bounded cache.
+
+    Parameters
+    ----------
+    raw_filename: str
+        A file name of a DataVault file.
+
+    Returns
+    -------
+    Optional[ParsedFileName]
+        A ParsedFileName named-tuple with the cleaned file name, the source id and the
+        reference date, or None if the file name does not match any of the grammars.
+    """
+    if raw_filename.startswith("WATCHLIST"):
+        match = WATCHLIST_FILE_NAME_PATTERN.match(raw_filename)
+    else:
+        match = FILE_NAME_PATTERN.match(raw_filename)
+    if match is None:
+        return None
+    file_type, source_id, date, extension = match.group(
+        "file_type", "source_id", "date", "extension",
+    )
+    try:
+        reference_date = parse_compact_date(date)
+    except ValueError:
+        return None
+    return ParsedFileName(
+        file_name=f"{file_type}_{source_id}_{date}{extension or ''}",
+        source_id=int(source_id),
+        reference_date=reference_date,
+    )
+
+
+##########################################################################################
+
+
+def get_file_mode(path_to_file: pathlib.Path) -> int:
+    """Returns the permission bits to give to a file written by write_file_atomically.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The full path to the file to write.
+
+    Returns
+    -------
+    int
+        The permission bits of the existing file or, if the file does not exist, the
+        default permission bits of a new file under the current umask.
+    """
+    try:
+        return path_to_file.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def synchronise_directory(path_to_directory: pathlib.Path) -> None:
+    """Flushes the entries of a directory to disk, where the platform supports it.
+
+    Parameters
+    ----------
+    path_to_directory: pathlib.Path
+        The full path to the directory.
+    """
+    try:
+        directory_descriptor = os.open(path_to_directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_descriptor)
+
+
+def write_file_atomically(
+    path_to_file: Union[str, pathlib.Path],
+    write_content: Callable[[IO[str]], None],
+) -> None:
+    """Writes a text file to a temporary file and moves it to its final path.
+
+    The content is first written to a temporary file in the same directory, which is
+    flushed to disk and then replaces the file in a single atomic operation, so that a
+    crash in the middle of the write never leaves a truncated file behind. The directory
+    is flushed as well, so that the replacement itself survives a crash. The file keeps
+    the permissions of the file it replaces or, for a new file, gets the default
+    permissions under the current umask. If the write or the replacement fails, the
+    temporary file is deleted before the exception is propagated.
+
+    Parameters
+    ----------
+    path_to_file: Union[str, pathlib.Path]
+        The full path to the file to write. Its parent directory must exist.
+    write_content: Callable[[IO[str]], None]
+        A function writing the content of the file to the passed text file object (e.g.
+        functools.partial(json.dump, data)).
+    """
+    path_to_file = pathlib.Path(path_to_file)
+    file_mode = get_file_mode(path_to_file)
+    outfile = tempfile.NamedTemporaryFile(
+        "w", dir=path_to_file.parent, suffix=".tmp", delete=False,
+    )
+    try:
+        with outfile:
+            write_content(outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.chmod(outfile.name, file_mode)
+        os.replace(outfile.name, path_to_file)
+    except BaseException:
+        try:
+            os.unlink(outfile.name)
+        except FileNotFoundError:
+            pass
+        raise
+    synchronise_directory(path_to_file.parent)
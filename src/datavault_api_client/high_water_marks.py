@@ -0,0 +1,180 @@
+"""Implements the high-water marks used by the incremental crawls.
+
+The DataVault directory tree grows one day at a time, yet a plain crawl of an endpoint
+lists all its year, month and day branches on every run. The high-water mark of an
+endpoint is the latest reference date of the files discovered by its last crawl. An
+incremental crawl only visits the day branches at or after the high-water mark, moved
+back by a configurable look-back window that allows to discover the files that were
+published late.
+
+The high-water marks are stored in a JSON file, keyed by the endpoint url and by the
+source ids and file types selected for the crawl, since a crawl restricted to some sources
+or file types says nothing about the others.
+"""
+import datetime
+import functools
+import json
+import pathlib
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from datavault_api_client.crawl_checkpoint import sort_selection
+from datavault_api_client.data_structures import DiscoveredFileInfo
+from datavault_api_client.helpers import write_file_atomically
+
+
+class HighWaterMarkStore:
+    """A JSON file storing the high-water mark of each crawled endpoint.
+
+    Parameters
+    ----------
+    path_to_store: str
+        The full path to the JSON file where the high-water marks are stored. Its parent
+        directory is created if it does not exist.
+    """
+
+    def __init__(self, path_to_store: str) -> None:
+        self.path_to_store = pathlib.Path(path_to_store)
+        self.path_to_store.parent.mkdir(parents=True, exist_ok=True)
+
+    def load_all(self) -> Dict[str, str]:
+        """Loads all the high-water marks in the store.
+
+        Returns
+        -------
+        Dict[str, str]
+            A dictionary mapping the key of each crawl to its high-water mark in the ISO
+            format. The dictionary is empty if the store does not exist or cannot be read.
+        """
+        try:
+            with self.path_to_store.open("r") as infile:
+                high_water_marks = json.load(infile)
+        except (OSError, ValueError):
+            return {}
+        return high_water_marks if isinstance(high_water_marks, dict) else {}
+
+    def get(
+        self,
+        url: str,
+        source_ids: Optional[FrozenSet[int]] = None,
+        file_types: Optional[FrozenSet[str]] = None,
+    ) -> Optional[datetime.date]:
+        """Returns the high-water mark of a crawl.
+
+        Parameters
+        ----------
+        url: str
+            The url of the crawled endpoint.
+        source_ids: Optional[FrozenSet[int]]
+            The set of the source ids selected for the crawl, if any.
+        file_types: Optional[FrozenSet[str]]
+            The set of the file types selected for the crawl, if any.
+
+        Returns
+        -------
+        Optional[datetime.date]
+            The latest reference date of the files discovered by the last crawl, or None
+            if the endpoint was never crawled with the same selection.
+        """
+        high_water_mark = self.load_all().get(get_crawl_key(url, source_ids, file_types))
+        if high_water_mark is None:
+            return None
+        return datetime.date.fromisoformat(high_water_mark)
+
+    def update(
+        self,
+        url: str,
+        discovered_files: Iterable[DiscoveredFileInfo],
+        source_ids: Optional[FrozenSet[int]] = None,
+        file_types: Optional[FrozenSet[str]] = None,
+    ) -> Optional[datetime.date]:
+        """Advances the high-water mark of a crawl to the latest discovered reference date.
+
+        The high-water mark never moves backwards. The store is replaced atomically.
+
+        Parameters
+        ----------
+        url: str
+            The url of the crawled endpoint.
+        discovered_files: Iterable[DiscoveredFileInfo]
+            The files discovered by the completed crawl.
+        source_ids: Optional[FrozenSet[int]]
+            The set of the source ids selected for the crawl, if any.
+        file_types: Optional[FrozenSet[str]]
+            The set of the file types selected for the crawl, if any.
+
+        Returns
+        -------
+        Optional[datetime.date]
+            The updated high-water mark, or None if the endpoint has no high-water mark
+            and no file was discovered.
+        """
+        crawl_key = get_crawl_key(url, source_ids, file_types)
+        high_water_marks = self.load_all()
+        reference_dates = [file.reference_date.date() for file in discovered_files]
+        if high_water_marks.get(crawl_key) is not None:
+            reference_dates.append(datetime.date.fromisoformat(high_water_marks[crawl_key]))
+        if len(reference_dates) == 0:
+            return None
+        high_water_mark = max(reference_dates)
+        high_water_marks[crawl_key] = high_water_mark.isoformat()
+        write_file_atomically(
+            self.path_to_store,
+            functools.partial(json.dump, high_water_marks, indent=2, sort_keys=True),
+        )
+        return high_water_mark
+
+
+def get_crawl_key(
+    url: str,
+    source_ids: Optional[FrozenSet[int]] = None,
+    file_types: Optional[FrozenSet[str]] = None,
+) -> str:
+    """Returns the key identifying a crawl in the high-water mark store.
+
+    Parameters
+    ----------
+    url: str
+        The url of the crawled endpoint.
+    source_ids: Optional[FrozenSet[int]]
+        The set of the source ids selected for the crawl, if any.
+    file_types: Optional[FrozenSet[str]]
+        The set of the file types selected for the crawl, if any.
+
+    Returns
+    -------
+    str
+        A JSON string with the url stripped of any trailing slash and the sorted
+        selections.
+    """
+    return json.dumps([url.rstrip("/"), sort_selection(source_ids), sort_selection(file_types)])
+
+
+def get_incremental_from_date(
+    high_water_mark: Optional[datetime.date],
+    look_back_days: int = 1,
+    from_date: Optional[datetime.date] = None,
+) -> Optional[datetime.date]:
+    """Returns the first reference date visited by an incremental crawl.
+
+    Parameters
+    ----------
+    high_water_mark: Optional[datetime.date]
+        The high-water mark of the crawl, if any.
+    look_back_days: int
+        The number of days before the high-water mark that are crawled again to discover
+        the files published late. By default is set equal to 1.
+    from_date: Optional[datetime.date]
+        An optional first reference date selected by the user.
+
+    Returns
+    -------
+    Optional[datetime.date]
+        The latest between from_date and the high-water mark moved back by the look-back
+        window, or None if neither is set.
+    """
+    if high_water_mark is None:
+        return from_date
+    incremental_from_date = high_water_mark - datetime.timedelta(days=look_back_days)
+    if from_date is None:
+        return incremental_from_date
+    return max(from_date, incremental_from_date)
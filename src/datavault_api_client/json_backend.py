@@ -0,0 +1,63 @@
+"""Implements the decoding of the JSON documents returned by the DataVault API.
+
+The decoder backend is selected at import time: if the optional orjson package is
+installed (e.g. with `pip install datavault-api-client[fast-json]`), it is used to decode
+the directory listings, otherwise the decoder of the standard library json module is used.
+Both backends decode the raw bytes of the response body, sparing the intermediate text
+decoding carried out by requests.Response.json().
+"""
+import json
+from types import ModuleType
+from typing import Callable, cast, Dict, List, Optional, Union
+
+from datavault_api_client.data_structures import ListingNode
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+JsonDocument = Union[Dict[str, object], List[object], str, int, float, bool, None]
+
+loads: Callable[[bytes], JsonDocument]
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    loads = orjson.loads
+else:
+    JSON_BACKEND = "json"
+    loads = json.loads
+
+
+def decode_json(content: bytes) -> JsonDocument:
+    """Decodes a JSON document using the backend selected at import time.
+
+    Parameters
+    ----------
+    content: bytes
+        The raw bytes of the JSON document.
+
+    Returns
+    -------
+    JsonDocument
+        The decoded JSON document.
+    """
+    return loads(content)
+
+
+def decode_node_listing(content: bytes) -> List[ListingNode]:
+    """Decodes the listing of a node of the DataVault API directory tree.
+
+    Parameters
+    ----------
+    content: bytes
+        The raw bytes of the response body of a listing request.
+
+    Returns
+    -------
+    List[ListingNode]
+        A list of dictionaries, each describing a child node of the listed node.
+    """
+    # The DataVault API lists the child nodes of a node as an array of JSON objects.
+    return cast(List[ListingNode], decode_json(content))
@@ -0,0 +1,226 @@
+"""Implements a persistent on-disk cache of the DataVault API directory listings.
+
+Historical DataVault days never change, yet every crawl lists every node of the directory
+tree underneath the crawled endpoint. The listing cache stores the listing of each node in
+a dedicated JSON file, keyed by the node url, within a user-defined cache directory.
+
+Whether a cached listing can be used without contacting the server is decided by a
+freshness policy: listings of nodes covering only dates older than a configurable number
+of days are treated as immutable, while the listings of the other nodes expire after a
+time-to-live that can be configured for each depth of the directory tree. Expired
+listings are revalidated with a conditional request, using the ETag and Last-Modified
+headers originally returned by the server, when available, or are listed again otherwise.
+"""
+import datetime
+import functools
+import hashlib
+import json
+import pathlib
+import time
+from typing import Dict, List, Mapping, Optional
+
+from datavault_api_client.data_structures import CachedListing, ListingNode
+from datavault_api_client.helpers import (
+    get_node_date_range,
+    get_node_path_components,
+    write_file_atomically,
+)
+
+
+class ListingCache:
+    """A persistent cache of directory listings stored under a cache directory.
+
+    Parameters
+    ----------
+    cache_directory: str
+        The full path to the directory where the cached listings are stored. It is
+        created if it does not exist.
+    ttl_by_depth: Optional[Dict[int, float]]
+        An optional dictionary mapping a depth of the directory tree to the number of
+        seconds after which the listings of the nodes at that depth expire. The depth of
+        a node is the number of components of its path below the endpoint: 1 for years,
+        2 for months, 3 for days, 4 for sources and 5 for file types.
+    default_ttl: float
+        The time-to-live in seconds of the listings of the nodes at a depth not included
+        in ttl_by_depth. By default is set equal to 0, meaning that the listings are
+        always revalidated with the server unless immutable.
+    immutable_after_days: Optional[int]
+        If set, the listings of the nodes covering only dates older than this number of
+        days are considered immutable and are never revalidated.
+    """
+
+    def __init__(
+        self,
+        cache_directory: str,
+        ttl_by_depth: Optional[Dict[int, float]] = None,
+        default_ttl: float = 0.0,
+        immutable_after_days: Optional[int] = None,
+    ) -> None:
+        self.cache_directory = pathlib.Path(cache_directory)
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_by_depth = ttl_by_depth if ttl_by_depth is not None else {}
+        self.default_ttl = default_ttl
+        self.immutable_after_days = immutable_after_days
+
+    def get_path_to_entry(self, url: str) -> pathlib.Path:
+        """Returns the path to the file storing the cached listing of a node.
+
+        Parameters
+        ----------
+        url: str
+            The full url of the node.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the cache file, named after the sha256 digest of the url.
+        """
+        return self.cache_directory.joinpath(
+            f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json",
+        )
+
+    def load(self, url: str) -> Optional[CachedListing]:
+        """Loads the cached listing of a node.
+
+        Parameters
+        ----------
+        url: str
+            The full url of the node.
+
+        Returns
+        -------
+        Optional[CachedListing]
+            The cached listing, or None if the node is not cached or the cache file
+            cannot be read.
+        """
+        try:
+            with self.get_path_to_entry(url).open("r") as infile:
+                entry = CachedListing(**json.load(infile))
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.url != url:
+            return None
+        return entry
+
+    def store(
+        self,
+        url: str,
+        listing: List[ListingNode],
+        headers: Mapping[str, str],
+    ) -> None:
+        """Stores the listing of a node in the cache.
+
+        The entry is first written to a temporary file that then atomically replaces the
+        existing entry, so that concurrent crawlers never read a partially written entry.
+
+        Parameters
+        ----------
+        url: str
+            The full url of the node.
+        listing: List[ListingNode]
+            The child nodes of the node, as returned by the DataVault API.
+        headers: Mapping[str, str]
+            The headers of the response, used to retrieve the ETag and Last-Modified
+            validators.
+        """
+        self.write_entry(
+            CachedListing(
+                url=url,
+                listing=listing,
+                fetched_at=time.time(),
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+            ),
+        )
+
+    def refresh(self, entry: CachedListing) -> None:
+        """Marks a cached listing as just revalidated.
+
+        Parameters
+        ----------
+        entry: CachedListing
+            The cached listing that the server confirmed as unchanged.
+        """
+        self.write_entry(entry._replace(fetched_at=time.time()))
+
+    def write_entry(self, entry: CachedListing) -> None:
+        """Atomically writes a cached listing to its cache file.
+
+        Parameters
+        ----------
+        entry: CachedListing
+            The cached listing to write.
+        """
+        write_file_atomically(
+            self.get_path_to_entry(entry.url), functools.partial(json.dump, entry._asdict()),
+        )
+
+    def is_immutable(self, url: str, today: Optional[datetime.date] = None) -> bool:
+        """Checks whether the listing of a node is considered immutable.
+
+        Parameters
+        ----------
+        url: str
+            The full url of the node.
+        today: Optional[datetime.date]
+            The current date. If omitted, today's date is used.
+
+        Returns
+        -------
+        bool
+            True if the node covers only dates older than immutable_after_days days,
+            False otherwise.
+        """
+        if self.immutable_after_days is None:
+            return False
+        date_range = get_node_date_range(url)
+        if date_range is None:
+            return False
+        if today is None:
+            today = datetime.date.today()
+        return date_range[1] < today - datetime.timedelta(days=self.immutable_after_days)
+
+    def is_fresh(self, entry: CachedListing, now: Optional[float] = None) -> bool:
+        """Checks whether a cached listing can be used without contacting the server.
+
+        Parameters
+        ----------
+        entry: CachedListing
+            The cached listing to check.
+        now: Optional[float]
+            The current POSIX timestamp. If omitted, the current time is used.
+
+        Returns
+        -------
+        bool
+            True if the listing is immutable or has not expired yet, False otherwise.
+        """
+        if self.is_immutable(entry.url):
+            return True
+        if now is None:
+            now = time.time()
+        ttl = self.ttl_by_depth.get(len(get_node_path_components(entry.url)), self.default_ttl)
+        return now - entry.fetched_at < ttl
+
+
+def get_revalidation_headers(entry: Optional[CachedListing]) -> Dict[str, str]:
+    """Returns the headers used to conditionally request a cached listing.
+
+    Parameters
+    ----------
+    entry: Optional[CachedListing]
+        The cached listing to revalidate, if any.
+
+    Returns
+    -------
+    Dict[str, str]
+        A dictionary with the If-None-Match and If-Modified-Since headers, depending on
+        the validators available. The dictionary is empty if no validator is available.
+    """
+    headers = {}
+    if entry is not None:
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
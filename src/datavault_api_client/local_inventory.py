@@ -0,0 +1,112 @@
+"""Implements the inventory of the files already available in the local data directory.
+
+Re-running the download of a date range that was already downloaded (e.g. to backfill a
+few missing days) plans and transfers again every discovered file, even when the exact
+same file already sits at its path in the local directory tree. The functions in this
+module list each day, source and file-type directory of the local tree once with
+os.scandir, and drop from the download manifest the files whose size and md5sum already
+match the expected values. The md5sum of a local file is only calculated if its size
+matches, and can be looked up in an optional checksum cache keyed on the inode, size and
+modification time of the file.
+"""
+import os
+import pathlib
+from typing import Dict, List, Optional, Tuple
+
+from datavault_api_client.data_integrity import ChecksumCache, get_cached_checksum
+from datavault_api_client.data_structures import DownloadDetails
+
+
+def scan_directory(path_to_directory: pathlib.Path) -> Dict[str, os.stat_result]:
+    """Lists the regular files of a directory together with their status.
+
+    Parameters
+    ----------
+    path_to_directory: pathlib.Path
+        The path to the directory to list.
+
+    Returns
+    -------
+    Dict[str, os.stat_result]
+        A dictionary mapping the name of each regular file in the directory to the result
+        of its stat call. The dictionary is empty if the directory does not exist.
+    """
+    try:
+        with os.scandir(path_to_directory) as directory_entries:
+            return {
+                entry.name: entry.stat()
+                for entry in directory_entries
+                if entry.is_file(follow_symlinks=False)
+            }
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+
+def is_file_already_downloaded(
+    file_download_details: DownloadDetails,
+    directory_files: Dict[str, os.stat_result],
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> bool:
+    """Checks whether a file already sits at its path with the expected size and md5sum.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the file.
+    directory_files: Dict[str, os.stat_result]
+        The regular files of the directory of the file, as returned by scan_directory.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of unchanged files.
+
+    Returns
+    -------
+    bool
+        True if the local file matches the expected size and md5sum, False otherwise.
+    """
+    file_path = pathlib.Path(file_download_details.file_path)
+    file_status = directory_files.get(file_path.name)
+    if file_status is None or file_status.st_size != file_download_details.size:
+        return False
+    try:
+        local_checksum = get_cached_checksum(file_path, file_status, checksum_cache)
+    except OSError:
+        return False
+    return local_checksum == file_download_details.md5sum
+
+
+def split_already_downloaded_files(
+    download_details: List[DownloadDetails],
+    checksum_cache: Optional[ChecksumCache] = None,
+) -> Tuple[List[DownloadDetails], List[DownloadDetails]]:
+    """Splits the files of a download manifest between missing and already downloaded.
+
+    Each directory of the local tree is listed only once, whatever the number of files
+    expected in it.
+
+    Parameters
+    ----------
+    download_details: List[DownloadDetails]
+        A list of DownloadDetails named-tuples.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of unchanged files.
+
+    Returns
+    -------
+    Tuple[List[DownloadDetails], List[DownloadDetails]]
+        A tuple with the list of the DownloadDetails named-tuples of the files to download,
+        and the list of those of the files that are already available locally.
+    """
+    scanned_directories: Dict[pathlib.Path, Dict[str, os.stat_result]] = {}
+    files_to_download = []
+    existing_files = []
+    for file in download_details:
+        parent_directory = pathlib.Path(file.file_path).parent
+        directory_files = scanned_directories.get(parent_directory)
+        if directory_files is None:
+            directory_files = scan_directory(parent_directory)
+            scanned_directories[parent_directory] = directory_files
+        if is_file_already_downloaded(file, directory_files, checksum_cache):
+            existing_files.append(file)
+        else:
+            files_to_download.append(file)
+    return files_to_download, existing_files
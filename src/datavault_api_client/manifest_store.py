@@ -0,0 +1,355 @@
+"""Implements a SQLite store for the download manifest and the state of the downloads.
+
+The date-specific download_manifest_YYYYMMDD.json files written in the day directories
+record what files are expected on each day, but answering a question such as "which
+files of source 207 are still missing for March" requires opening and parsing one file per
+day. The ManifestStore keeps the same records in a single SQLite database, indexed by
+reference date, source id and file name, together with the download status of each file
+and the md5sum verified by the data integrity test, so that range queries and the
+resumption of interrupted downloads are index lookups.
+"""
+import datetime
+import pathlib
+import sqlite3
+import threading
+import time
+from types import TracebackType
+from typing import Iterable, List, Optional, Tuple, Type, Union
+
+from datavault_api_client.data_structures import DownloadDetails, ManifestRecord
+
+
+PENDING = "pending"
+VERIFIED = "verified"
+FAILED = "failed"
+
+SqlValue = Optional[Union[str, int]]
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS files (
+        file_name TEXT NOT NULL,
+        md5sum TEXT NOT NULL,
+        download_url TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        reference_date TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        is_partitioned INTEGER,
+        status TEXT NOT NULL DEFAULT 'pending',
+        verified_md5sum TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (file_name, md5sum)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS files_by_date ON files (reference_date, source_id)",
+    "CREATE INDEX IF NOT EXISTS files_by_source ON files (source_id, reference_date)",
+    "CREATE INDEX IF NOT EXISTS files_by_status ON files (status, reference_date)",
+)
+
+RECORD_COLUMNS = (
+    "file_name, download_url, file_path, source_id, reference_date, size, md5sum, "
+    "is_partitioned, status, verified_md5sum"
+)
+
+
+class ManifestStore:
+    """A SQLite database recording the files to download and the state of their download.
+
+    The store can be shared by multiple threads, since all the accesses to the database
+    connection are serialised by a lock.
+
+    Parameters
+    ----------
+    path_to_database: str
+        The full path to the SQLite database file. Its parent directory is created if it
+        does not exist.
+    """
+
+    def __init__(self, path_to_database: str) -> None:
+        pathlib.Path(path_to_database).parent.mkdir(parents=True, exist_ok=True)
+        self.path_to_database = path_to_database
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path_to_database, check_same_thread=False)
+        with self.lock, self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self) -> "ManifestStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def record_download_details(self, download_details: Iterable[DownloadDetails]) -> None:
+        """Records the files of a download manifest.
+
+        New files are recorded as pending. The download information of the files already
+        in the store is updated, while their download status is left untouched.
+
+        Parameters
+        ----------
+        download_details: Iterable[DownloadDetails]
+            The DownloadDetails named-tuples of the files to record.
+        """
+        now = time.time()
+        rows = [
+            (
+                file.file_name,
+                file.md5sum,
+                file.download_url,
+                pathlib.Path(file.file_path).as_posix(),
+                file.source_id,
+                file.reference_date.date().isoformat(),
+                file.size,
+                file.is_partitioned,
+                now,
+            )
+            for file in download_details
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                """
+                INSERT INTO files (
+                    file_name, md5sum, download_url, file_path, source_id, reference_date,
+                    size, is_partitioned, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (file_name, md5sum) DO UPDATE SET
+                    download_url = excluded.download_url,
+                    file_path = excluded.file_path,
+                    source_id = excluded.source_id,
+                    reference_date = excluded.reference_date,
+                    size = excluded.size,
+                    is_partitioned = excluded.is_partitioned,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+
+    def update_status(
+        self,
+        download_details: Iterable[DownloadDetails],
+        status: str,
+    ) -> None:
+        """Updates the download status of multiple files.
+
+        Files marked as verified have their expected md5sum recorded as the verified
+        md5sum, since they passed the data integrity test; files marked with any other
+        status have their verified md5sum cleared.
+
+        Parameters
+        ----------
+        download_details: Iterable[DownloadDetails]
+            The DownloadDetails named-tuples of the files to update.
+        status: str
+            The new download status (PENDING, VERIFIED or FAILED).
+        """
+        now = time.time()
+        rows = [
+            (status, file.md5sum if status == VERIFIED else None, now, file.file_name, file.md5sum)
+            for file in download_details
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                """
+                UPDATE files SET status = ?, verified_md5sum = ?, updated_at = ?
+                WHERE file_name = ? AND md5sum = ?
+                """,
+                rows,
+            )
+
+    def record_integrity_test_results(
+        self,
+        tested_files: Iterable[DownloadDetails],
+        failed_files: Iterable[DownloadDetails],
+    ) -> None:
+        """Records the outcome of the data integrity test of multiple files.
+
+        Parameters
+        ----------
+        tested_files: Iterable[DownloadDetails]
+            The DownloadDetails named-tuples of all the tested files.
+        failed_files: Iterable[DownloadDetails]
+            The DownloadDetails named-tuples of the files that failed the test.
+        """
+        failed_files = list(failed_files)
+        failed_keys = {(file.file_name, file.md5sum) for file in failed_files}
+        self.update_status(
+            [file for file in tested_files if (file.file_name, file.md5sum) not in failed_keys],
+            VERIFIED,
+        )
+        self.update_status(failed_files, FAILED)
+
+    def get_records(
+        self,
+        source_id: Optional[int] = None,
+        from_date: Optional[datetime.date] = None,
+        to_date: Optional[datetime.date] = None,
+        status: Optional[str] = None,
+        exclude_status: Optional[str] = None,
+    ) -> List[ManifestRecord]:
+        """Returns the recorded files matching the passed filters.
+
+        Parameters
+        ----------
+        source_id: Optional[int]
+            If set, only the files of the source are returned.
+        from_date: Optional[datetime.date]
+            If set, only the files with a reference date on or after from_date are returned.
+        to_date: Optional[datetime.date]
+            If set, only the files with a reference date on or before to_date are returned.
+        status: Optional[str]
+            If set, only the files with this download status are returned.
+        exclude_status: Optional[str]
+            If set, the files with this download status are not returned.
+
+        Returns
+        -------
+        List[ManifestRecord]
+            The ManifestRecord named-tuples of the matching files, sorted by reference
+            date, source id and file name.
+        """
+        conditions, parameters = get_query_conditions(
+            source_id, from_date, to_date, status, exclude_status,
+        )
+        query = f"SELECT {RECORD_COLUMNS} FROM files"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY reference_date, source_id, file_name"
+        with self.lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+        return [convert_row_to_record(row) for row in rows]
+
+    def get_missing_files(
+        self,
+        source_id: Optional[int] = None,
+        from_date: Optional[datetime.date] = None,
+        to_date: Optional[datetime.date] = None,
+    ) -> List[ManifestRecord]:
+        """Returns the recorded files that were not verified yet.
+
+        Parameters
+        ----------
+        source_id: Optional[int]
+            If set, only the files of the source are returned.
+        from_date: Optional[datetime.date]
+            If set, only the files with a reference date on or after from_date are returned.
+        to_date: Optional[datetime.date]
+            If set, only the files with a reference date on or before to_date are returned.
+
+        Returns
+        -------
+        List[ManifestRecord]
+            The ManifestRecord named-tuples of the pending and failed files.
+        """
+        return self.get_records(source_id, from_date, to_date, exclude_status=VERIFIED)
+
+
+def get_query_conditions(
+    source_id: Optional[int] = None,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+    status: Optional[str] = None,
+    exclude_status: Optional[str] = None,
+) -> Tuple[List[str], List[Union[str, int]]]:
+    """Translates the filters of a query into SQL conditions and their parameters.
+
+    Parameters
+    ----------
+    source_id: Optional[int]
+        An optional source id.
+    from_date: Optional[datetime.date]
+        An optional first reference date.
+    to_date: Optional[datetime.date]
+        An optional last reference date.
+    status: Optional[str]
+        An optional download status to select.
+    exclude_status: Optional[str]
+        An optional download status to exclude.
+
+    Returns
+    -------
+    Tuple[List[str], List[Union[str, int]]]
+        A tuple with the list of the SQL conditions and the list of their parameters.
+    """
+    conditions = []
+    parameters: List[Union[str, int]] = []
+    query_filters: Tuple[Tuple[str, Optional[Union[str, int]]], ...] = (
+        ("source_id = ?", source_id),
+        ("reference_date >= ?", from_date.isoformat() if from_date is not None else None),
+        ("reference_date <= ?", to_date.isoformat() if to_date is not None else None),
+        ("status = ?", status),
+        ("status != ?", exclude_status),
+    )
+    for condition, parameter in query_filters:
+        if parameter is not None:
+            conditions.append(condition)
+            parameters.append(parameter)
+    return conditions, parameters
+
+
+def convert_row_to_record(row: Tuple[SqlValue, ...]) -> ManifestRecord:
+    """Converts a row of the files table into a ManifestRecord named-tuple.
+
+    Parameters
+    ----------
+    row: Tuple[SqlValue, ...]
+        A row of the files table, with the columns listed in RECORD_COLUMNS.
+
+    Returns
+    -------
+    ManifestRecord
+        The ManifestRecord named-tuple of the file.
+    """
+    (
+        file_name, download_url, file_path, source_id, reference_date, size, md5sum,
+        is_partitioned, status, verified_md5sum,
+    ) = row
+    return ManifestRecord(
+        file_name=str(file_name),
+        download_url=str(download_url),
+        file_path=pathlib.Path(str(file_path)),
+        source_id=int(source_id or 0),
+        reference_date=datetime.datetime.fromisoformat(str(reference_date)),
+        size=int(size or 0),
+        md5sum=str(md5sum),
+        is_partitioned=None if is_partitioned is None else bool(is_partitioned),
+        status=str(status),
+        verified_md5sum=None if verified_md5sum is None else str(verified_md5sum),
+    )
+
+
+def convert_record_to_download_details(record: ManifestRecord) -> DownloadDetails:
+    """Converts a ManifestRecord named-tuple into a DownloadDetails named-tuple.
+
+    Parameters
+    ----------
+    record: ManifestRecord
+        A ManifestRecord named-tuple.
+
+    Returns
+    -------
+    DownloadDetails
+        The DownloadDetails named-tuple of the file, that can be used to resume its
+        download.
+    """
+    return DownloadDetails(
+        file_name=record.file_name,
+        download_url=record.download_url,
+        file_path=record.file_path,
+        source_id=record.source_id,
+        reference_date=record.reference_date,
+        size=record.size,
+        md5sum=record.md5sum,
+        is_partitioned=record.is_partitioned,
+    )
@@ -0,0 +1,386 @@
+"""Implements the ordered hashing of the partitions of a file as they are downloaded.
+
+The md5sum of a partitioned file could only be checked after its partitions were
+concatenated and the concatenated file was read back from disk. An OrderedPartitionHasher
+keeps a running md5 for each partitioned file together with a hashing frontier, the index
+of the next partition to hash. The chunks of the partition at the frontier are fed into
+the running md5 straight from the received buffers as they are written to disk, while
+the partitions landing ahead of the frontier are hashed as soon as the frontier reaches
+them, from their buffered chunks if they fit in the memory budget of the hasher, or from
+their (freshly written) partition files otherwise. The digest of the whole file is
+therefore available as soon as its last partition is downloaded, and a corrupt file is
+detected without reading the concatenated file again.
+"""
+import hashlib
+import pathlib
+import threading
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
+import urllib.parse
+
+from datavault_api_client.data_structures import (
+    ConcurrentDownloadManifest,
+    DownloadDetails,
+    PartitionDownloadDetails,
+)
+
+
+MAX_BUFFERED_BYTES = 16 * 1024 * 1024
+
+LandedPartition = Tuple[pathlib.Path, int, Optional[int], Optional[List[bytes]]]
+
+
+class BinaryWriter(Protocol):
+    """The binary output a partition is written to, e.g. a file opened in "wb" mode."""
+
+    def write(self, chunk: bytes) -> int:
+        """Writes a chunk and returns the number of Bytes written."""
+
+
+class OrderedPartitionHasher:
+    """Hashes the partitions of a file in their order, as they are downloaded.
+
+    The hasher can be shared by multiple download threads. The running md5 is only updated
+    by the thread owning the frontier: the thread downloading the partition at the
+    frontier, and then the thread that completed it, which goes on hashing the partitions
+    that landed ahead of it. The lock only guards the frontier and the landed partitions,
+    so that the partition files are read without holding it.
+
+    Parameters
+    ----------
+    number_of_partitions: int
+        The number of partitions of the file.
+    max_buffered_bytes: int
+        The maximum number of Bytes of a partition landing ahead of the frontier that are
+        held in memory while it is downloaded, and of all the landed partitions whose
+        chunks are held in memory until the frontier reaches them. Once exceeded, the
+        partition is hashed from its partition file. By default is set equal to 16 MiB.
+    """
+
+    def __init__(
+        self,
+        number_of_partitions: int,
+        max_buffered_bytes: int = MAX_BUFFERED_BYTES,
+    ) -> None:
+        self.number_of_partitions = number_of_partitions
+        self.max_buffered_bytes = max_buffered_bytes
+        self.file_hash = hashlib.md5()
+        self.next_partition_index = 1
+        self.landed_partitions: Dict[int, LandedPartition] = {}
+        self.landed_bytes = 0
+        self.lock = threading.Lock()
+
+    def update_partition(self, partition_index: int, chunks: List[bytes]) -> bool:
+        """Feeds the received chunks of a partition into the running md5, if at the frontier.
+
+        Parameters
+        ----------
+        partition_index: int
+            The index of the partition, starting from 1.
+        chunks: List[bytes]
+            The chunks of the partition received and not hashed yet.
+
+        Returns
+        -------
+        bool
+            True if the partition is at the frontier and the chunks were hashed, False
+            otherwise.
+        """
+        with self.lock:
+            if partition_index != self.next_partition_index:
+                return False
+            for chunk in chunks:
+                self.file_hash.update(chunk)
+            return True
+
+    def complete_partition(
+        self,
+        partition_index: int,
+        path_to_partition: pathlib.Path,
+        chunks: Optional[List[bytes]],
+        offset: int = 0,
+        length: Optional[int] = None,
+    ) -> None:
+        """Marks a partition as downloaded, moving the frontier forward if possible.
+
+        Parameters
+        ----------
+        partition_index: int
+            The index of the partition, starting from 1.
+        path_to_partition: pathlib.Path
+            The path to the closed file where the partition was written.
+        chunks: Optional[List[bytes]]
+            The chunks of the partition that were not hashed yet, or None if they were
+            not held in memory, in which case the partition is read from its file.
+        offset: int
+            The offset of the partition in the file. By default is set equal to 0.
+        length: Optional[int]
+            The length of the partition in Bytes. If None (the default), the partition
+            extends to the end of the file.
+        """
+        with self.lock:
+            if partition_index != self.next_partition_index:
+                if partition_index > self.next_partition_index:
+                    self.land_partition(
+                        partition_index, (path_to_partition, offset, length, chunks),
+                    )
+                return
+        landed_partition: Optional[LandedPartition] = (path_to_partition, offset, length, chunks)
+        while landed_partition is not None:
+            self.hash_landed_partition(*landed_partition)
+            with self.lock:
+                self.next_partition_index += 1
+                landed_partition = self.landed_partitions.pop(self.next_partition_index, None)
+                if landed_partition is not None and landed_partition[3] is not None:
+                    self.landed_bytes -= sum(len(chunk) for chunk in landed_partition[3])
+
+    def land_partition(self, partition_index: int, landed_partition: LandedPartition) -> None:
+        """Records a partition completed ahead of the frontier. Must hold the lock.
+
+        The chunks of the partition are only kept if they fit in the memory budget of the
+        hasher, together with those of the other landed partitions.
+
+        Parameters
+        ----------
+        partition_index: int
+            The index of the partition, starting from 1.
+        landed_partition: LandedPartition
+            The path to the file, the offset, the length and the chunks of the partition.
+        """
+        path_to_partition, offset, length, chunks = landed_partition
+        if chunks is not None:
+            chunks_size = sum(len(chunk) for chunk in chunks)
+            if self.landed_bytes + chunks_size > self.max_buffered_bytes:
+                chunks = None
+            else:
+                self.landed_bytes += chunks_size
+        self.landed_partitions[partition_index] = (path_to_partition, offset, length, chunks)
+
+    def hash_landed_partition(
+        self,
+        path_to_partition: pathlib.Path,
+        offset: int,
+        length: Optional[int],
+        chunks: Optional[List[bytes]],
+    ) -> None:
+        """Feeds a partition at the frontier into the running md5, from memory or its file.
+
+        Parameters
+        ----------
+        path_to_partition: pathlib.Path
+            The path to the file where the partition was written.
+        offset: int
+            The offset of the partition in the file.
+        length: Optional[int]
+            The length of the partition in Bytes, or None if the partition extends to the
+            end of the file.
+        chunks: Optional[List[bytes]]
+            The chunks of the partition that were not hashed yet, or None if the partition
+            is read from its file.
+        """
+        if chunks is None:
+            self.hash_partition_file(path_to_partition, offset, length)
+        else:
+            for chunk in chunks:
+                self.file_hash.update(chunk)
+
+    def hash_partition_file(
+        self,
+        path_to_partition: pathlib.Path,
+        offset: int = 0,
+        length: Optional[int] = None,
+    ) -> None:
+        """Feeds the content of a partition, read from its file, into the running md5.
+
+        Parameters
+        ----------
+        path_to_partition: pathlib.Path
+            The path to the file where the partition was written.
+        offset: int
+            The offset of the partition in the file. By default is set equal to 0.
+        length: Optional[int]
+            The length of the partition in Bytes. If None (the default), the partition
+            extends to the end of the file.
+        """
+        optimal_chunk_size = self.file_hash.block_size * 128
+        with path_to_partition.open(mode="rb") as partition:
+            partition.seek(offset)
+            remaining_bytes = length
+            while remaining_bytes is None or remaining_bytes > 0:
+                chunk_size = optimal_chunk_size
+                if remaining_bytes is not None:
+                    chunk_size = min(chunk_size, remaining_bytes)
+                    remaining_bytes -= chunk_size
+                chunk = partition.read(chunk_size)
+                if not chunk:
+                    break
+                self.file_hash.update(chunk)
+
+    def write_partition(
+        self,
+        partition_index: int,
+        chunks: Iterable[bytes],
+        output: BinaryWriter,
+    ) -> Optional[List[bytes]]:
+        """Writes the chunks of a partition to a file, hashing them when at the frontier.
+
+        Parameters
+        ----------
+        partition_index: int
+            The index of the partition, starting from 1.
+        chunks: Iterable[bytes]
+            The chunks of the partition, as they are received.
+        output: BinaryWriter
+            The file where the partition is written, opened for writing in binary mode, or
+            any other binary writer (e.g. an OffsetWriter).
+
+        Returns
+        -------
+        Optional[List[bytes]]
+            The chunks that were received but not hashed yet, to pass to
+            complete_partition once the partition file is closed, or None if they were
+            not held in memory.
+        """
+        pending_chunks: Optional[List[bytes]] = []
+        buffered_bytes = 0
+        for chunk in chunks:
+            output.write(chunk)
+            if pending_chunks is None:
+                continue
+            pending_chunks.append(chunk)
+            if self.update_partition(partition_index, pending_chunks):
+                pending_chunks = []
+                buffered_bytes = 0
+                continue
+            buffered_bytes += len(chunk)
+            if buffered_bytes > self.max_buffered_bytes:
+                pending_chunks = None
+        return pending_chunks
+
+    def hexdigest(self) -> Optional[str]:
+        """Returns the md5sum of the file once all its partitions are hashed, None otherwise."""
+        with self.lock:
+            if self.next_partition_index <= self.number_of_partitions:
+                return None
+            return self.file_hash.hexdigest()
+
+
+class PartitionHashers:
+    """Collects the OrderedPartitionHasher objects of the partitioned files of a download.
+
+    Only the files whose partitions are all downloaded in the same download session get
+    a hasher. The files that are only missing some partitions (e.g. in a download retry)
+    are checked by reading back the concatenated file.
+    """
+
+    def __init__(self) -> None:
+        self.hashers: Dict[str, OrderedPartitionHasher] = {}
+
+    def add_file(
+        self,
+        file_download_details: DownloadDetails,
+        partitions: List[PartitionDownloadDetails],
+    ) -> None:
+        """Creates the hasher of a partitioned file, if all its partitions are downloaded.
+
+        Parameters
+        ----------
+        file_download_details: DownloadDetails
+            The DownloadDetails named-tuple of the partitioned file.
+        partitions: List[PartitionDownloadDetails]
+            The PartitionDownloadDetails named-tuples of the partitions of the file that
+            are downloaded.
+        """
+        if is_complete_set_of_partitions(file_download_details, partitions):
+            self.hashers[file_download_details.file_name] = OrderedPartitionHasher(
+                len(partitions),
+            )
+
+    def get(self, parent_file_name: str) -> Optional[OrderedPartitionHasher]:
+        """Returns the hasher of a partitioned file, or None if the file has no hasher."""
+        return self.hashers.get(parent_file_name)
+
+    def get_checksums(self) -> Dict[str, str]:
+        """Returns the md5sums of the files whose partitions were all downloaded and hashed.
+
+        Returns
+        -------
+        Dict[str, str]
+            A dictionary mapping the name of each fully hashed partitioned file to its
+            md5sum.
+        """
+        checksums = {}
+        for file_name, hasher in self.hashers.items():
+            checksum = hasher.hexdigest()
+            if checksum is not None:
+                checksums[file_name] = checksum
+        return checksums
+
+
+def get_partition_upper_extremity(partition_download_url: str) -> Optional[int]:
+    """Extracts the upper extremity of a partition from its download URL.
+
+    Parameters
+    ----------
+    partition_download_url: str
+        The partition-specific download URL.
+
+    Returns
+    -------
+    Optional[int]
+        The upper extremity of the partition, or None if the URL does not specify it.
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(partition_download_url).query)
+    try:
+        return int(query["end"][0])
+    except (KeyError, ValueError):
+        return None
+
+
+def is_complete_set_of_partitions(
+    file_download_details: DownloadDetails,
+    partitions: List[PartitionDownloadDetails],
+) -> bool:
+    """Checks whether a list of partitions covers a file from its first to its last Byte.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the partitioned file.
+    partitions: List[PartitionDownloadDetails]
+        The PartitionDownloadDetails named-tuples of some partitions of the file.
+
+    Returns
+    -------
+    bool
+        True if the partitions are numbered from 1 without gaps and the last one ends at
+        the size of the file, False otherwise.
+    """
+    partition_indices = sorted(partition.partition_index for partition in partitions)
+    if not partition_indices or partition_indices != list(range(1, len(partitions) + 1)):
+        return False
+    last_partition = max(partitions, key=lambda partition: partition.partition_index)
+    upper_extremity = get_partition_upper_extremity(last_partition.download_url)
+    return upper_extremity == file_download_details.size
+
+
+def create_partition_hashers(download_manifest: ConcurrentDownloadManifest) -> PartitionHashers:
+    """Creates the hashers of the partitioned files of a concurrent download manifest.
+
+    Parameters
+    ----------
+    download_manifest: ConcurrentDownloadManifest
+        The concurrent download manifest.
+
+    Returns
+    -------
+    PartitionHashers
+        The hashers of the partitioned files whose partitions are all in the manifest.
+    """
+    partitions_by_file: Dict[str, List[PartitionDownloadDetails]] = {}
+    for partition in download_manifest.partitions_to_download:
+        partitions_by_file.setdefault(partition.parent_file_name, []).append(partition)
+    partition_hashers = PartitionHashers()
+    for file in download_manifest.files_reference_data:
+        if file.is_partitioned is True and file.file_name in partitions_by_file:
+            partition_hashers.add_file(file, partitions_by_file[file.file_name])
+    return partition_hashers
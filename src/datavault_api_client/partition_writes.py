@@ -0,0 +1,374 @@
+"""Implements the direct-to-offset writing of the partitions of a file.
+
+By default, each partition of a partitioned file is written to its own *_N.txt partition
+file, and the partition files are then copied into the final file and deleted, which
+doubles the disk writes and temporarily doubles the disk space taken by the file. With
+direct partition writes, the final file is preallocated to its expected size and each
+partition is written at its offset in the final file with os.pwrite, so that no
+concatenation is needed. The partitions are requested with inclusive byte ranges, and the
+offset of each partition is therefore its lower extremity.
+
+The progress of the download is recorded in a completed-ranges sidecar file next to the
+final file (e.g. COREREF_207_20200717.txt.bz2.ranges), where the offset and length of each
+completed partition are appended as a line. A partition whose received length differs from
+the length of its range is not recorded. The missing partitions of a file are those whose
+offset is not recorded in the sidecar with the expected length, and the sidecar is deleted
+once all the partitions of the file are completed.
+"""
+import os
+import pathlib
+from typing import Dict, Iterable, List, Optional
+import urllib.parse
+
+from datavault_api_client.data_structures import (
+    ConcurrentDownloadManifest,
+    DownloadDetails,
+    PartitionDownloadDetails,
+)
+from datavault_api_client.partition_hashing import (
+    get_partition_upper_extremity,
+    is_complete_set_of_partitions,
+    OrderedPartitionHasher,
+)
+
+
+COMPLETED_RANGES_SUFFIX = ".ranges"
+
+
+class OffsetWriter:
+    """A minimal binary writer writing consecutive chunks from an offset of a file.
+
+    Parameters
+    ----------
+    file_descriptor: int
+        The descriptor of the file, opened for writing.
+    offset: int
+        The offset where the first chunk is written.
+    """
+
+    def __init__(self, file_descriptor: int, offset: int) -> None:
+        self.file_descriptor = file_descriptor
+        self.offset = offset
+        self.bytes_written = 0
+
+    def write(self, chunk: bytes) -> int:
+        """Writes a chunk after the previously written ones.
+
+        Parameters
+        ----------
+        chunk: bytes
+            The chunk to write.
+
+        Returns
+        -------
+        int
+            The number of Bytes written.
+        """
+        view = memoryview(chunk)
+        while view:
+            position = self.offset + self.bytes_written
+            if hasattr(os, "pwrite"):
+                written = os.pwrite(self.file_descriptor, view, position)
+            else:
+                os.lseek(self.file_descriptor, position, os.SEEK_SET)
+                written = os.write(self.file_descriptor, view)
+            self.bytes_written += written
+            view = view[written:]
+        return len(chunk)
+
+
+def get_path_to_parent_file(partition: PartitionDownloadDetails) -> pathlib.Path:
+    """Returns the path to the final file a partition belongs to.
+
+    Parameters
+    ----------
+    partition: PartitionDownloadDetails
+        The PartitionDownloadDetails named-tuple of the partition.
+
+    Returns
+    -------
+    pathlib.Path
+        The path to the parent file, in the same directory as the partition file.
+    """
+    return pathlib.Path(partition.file_path).with_name(partition.parent_file_name)
+
+
+def get_path_to_completed_ranges(path_to_file: pathlib.Path) -> pathlib.Path:
+    """Returns the path to the completed-ranges sidecar file of a file.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the final file.
+
+    Returns
+    -------
+    pathlib.Path
+        The path to the sidecar file.
+    """
+    path_to_file = pathlib.Path(path_to_file)
+    return path_to_file.with_name(path_to_file.name + COMPLETED_RANGES_SUFFIX)
+
+
+def get_partition_offset(partition: PartitionDownloadDetails) -> int:
+    """Returns the offset of a partition in its parent file.
+
+    Parameters
+    ----------
+    partition: PartitionDownloadDetails
+        The PartitionDownloadDetails named-tuple of the partition.
+
+    Returns
+    -------
+    int
+        The lower extremity of the partition, as encoded in its download URL.
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(partition.download_url).query)
+    return int(query["start"][0])
+
+
+def get_expected_partition_length(partition: PartitionDownloadDetails, file_size: int) -> int:
+    """Returns the number of Bytes a partition is expected to contain.
+
+    The partitions are requested with inclusive byte ranges, whose upper extremity can
+    exceed the last Byte of the file (e.g. the range of the last partition ends at the
+    size of the file): the range is therefore capped to the size of the file.
+
+    Parameters
+    ----------
+    partition: PartitionDownloadDetails
+        The PartitionDownloadDetails named-tuple of the partition.
+    file_size: int
+        The size of the parent file in Bytes.
+
+    Returns
+    -------
+    int
+        The expected length of the partition in Bytes.
+    """
+    upper_extremity = get_partition_upper_extremity(partition.download_url)
+    end = file_size if upper_extremity is None else min(upper_extremity + 1, file_size)
+    return max(end - get_partition_offset(partition), 0)
+
+
+def preallocate_file(path_to_file: pathlib.Path, size: int) -> None:
+    """Creates a file with the given size, or resizes it if it already exists.
+
+    Where os.posix_fallocate is available, the disk blocks of the file are reserved
+    upfront, so that a full disk is detected before any partition is downloaded.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the file.
+    size: int
+        The size of the file in Bytes.
+    """
+    pathlib.Path(path_to_file).parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor = os.open(path_to_file, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(file_descriptor, size)
+        if hasattr(os, "posix_fallocate") and size > 0:
+            try:
+                os.posix_fallocate(file_descriptor, 0, size)
+            except OSError:
+                # Some file systems do not support preallocation: the file is sparse.
+                pass
+    finally:
+        os.close(file_descriptor)
+
+
+def record_completed_range(path_to_file: pathlib.Path, offset: int, length: int) -> None:
+    """Appends a completed range to the sidecar file of a file.
+
+    Each range is appended with a single write on a file opened in append mode, so that
+    multiple download threads can record their ranges concurrently.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the final file.
+    offset: int
+        The offset of the completed range.
+    length: int
+        The length of the completed range in Bytes.
+    """
+    file_descriptor = os.open(
+        get_path_to_completed_ranges(path_to_file),
+        os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+        0o644,
+    )
+    try:
+        os.write(file_descriptor, f"{offset} {length}\n".encode())
+    finally:
+        os.close(file_descriptor)
+
+
+def remove_completed_ranges(path_to_file: pathlib.Path) -> None:
+    """Deletes the sidecar file of a file, if it exists.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the final file.
+    """
+    try:
+        get_path_to_completed_ranges(path_to_file).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def read_completed_ranges(path_to_file: pathlib.Path) -> Dict[int, int]:
+    """Reads the completed ranges recorded in the sidecar file of a file.
+
+    Parameters
+    ----------
+    path_to_file: pathlib.Path
+        The path to the final file.
+
+    Returns
+    -------
+    Dict[int, int]
+        A dictionary mapping the offset of each completed range to its length. The
+        dictionary is empty if the sidecar file does not exist.
+    """
+    try:
+        content = get_path_to_completed_ranges(path_to_file).read_text()
+    except FileNotFoundError:
+        return {}
+    completed_ranges = {}
+    # A last line without a newline was truncated by an interruption: it is ignored, and
+    # its range downloaded again.
+    for line in content.split("\n")[:-1]:
+        offset, length = line.split()
+        completed_ranges[int(offset)] = int(length)
+    return completed_ranges
+
+
+def write_partition_at_offset(
+    partition: PartitionDownloadDetails,
+    chunks: Iterable[bytes],
+    partition_hasher: Optional[OrderedPartitionHasher] = None,
+) -> None:
+    """Writes a partition at its offset in its parent file and records its range.
+
+    The range is only recorded if the length of the received partition matches the length
+    of its range, capped to the size of the preallocated parent file.
+
+    Parameters
+    ----------
+    partition: PartitionDownloadDetails
+        The PartitionDownloadDetails named-tuple of the partition.
+    chunks: Iterable[bytes]
+        The chunks of the partition, as they are received.
+    partition_hasher: Optional[OrderedPartitionHasher]
+        The optional ordered hasher of the parent file.
+    """
+    path_to_file = get_path_to_parent_file(partition)
+    offset = get_partition_offset(partition)
+    path_to_file.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor = os.open(path_to_file, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        # The parent file is preallocated to its expected size.
+        expected_length = get_expected_partition_length(
+            partition, os.fstat(file_descriptor).st_size,
+        )
+        output = OffsetWriter(file_descriptor, offset)
+        if partition_hasher is not None:
+            pending_chunks = partition_hasher.write_partition(
+                partition.partition_index, chunks, output,
+            )
+        else:
+            for chunk in chunks:
+                output.write(chunk)
+    finally:
+        os.close(file_descriptor)
+    if output.bytes_written != expected_length:
+        # A truncated (or overlong) partition is left unrecorded, and downloaded again.
+        return
+    record_completed_range(path_to_file, offset, output.bytes_written)
+    if partition_hasher is not None:
+        partition_hasher.complete_partition(
+            partition.partition_index, path_to_file, pending_chunks, offset, output.bytes_written,
+        )
+
+
+def prepare_direct_partition_writes(
+    file_download_details: DownloadDetails,
+    partitions: List[PartitionDownloadDetails],
+) -> None:
+    """Preallocates a partitioned file and resets its sidecar, if all its partitions are due.
+
+    The files that are only missing some partitions (e.g. in a download retry) are left
+    untouched, so that the partitions already written are kept.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the partitioned file.
+    partitions: List[PartitionDownloadDetails]
+        The PartitionDownloadDetails named-tuples of the partitions of the file that are
+        downloaded.
+    """
+    if not is_complete_set_of_partitions(file_download_details, partitions):
+        return
+    remove_completed_ranges(file_download_details.file_path)
+    preallocate_file(file_download_details.file_path, file_download_details.size)
+
+
+def prepare_all_direct_partition_writes(download_manifest: ConcurrentDownloadManifest) -> None:
+    """Prepares the direct partition writes of all the partitioned files of a manifest.
+
+    Parameters
+    ----------
+    download_manifest: ConcurrentDownloadManifest
+        The concurrent download manifest.
+    """
+    partitions_by_file: Dict[str, List[PartitionDownloadDetails]] = {}
+    for partition in download_manifest.partitions_to_download:
+        partitions_by_file.setdefault(partition.parent_file_name, []).append(partition)
+    for file in download_manifest.files_reference_data:
+        if file.is_partitioned is True and file.file_name in partitions_by_file:
+            prepare_direct_partition_writes(file, partitions_by_file[file.file_name])
+
+
+def get_missing_direct_write_partitions(
+    file_download_details: DownloadDetails,
+    partitions: List[PartitionDownloadDetails],
+) -> List[PartitionDownloadDetails]:
+    """Returns the partitions of a file whose range is not recorded as completed.
+
+    A partition whose recorded length differs from the length of its range is missing.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the partitioned file.
+    partitions: List[PartitionDownloadDetails]
+        The PartitionDownloadDetails named-tuples of the partitions of the file that
+        were downloaded.
+
+    Returns
+    -------
+    List[PartitionDownloadDetails]
+        The PartitionDownloadDetails named-tuples of the missing partitions.
+    """
+    completed_ranges = read_completed_ranges(file_download_details.file_path)
+    missing_partitions = []
+    for partition in partitions:
+        recorded_length = completed_ranges.get(get_partition_offset(partition))
+        expected_length = get_expected_partition_length(partition, file_download_details.size)
+        if recorded_length != expected_length:
+            missing_partitions.append(partition)
+    return missing_partitions
+
+
+def finalise_direct_partition_writes(file_download_details: DownloadDetails) -> None:
+    """Deletes the sidecar file of a file whose partitions are all completed.
+
+    Parameters
+    ----------
+    file_download_details: DownloadDetails
+        The DownloadDetails named-tuple of the partitioned file.
+    """
+    remove_completed_ranges(file_download_details.file_path)
@@ -33,19 +33,44 @@ functions and, if any file fails the integrity test, its partitions are added to
 of files and partitions whose download is to be repeated.
 """
 import copy
+import errno
 import itertools
+import os
 import pathlib
 import shutil
-from typing import Any, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Set
 
-from datavault_api_client.data_integrity import get_list_of_failed_downloads
+from datavault_api_client.data_integrity import (
+    ChecksumCache,
+    get_checksum_cache_key,
+    get_list_of_failed_downloads,
+)
 from datavault_api_client.data_structures import (
     ConcurrentDownloadManifest,
     DownloadDetails,
     PartitionDownloadDetails,
 )
+from datavault_api_client.partition_writes import (
+    finalise_direct_partition_writes,
+    get_missing_direct_write_partitions,
+)
 
 
+COPY_METHODS = ("auto", "copy_file_range", "sendfile", "userspace")
+COPY_BUFFER_SIZE = 5 * 1024 * 1024
+# Kernel copies are attempted in large slices, still below the limit of a single call.
+KERNEL_COPY_SLICE_SIZE = 1024 * 1024 * 1024
+# The errors raised by copy_file_range and sendfile when the kernel, the file system or
+# the pair of files do not support the in-kernel copy.
+UNSUPPORTED_KERNEL_COPY_ERRORS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+    errno.EPERM,
+}
+
 ##########################################################################################
 
 
@@ -209,6 +234,35 @@ def get_all_missing_partitions(
     return list(itertools.chain.from_iterable(missing_partitions))
 
 
+def get_all_missing_direct_write_partitions(
+    whole_files_reference_data: List[DownloadDetails],
+    partitions_to_download: List[PartitionDownloadDetails],
+) -> List[PartitionDownloadDetails]:
+    """Returns all the missing partitions of the files whose partitions were written directly.
+
+    Parameters
+    ----------
+    whole_files_reference_data: List[DownloadDetails]
+        A list of DownloadDetails named-tuples each containing file-specific download
+        information.
+    partitions_to_download: List[PartitionDownloadDetails]
+        A list of PartitionDownloadDetails named-tuples.
+
+    Returns
+    -------
+    List[PartitionDownloadDetails]
+        A list of the PartitionDownloadDetails named-tuples of the partitions whose range
+        is not recorded as completed in the sidecar file of their parent file.
+    """
+    missing_partitions = [
+        get_missing_direct_write_partitions(
+            file, get_partitions_download_details(partitions_to_download, file.file_name),
+        )
+        for file in get_partitioned_files(whole_files_reference_data)
+    ]
+    return list(itertools.chain.from_iterable(missing_partitions))
+
+
 def get_files_with_missing_partitions(
     whole_files_reference_data: List[DownloadDetails],
     missing_partitions: List[PartitionDownloadDetails],
@@ -267,14 +321,134 @@ def get_files_ready_for_concatenation(
     )
 
 
-def concatenate_partitions(path_to_output_file: pathlib.Path) -> str:
+def copy_with_copy_file_range(source: BinaryIO, destination: BinaryIO) -> int:
+    """Copies the rest of a file at the end of another one with os.copy_file_range.
+
+    The bytes are moved by the kernel without passing through user space and, on file
+    systems supporting it (e.g. Btrfs, XFS, NFS 4.2), the copy may be carried out by
+    sharing the extents of the source file or on the server.
+
+    Parameters
+    ----------
+    source: BinaryIO
+        The source file, opened for reading in binary mode.
+    destination: BinaryIO
+        The destination file, opened for writing in binary mode.
+
+    Returns
+    -------
+    int
+        The number of Bytes copied.
+    """
+    copied_bytes = 0
+    while True:
+        copied_slice = os.copy_file_range(
+            source.fileno(), destination.fileno(), KERNEL_COPY_SLICE_SIZE,
+        )
+        if copied_slice == 0:
+            return copied_bytes
+        copied_bytes += copied_slice
+
+
+def copy_with_sendfile(source: BinaryIO, destination: BinaryIO) -> int:
+    """Copies the rest of a file at the end of another one with os.sendfile.
+
+    Parameters
+    ----------
+    source: BinaryIO
+        The source file, opened for reading in binary mode.
+    destination: BinaryIO
+        The destination file, opened for writing in binary mode.
+
+    Returns
+    -------
+    int
+        The number of Bytes copied.
+    """
+    offset = source.tell()
+    copied_bytes = 0
+    while True:
+        copied_slice = os.sendfile(
+            destination.fileno(), source.fileno(), offset + copied_bytes, KERNEL_COPY_SLICE_SIZE,
+        )
+        if copied_slice == 0:
+            source.seek(offset + copied_bytes)
+            return copied_bytes
+        copied_bytes += copied_slice
+
+
+def copy_file_content(
+    source: BinaryIO,
+    destination: BinaryIO,
+    copy_method: str = "auto",
+) -> str:
+    """Copies the rest of a file at the end of another one, in kernel space if possible.
+
+    With the "auto" copy method, os.copy_file_range is tried first, then os.sendfile, and
+    the bytes are finally copied through user space with shutil.copyfileobj if neither
+    is available or supported by the file systems of the two files.
+
+    Parameters
+    ----------
+    source: BinaryIO
+        The source file, opened for reading in binary mode.
+    destination: BinaryIO
+        The destination file, opened for writing in binary mode.
+    copy_method: str
+        One of "auto" (the default), "copy_file_range", "sendfile" and "userspace". If a
+        kernel copy method is selected but not supported, the next method is used.
+
+    Returns
+    -------
+    str
+        The copy method that was actually used.
+    """
+    if copy_method not in COPY_METHODS:
+        raise ValueError(f"Unknown copy method {copy_method!r}: expected one of {COPY_METHODS}.")
+    kernel_copy_methods = {
+        "copy_file_range": copy_with_copy_file_range,
+        "sendfile": copy_with_sendfile,
+    }
+    method_names = list(kernel_copy_methods)
+    if copy_method == "userspace":
+        method_names = []
+    elif copy_method != "auto":
+        method_names = method_names[method_names.index(copy_method):]
+    destination.flush()
+    for method_name in method_names:
+        if not hasattr(os, method_name):
+            continue
+        destination_position = os.lseek(destination.fileno(), 0, os.SEEK_CUR)
+        try:
+            kernel_copy_methods[method_name](source, destination)
+            return method_name
+        except OSError as copy_error:
+            # Only an unsupported copy that did not write anything falls back to the next
+            # method; any other error is a genuine I/O error.
+            destination_offset = os.lseek(destination.fileno(), 0, os.SEEK_CUR)
+            is_unsupported = copy_error.errno in UNSUPPORTED_KERNEL_COPY_ERRORS
+            if not is_unsupported or destination_offset != destination_position:
+                raise
+    shutil.copyfileobj(source, destination, length=COPY_BUFFER_SIZE)
+    return "userspace"
+
+
+def concatenate_partitions(
+    path_to_output_file: pathlib.Path,
+    copy_method: str = "auto",
+) -> str:
     """Concatenates .txt partition files into a single .txt.bz2 compressed file.
 
+    The partitions are copied in kernel space where possible (see copy_file_content).
+
     Parameters
     ----------
     path_to_output_file: pathlib.Path
         A pathlib.Path object indicating where the file that is assembled out of the
         single partition files will be saved.
+    copy_method: str
+        The method used to copy the partitions: one of "auto" (the default),
+        "copy_file_range", "sendfile" and "userspace".
 
     Returns
     -------
@@ -286,7 +460,7 @@ def concatenate_partitions(path_to_output_file: pathlib.Path) -> str:
         with path_to_output_file.open("wb") as outfile:
             for file_path in available_partition_files:
                 with file_path.open("rb") as file_source:
-                    shutil.copyfileobj(file_source, outfile, length=(5 * 1024 * 1024))
+                    copy_file_content(file_source, outfile, copy_method)
                 file_path.unlink()
     return path_to_output_file.as_posix()
 
@@ -335,11 +509,112 @@ def get_files_ready_for_integrity_test(
     """
     return list(set(whole_files_reference_data).difference(set(files_with_missing_partitions)))
 
+
+def get_files_failing_partition_checksums(
+    whole_files_reference_data: List[DownloadDetails],
+    partition_checksums: Dict[str, str],
+) -> List[DownloadDetails]:
+    """Returns the partitioned files whose partitions hashed to an unexpected md5sum.
+
+    Parameters
+    ----------
+    whole_files_reference_data: List[DownloadDetails]
+        A list of DownloadDetails named-tuples each containing file-specific download
+        information.
+    partition_checksums: Dict[str, str]
+        A dictionary mapping the name of the partitioned files whose partitions were all
+        hashed in order while being downloaded to their md5sum.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        A list of DownloadDetails named-tuples of the partitioned files whose md5sum,
+        calculated from their partitions, differs from the expected one.
+    """
+    return [
+        file for file in get_partitioned_files(whole_files_reference_data)
+        if partition_checksums.get(file.file_name, file.md5sum) != file.md5sum
+    ]
+
+
+def get_partition_checksums_matching_partition_files(
+    partitions_to_download: List[PartitionDownloadDetails],
+    partition_checksums: Dict[str, str],
+) -> Dict[str, str]:
+    """Keeps the md5sums of the files whose partition files on disk are the hashed ones.
+
+    concatenate_partitions joins all the partition files found in the directory of a
+    file, which may include stale partitions left over by an earlier download. The md5sum
+    calculated from the downloaded partitions only describes the concatenated file if the
+    partition files in the directory are exactly those partitions.
+
+    Parameters
+    ----------
+    partitions_to_download: List[PartitionDownloadDetails]
+        A list of PartitionDownloadDetails named-tuples of the downloaded partitions.
+    partition_checksums: Dict[str, str]
+        A dictionary mapping the name of the partitioned files whose partitions were all
+        hashed in order while being downloaded to their md5sum.
+
+    Returns
+    -------
+    Dict[str, str]
+        The items of partition_checksums whose file has no missing or extra partition
+        file in its directory.
+    """
+    partition_paths_by_file: Dict[str, Set[pathlib.Path]] = {}
+    for partition in partitions_to_download:
+        if partition.parent_file_name in partition_checksums:
+            partition_paths_by_file.setdefault(partition.parent_file_name, set()).add(
+                pathlib.Path(partition.file_path),
+            )
+    matching_checksums = {}
+    for file_name, partition_paths in partition_paths_by_file.items():
+        path_to_folder = next(iter(partition_paths)).parent
+        if set(get_downloaded_partitions(path_to_folder)) == partition_paths:
+            matching_checksums[file_name] = partition_checksums[file_name]
+    return matching_checksums
+
+
+def record_partition_checksums(
+    concatenated_files: List[DownloadDetails],
+    partition_checksums: Dict[str, str],
+    checksum_cache: ChecksumCache,
+) -> None:
+    """Records in a checksum cache the md5sums calculated from the partitions of the files.
+
+    The md5sum of a file is only recorded if the file has its expected size, so that a
+    file assembled from other partitions than the hashed ones is read back by the data
+    integrity test.
+
+    Parameters
+    ----------
+    concatenated_files: List[DownloadDetails]
+        A list of DownloadDetails named-tuples of the files whose partitions were
+        concatenated.
+    partition_checksums: Dict[str, str]
+        A dictionary mapping the name of the partitioned files whose partitions were all
+        hashed in order while being downloaded to their md5sum.
+    checksum_cache: ChecksumCache
+        The checksum cache where the md5sums are recorded under the key of the
+        concatenated files.
+    """
+    for file in concatenated_files:
+        checksum = partition_checksums.get(file.file_name)
+        if checksum is None or not file.file_path.exists():
+            continue
+        file_stats = file.file_path.stat()
+        # A file with an unexpected size was not assembled from the hashed partitions.
+        if file_stats.st_size == file.size:
+            checksum_cache[get_checksum_cache_key(file_stats)] = checksum
+
 ##########################################################################################
 
 
 def pre_concatenation_processing(
     download_manifest: ConcurrentDownloadManifest,
+    checksum_cache: Optional[ChecksumCache] = None,
+    direct_partition_writes: bool = False,
 ) -> ConcurrentDownloadManifest:
     """Implements the pre-concatenation processing phase.
 
@@ -358,6 +633,13 @@ def pre_concatenation_processing(
     download_manifest: ConcurrentDownloadManifest
         A ConcurrentDownloadManifest named-tuple containing the download manifest that
         was originally used to download the files concurrently.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of the files that
+        did not change since they were last tested.
+    direct_partition_writes: bool
+        If True, the partitions were written at their offset in their parent file, and
+        the missing partitions are those not recorded in the sidecar file of their parent
+        file. By default is set equal to False.
 
     Returns
     -------
@@ -368,11 +650,18 @@ def pre_concatenation_processing(
     """
     failed_non_partitioned_files = get_list_of_failed_downloads(
         get_non_partitioned_files(download_manifest.files_reference_data),
+        checksum_cache,
     )
-    missing_partitions = get_all_missing_partitions(
-        whole_files_reference_data=download_manifest.files_reference_data,
-        partitions_to_download=download_manifest.partitions_to_download,
-    )
+    if direct_partition_writes:
+        missing_partitions = get_all_missing_direct_write_partitions(
+            whole_files_reference_data=download_manifest.files_reference_data,
+            partitions_to_download=download_manifest.partitions_to_download,
+        )
+    else:
+        missing_partitions = get_all_missing_partitions(
+            whole_files_reference_data=download_manifest.files_reference_data,
+            partitions_to_download=download_manifest.partitions_to_download,
+        )
     files_with_missing_partitions = get_files_with_missing_partitions(
         whole_files_reference_data=download_manifest.files_reference_data,
         missing_partitions=missing_partitions,
@@ -390,6 +679,7 @@ def pre_concatenation_processing(
 def concatenation_processing(
     download_manifest: ConcurrentDownloadManifest,
     failed_downloads_manifest: ConcurrentDownloadManifest,
+    direct_partition_writes: bool = False,
 ) -> List[DownloadDetails]:
     """Implements the concatenation processing phase.
 
@@ -408,6 +698,10 @@ def concatenation_processing(
         whole that failed the data integrity test, and of the files that were split in
         multiple partitions but that, after the initial download, were found missing one
         or more partitions.
+    direct_partition_writes: bool
+        If True, the partitions were written at their offset in their parent file: there
+        is nothing to concatenate, and only the sidecar files of the completed files are
+        deleted. By default is set equal to False.
 
     Returns
     -------
@@ -423,6 +717,10 @@ def concatenation_processing(
         whole_files_reference_data=download_manifest.files_reference_data,
         files_with_missing_partitions=files_with_missing_partitions,
     )
+    if direct_partition_writes:
+        for file in files_ready_for_concatenation:
+            finalise_direct_partition_writes(file)
+        return files_ready_for_concatenation
     return concatenate_each_file_partitions(files_ready_for_concatenation)
 
 
@@ -485,14 +783,31 @@ def update_failed_download_manifest(
 
 def post_concurrent_download_processing(
     download_manifest: ConcurrentDownloadManifest,
+    checksum_cache: Optional[ChecksumCache] = None,
+    partition_checksums: Optional[Dict[str, str]] = None,
+    direct_partition_writes: bool = False,
 ) -> ConcurrentDownloadManifest:
     """Implements the post concurrent download processing phase.
 
+    The partitioned files whose md5sum was already calculated from their partitions while
+    they were downloaded are not read back after concatenation: those with an unexpected
+    md5sum are not concatenated and are downloaded again, while the md5sum of the others
+    is recorded in the checksum cache used by the data integrity test.
+
     Parameters
     ----------
     download_manifest: ConcurrentDownloadManifest
         The download manifest containing all the information used originally to download
         the files.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of the files that
+        did not change since they were last tested.
+    partition_checksums: Optional[Dict[str, str]]
+        An optional dictionary mapping the name of the partitioned files whose partitions
+        were all hashed in order while being downloaded to their md5sum.
+    direct_partition_writes: bool
+        If True, the partitions were written at their offset in their parent file, which
+        is therefore not concatenated. By default is set equal to False.
 
     Returns
     -------
@@ -500,9 +815,31 @@ def post_concurrent_download_processing(
         The download manifest containing the information of the files that need to be
         downloaded once again.
     """
-    initial_failed_downloads = pre_concatenation_processing(download_manifest)
-    concatenated_files = concatenation_processing(download_manifest, initial_failed_downloads)
-    integrity_test_failing_downloads = get_list_of_failed_downloads(concatenated_files)
+    if partition_checksums is None:
+        partition_checksums = {}
+    if checksum_cache is None:
+        checksum_cache = {}
+    initial_failed_downloads = pre_concatenation_processing(
+        download_manifest, checksum_cache, direct_partition_writes,
+    )
+    corrupt_files = get_files_failing_partition_checksums(
+        download_manifest.files_reference_data, partition_checksums,
+    )
+    if not direct_partition_writes:
+        partition_checksums = get_partition_checksums_matching_partition_files(
+            download_manifest.partitions_to_download, partition_checksums,
+        )
+    concatenated_files = concatenation_processing(
+        download_manifest,
+        initial_failed_downloads._replace(
+            files_reference_data=initial_failed_downloads.files_reference_data + corrupt_files,
+        ),
+        direct_partition_writes,
+    )
+    record_partition_checksums(concatenated_files, partition_checksums, checksum_cache)
+    integrity_test_failing_downloads = corrupt_files + get_list_of_failed_downloads(
+        concatenated_files, checksum_cache,
+    )
     return update_failed_download_manifest(
         initial_failed_downloads,
         download_manifest,
@@ -4,13 +4,17 @@ The functions in this module process the raw information contained in the list o
 DiscoveredFileInfo named tuples that is produced by the crawler, and prepare the download
 manifest that is used by the downloading functions as a reference.
 """
+import array
+import concurrent.futures
 import datetime
+import functools
 import itertools
 import json
 import pathlib
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import urllib.parse
 
+from datavault_api_client.data_integrity import ChecksumCache
 from datavault_api_client.data_structures import (
     ConcurrentDownloadManifest,
     DiscoveredFileInfo,
@@ -18,6 +22,17 @@ from datavault_api_client.data_structures import (
     ItemToDownload,
     PartitionDownloadDetails,
 )
+from datavault_api_client.helpers import (
+    convert_iso_date_to_compact_date,
+    write_file_atomically,
+)
+from datavault_api_client.local_inventory import split_already_downloaded_files
+from datavault_api_client.manifest_store import ManifestStore
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def generate_file_path_matching_datavault_structure(
@@ -183,7 +198,7 @@ def process_raw_download_info(
 
 
 def process_all_discovered_files_info(
-    discovered_files_info: List[DiscoveredFileInfo],
+    discovered_files_info: Sequence[DiscoveredFileInfo],
     path_to_data_directory: str,
     partition_size_in_mib: float = None,
 ) -> List[DownloadDetails]:
@@ -191,9 +206,10 @@ def process_all_discovered_files_info(
 
     Parameters
     ----------
-    discovered_files_info: List[DiscoveredFileInfo]
-        The list of DiscoveredFileInfo named-tuples produced by the DataVault crawler and
-        containing the raw download information of each discovered file.
+    discovered_files_info: Sequence[DiscoveredFileInfo]
+        The sequence of DiscoveredFileInfo named-tuples (e.g. a DiscoveredFilesTable)
+        produced by the DataVault crawler and containing the raw download information of
+        each discovered file.
     path_to_data_directory: str
         The path to the directory where the data will be downloaded.
     partition_size_in_mib: float
@@ -289,15 +305,42 @@ def generate_date_specific_path(
     """
     date = item_to_download.get("reference_date")
     parent_path = pathlib.Path(item_to_download.get("file_path")).parent.parent.parent
-    file_name = (
-        f"download_manifest_{datetime.datetime.fromisoformat(date).strftime('%Y%m%d')}.json"
-    )
+    file_name = f"download_manifest_{convert_iso_date_to_compact_date(date)}.json"
     return parent_path.joinpath(file_name).as_posix()
 
 
+def write_manifest_atomically(
+    items_to_download: List[ItemToDownload],
+    path_to_outfile: str,
+    compact: bool = False,
+) -> None:
+    """Writes a download manifest to a temporary file and moves it to its final path.
+
+    The manifest is written through write_file_atomically, so that a crash in the middle
+    of the write never leaves a truncated manifest file behind.
+
+    Parameters
+    ----------
+    items_to_download: List[ItemToDownload]
+        A list of ItemToDownload typed-dictionaries.
+    path_to_outfile: str
+        The full path as a string, leading to the file where the download manifest has to
+        be written.
+    compact: bool
+        If True, the manifest is serialised without indentation and whitespace. By default
+        is set equal to False, and the manifest is indented by two spaces.
+    """
+    if compact:
+        write_content = functools.partial(json.dump, items_to_download, separators=(",", ":"))
+    else:
+        write_content = functools.partial(json.dump, items_to_download, indent=2)
+    write_file_atomically(path_to_outfile, write_content)
+
+
 def write_manifest_to_json(
     items_to_download: List[ItemToDownload],
     path_to_outfile: str,
+    compact: bool = False,
 ) -> None:
     """Writes the content of the download manifest to a JSON file or updates its content.
 
@@ -308,67 +351,218 @@ def write_manifest_to_json(
     path_to_outfile: str
         The full path as a string, leading to the file where the download manifest has to
         be written.
+    compact: bool
+        If True, the manifest is serialised without indentation and whitespace. By default
+        is set equal to False.
     """
     if not pathlib.Path(path_to_outfile).parent.exists():
         pathlib.Path(path_to_outfile).parent.mkdir(parents=True, exist_ok=True)
     if not pathlib.Path(path_to_outfile).is_file():
-        with open(path_to_outfile, "w") as outfile:
-            json.dump(items_to_download, outfile, indent=2)
+        write_manifest_atomically(items_to_download, path_to_outfile, compact)
     else:
-        update_manifest_file(path_to_outfile, items_to_download)
+        update_manifest_file(path_to_outfile, items_to_download, compact)
+
+
+def get_manifest_item_key(item: ItemToDownload) -> Tuple[str, str]:
+    """Returns the key identifying a file in a download manifest.
+
+    Parameters
+    ----------
+    item: ItemToDownload
+        An ItemToDownload typed-dictionary.
+
+    Returns
+    -------
+    Tuple[str, str]
+        A tuple with the file name and the md5sum of the file.
+    """
+    return item.get("file_name"), item.get("md5sum")
 
 
 def update_manifest_file(
     path_to_download_manifest: str,
     items_to_append: List[ItemToDownload],
+    compact: bool = False,
 ) -> None:
     """Updates a download manifest file.
 
+    The items are merged into the existing manifest through an index keyed on the file
+    name and md5sum: an item whose key is already in the manifest replaces the existing
+    item in place, while the other items are appended. The updated manifest is sorted by
+    source id and written atomically.
+
     Parameters
     ----------
     path_to_download_manifest: str
         The full path to the download manifest file to update.
     items_to_append: List[ItemToDownload]
         A list of ItemToDownload typed-dictionaries to add to the download manifest file.
+    compact: bool
+        If True, the manifest is serialised without indentation and whitespace. By default
+        is set equal to False.
     """
     with pathlib.Path(path_to_download_manifest).open('r') as infile:
-        existing_manifest = json.load(infile)
-    updated_manifest = existing_manifest.copy()
+        updated_manifest = json.load(infile)
+    item_positions = {
+        get_manifest_item_key(item): position for position, item in enumerate(updated_manifest)
+    }
     for item in items_to_append:
-        if item not in updated_manifest:
+        item_key = get_manifest_item_key(item)
+        position = item_positions.get(item_key)
+        if position is None:
+            item_positions[item_key] = len(updated_manifest)
             updated_manifest.append(item)
+        else:
+            updated_manifest[position] = item
     updated_manifest.sort(key=lambda x: x.get("source_id"))
-    with pathlib.Path(path_to_download_manifest).open('w') as outfile:
-        json.dump(updated_manifest, outfile, indent=2)
+    write_manifest_atomically(updated_manifest, path_to_download_manifest, compact)
 
 
-def generate_manifest_file(download_details: List[DownloadDetails]) -> None:
+def group_items_by_manifest_path(
+    download_details: List[DownloadDetails],
+) -> Dict[str, List[ItemToDownload]]:
+    """Groups the download details by the path of their date-specific download manifest.
+
+    The files are converted into ItemToDownload typed-dictionaries and bucketed by
+    reference date and day directory in a single pass over the download details, keeping
+    their original order within each bucket. The day directory is sliced from the file
+    path string, and the path of the download manifest is generated once for each day
+    directory.
+
+    Parameters
+    ----------
+    download_details: List[DownloadDetails]
+        A list of DownloadDetails named-tuples.
+
+    Returns
+    -------
+    Dict[str, List[ItemToDownload]]
+        A dictionary mapping the path of each date-specific download manifest file to the
+        list of ItemToDownload typed-dictionaries to write to it.
+    """
+    manifest_paths: Dict[Tuple[str, str], str] = {}
+    items_by_manifest_path: Dict[str, List[ItemToDownload]] = {}
+    for file in download_details:
+        item_to_download = download_detail_to_dict(file)
+        directory_key = (
+            item_to_download["reference_date"],
+            item_to_download["file_path"].rsplit("/", 3)[0],
+        )
+        manifest_path = manifest_paths.get(directory_key)
+        if manifest_path is None:
+            manifest_path = generate_date_specific_path(item_to_download)
+            manifest_paths[directory_key] = manifest_path
+        items_by_manifest_path.setdefault(manifest_path, []).append(item_to_download)
+    return items_by_manifest_path
+
+
+def generate_manifest_file(
+    download_details: List[DownloadDetails],
+    max_number_of_workers: Optional[int] = None,
+    compact: bool = False,
+    manifest_store: Optional[ManifestStore] = None,
+    write_json_manifests: bool = True,
+) -> None:
     """Creates and write a date-specific download manifest file.
 
+    The download details are grouped by date-specific download manifest in a single pass,
+    and the manifest files are then written concurrently, each by a worker thread. If a
+    manifest store is passed, the files are also recorded in the store.
+
     Parameters
     ----------
     download_details: List[DownloadDetails]
         A list of DownloadDetails named-tuples
+    max_number_of_workers: Optional[int]
+        The maximum number of manifest files written concurrently. By default is set
+        equal to None, which leaves the choice to concurrent.futures.ThreadPoolExecutor.
+    compact: bool
+        If True, the manifest files are serialised without indentation and whitespace. By
+        default is set equal to False.
+    manifest_store: Optional[ManifestStore]
+        An optional SQLite manifest store where the files are recorded.
+    write_json_manifests: bool
+        If False, the JSON manifest files are not written, and the files are only
+        recorded in the manifest store. By default is set equal to True.
+    """
+    if manifest_store is not None:
+        manifest_store.record_download_details(download_details)
+    if not write_json_manifests:
+        return
+    items_by_manifest_path = group_items_by_manifest_path(download_details)
+    if len(items_by_manifest_path) <= 1:
+        for manifest_path, date_specific_items in items_by_manifest_path.items():
+            write_manifest_to_json(date_specific_items, manifest_path, compact)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_number_of_workers) as executor:
+        list(executor.map(
+            write_manifest_to_json,
+            items_by_manifest_path.values(),
+            items_by_manifest_path.keys(),
+            itertools.repeat(compact),
+        ))
+
+
+def drop_already_downloaded_files(
+    download_details: List[DownloadDetails],
+    checksum_cache: Optional[ChecksumCache] = None,
+    manifest_store: Optional[ManifestStore] = None,
+) -> List[DownloadDetails]:
+    """Drops from the download details the files already available in the local directory.
+
+    The files that already sit at their path with the expected size and md5sum are
+    recorded as verified in the manifest store, if one is passed.
+
+    Parameters
+    ----------
+    download_details: List[DownloadDetails]
+        A list of DownloadDetails named-tuples.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used to avoid calculating the md5sum of unchanged files.
+    manifest_store: Optional[ManifestStore]
+        An optional SQLite manifest store.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        The DownloadDetails named-tuples of the files that still have to be downloaded.
     """
-    unique_dates = {file.reference_date for file in download_details}
-    for date in unique_dates:
-        date_specific_items = filter_date_specific_info(download_details, date)
-        date_specific_path = generate_date_specific_path(date_specific_items[0])
-        write_manifest_to_json(date_specific_items, date_specific_path)
+    files_to_download, existing_files = split_already_downloaded_files(
+        download_details, checksum_cache,
+    )
+    if manifest_store is not None:
+        manifest_store.record_integrity_test_results(existing_files, [])
+    return files_to_download
 
 
 def pre_synchronous_download_processor(
-    discovered_files_info: List[DiscoveredFileInfo],
+    discovered_files_info: Sequence[DiscoveredFileInfo],
     path_to_data_directory: str,
+    manifest_store: Optional[ManifestStore] = None,
+    skip_existing: bool = False,
+    checksum_cache: Optional[ChecksumCache] = None,
 ) -> List[DownloadDetails]:
     """Generates the download manifest for the synchronous download scenario.
 
+    If skip_existing is set, the download manifest file still records all the discovered
+    files, but the files that already sit in the data directory with the expected size and
+    md5sum are not downloaded again.
+
     Parameters
     ----------
-    discovered_files_info: List[DiscoveredFileInfo]
-        A list of DiscoveredFileInfo named-tuples containing the raw download information.
+    discovered_files_info: Sequence[DiscoveredFileInfo]
+        A sequence of DiscoveredFileInfo named-tuples (e.g. a DiscoveredFilesTable)
+        containing the raw download information.
     path_to_data_directory: str
         The full path to the directory where the data has to be written.
+    manifest_store: Optional[ManifestStore]
+        An optional SQLite manifest store where the files to download are recorded.
+    skip_existing: bool
+        If True, the files already available in the data directory are not downloaded.
+        By default is set equal to False.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used with skip_existing to avoid calculating the
+        md5sum of unchanged local files.
 
     Returns
     -------
@@ -380,7 +574,11 @@ def pre_synchronous_download_processor(
         discovered_files_info,
         path_to_data_directory,
     )
-    generate_manifest_file(download_details)
+    generate_manifest_file(download_details, manifest_store=manifest_store)
+    if skip_existing:
+        download_details = drop_already_downloaded_files(
+            download_details, checksum_cache, manifest_store,
+        )
     return download_details
 
 
@@ -677,6 +875,126 @@ def create_list_of_file_specific_partition_download_info(
     ]
 
 
+def calculate_partition_extremities_in_batch(
+    file_sizes: Sequence[int],
+    partition_size_in_bytes: int,
+) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+    """Calculates the extremities of the partitions of multiple files at once.
+
+    The extremities are the same calculated file by file by
+    calculate_list_of_partition_extremities: the n-th partition (counting from zero) of a
+    file starts at n * partition_size + 1 (or at 0 for the first partition) and ends at
+    (n + 1) * partition_size, or at the file size for the last partition. If NumPy is
+    installed, the extremities of all the partitions are computed with array operations,
+    otherwise they are accumulated in array.array objects from arithmetic ranges.
+
+    Parameters
+    ----------
+    file_sizes: Sequence[int]
+        The sizes in Bytes of the files to partition.
+    partition_size_in_bytes: int
+        The size of the partitions in Bytes.
+
+    Returns
+    -------
+    Tuple[Sequence[int], Sequence[int], Sequence[int]]
+        A tuple with the number of partitions of each file, and the lower and upper
+        extremities of all the partitions, listed file after file.
+    """
+    if numpy is not None:
+        sizes = numpy.maximum(numpy.asarray(file_sizes, dtype=numpy.int64), 0)
+        numbers_of_partitions = -(-sizes // partition_size_in_bytes)
+        first_positions = numpy.cumsum(numbers_of_partitions) - numbers_of_partitions
+        total_number_of_partitions = int(numbers_of_partitions.sum())
+        partition_indices = numpy.arange(total_number_of_partitions, dtype=numpy.int64)
+        partition_indices -= numpy.repeat(first_positions, numbers_of_partitions)
+        lower_extremities = (
+            partition_indices * partition_size_in_bytes + (partition_indices > 0)
+        )
+        upper_extremities = numpy.minimum(
+            (partition_indices + 1) * partition_size_in_bytes,
+            numpy.repeat(sizes, numbers_of_partitions),
+        )
+        return (
+            numbers_of_partitions.tolist(),
+            lower_extremities.tolist(),
+            upper_extremities.tolist(),
+        )
+    numbers_of_partitions = array.array("q")
+    lower_extremities = array.array("q")
+    upper_extremities = array.array("q")
+    for size in file_sizes:
+        if size <= 0:
+            numbers_of_partitions.append(0)
+            continue
+        number_of_partitions = -(-size // partition_size_in_bytes)
+        numbers_of_partitions.append(number_of_partitions)
+        lower_extremities.append(0)
+        lower_extremities.extend(range(
+            partition_size_in_bytes + 1,
+            (number_of_partitions - 1) * partition_size_in_bytes + 2,
+            partition_size_in_bytes,
+        ))
+        upper_extremities.extend(range(partition_size_in_bytes, size, partition_size_in_bytes))
+        upper_extremities.append(size)
+    return numbers_of_partitions, lower_extremities, upper_extremities
+
+
+def plan_partitions_download_manifest(
+    files_to_partition: List[DownloadDetails],
+    partition_size_in_mib: float,
+) -> List[PartitionDownloadDetails]:
+    """Plans the download of the partitions of multiple files in a single batch.
+
+    The function returns the same PartitionDownloadDetails named-tuples created file by
+    file by create_list_of_file_specific_partition_download_info, but calculates the
+    extremities of all the partitions at once, and derives the base url and the
+    components of the partition paths once per file instead of once per partition.
+
+    Parameters
+    ----------
+    files_to_partition: List[DownloadDetails]
+        A list of DownloadDetails named-tuples of the files to split in partitions.
+    partition_size_in_mib: float
+        The size of the partitions in MiB.
+
+    Returns
+    -------
+    List[PartitionDownloadDetails]
+        A list of PartitionDownloadDetails named-tuples containing the download information
+        of every partition of the files, listed file after file.
+    """
+    numbers_of_partitions, lower_extremities, upper_extremities = (
+        calculate_partition_extremities_in_batch(
+            [file.size for file in files_to_partition],
+            convert_mib_to_bytes(partition_size_in_mib),
+        )
+    )
+    partitions_download_details = []
+    position = 0
+    for file, number_of_partitions in zip(files_to_partition, numbers_of_partitions):
+        base_url = file.download_url[:-1] if file.download_url.endswith("/") else file.download_url
+        parent_directory = file.file_path.parent
+        partition_name_prefix = f"{file.file_path.stem.split('.')[0]}_"
+        partition_name_suffix = file.file_path.suffixes[0] if number_of_partitions else ""
+        for partition_index in range(1, number_of_partitions + 1):
+            partitions_download_details.append(
+                PartitionDownloadDetails(
+                    parent_file_name=file.file_name,
+                    download_url=(
+                        f"{base_url}?start={lower_extremities[position]}"
+                        f"&end={upper_extremities[position]}"
+                    ),
+                    file_path=parent_directory.joinpath(
+                        f"{partition_name_prefix}{partition_index}{partition_name_suffix}"
+                    ),
+                    partition_index=partition_index,
+                )
+            )
+            position += 1
+    return partitions_download_details
+
+
 def filter_files_to_split(
     whole_files_download_info: List[DownloadDetails],
 ) -> List[DownloadDetails]:
@@ -750,30 +1068,40 @@ def generate_partitions_download_manifest(
         of every partition that has to be downloaded.
     """
     files_to_partition = [file for file in whole_files_download_info if file.is_partitioned is True]
-    files_specific_partitions = [
-        create_list_of_file_specific_partition_download_info(
-            file_specific_info,
-            partition_size_in_mib)
-        for file_specific_info in files_to_partition
-    ]
-    return list(itertools.chain.from_iterable(files_specific_partitions))
+    return plan_partitions_download_manifest(files_to_partition, partition_size_in_mib)
 
 
 def pre_concurrent_download_processor(
-    discovered_files_info: List[DiscoveredFileInfo],
+    discovered_files_info: Sequence[DiscoveredFileInfo],
     path_to_data_directory: str,
     partition_size_in_mib: float = 5.0,
+    manifest_store: Optional[ManifestStore] = None,
+    skip_existing: bool = False,
+    checksum_cache: Optional[ChecksumCache] = None,
 ) -> ConcurrentDownloadManifest:
     """Generates the download manifest for the concurrent download scenario.
 
+    If skip_existing is set, the download manifest file still records all the discovered
+    files, but the files that already sit in the data directory with the expected size and
+    md5sum are left out of the returned download manifest.
+
     Parameters
     ----------
-    discovered_files_info: List[DiscoveredFileInfo]
-        A list of DiscoveredFileInfo named-tuples containing the raw download information.
+    discovered_files_info: Sequence[DiscoveredFileInfo]
+        A sequence of DiscoveredFileInfo named-tuples (e.g. a DiscoveredFilesTable)
+        containing the raw download information.
     path_to_data_directory: str
         The full path to the directory where the data has to be written.
     partition_size_in_mib: float
         The size of the partitions in MiB. By default is set equal to 5.0 MiB.
+    manifest_store: Optional[ManifestStore]
+        An optional SQLite manifest store where the files to download are recorded.
+    skip_existing: bool
+        If True, the files already available in the data directory are not downloaded.
+        By default is set equal to False.
+    checksum_cache: Optional[ChecksumCache]
+        An optional checksum cache, used with skip_existing to avoid calculating the
+        md5sum of unchanged local files.
 
     Returns
     -------
@@ -789,7 +1117,11 @@ def pre_concurrent_download_processor(
         path_to_data_directory,
         partition_size_in_mib,
     )
-    generate_manifest_file(download_details)
+    generate_manifest_file(download_details, manifest_store=manifest_store)
+    if skip_existing:
+        download_details = drop_already_downloaded_files(
+            download_details, checksum_cache, manifest_store,
+        )
     return ConcurrentDownloadManifest(
         files_reference_data=download_details,
         whole_files_to_download=generate_whole_files_download_manifest(download_details),
@@ -798,3 +1130,43 @@ def pre_concurrent_download_processor(
             partition_size_in_mib,
         ),
     )
+
+
+def plan_discovered_file_download(
+    discovered_file_info: DiscoveredFileInfo,
+    path_to_data_directory: str,
+    partition_size_in_mib: float = 5.0,
+) -> Tuple[DownloadDetails, Sequence[Union[DownloadDetails, PartitionDownloadDetails]]]:
+    """Plans the concurrent download of a single discovered file.
+
+    The function applies to a single file the same processing that
+    pre_concurrent_download_processor applies to the whole list of discovered files, so
+    that the files can be planned one at a time as they are discovered by the crawler.
+
+    Parameters
+    ----------
+    discovered_file_info: DiscoveredFileInfo
+        A DiscoveredFileInfo named-tuple containing the raw download information.
+    path_to_data_directory: str
+        The full path to the directory where the data has to be written.
+    partition_size_in_mib: float
+        The size of the partitions in MiB. By default is set equal to 5.0 MiB.
+
+    Returns
+    -------
+    Tuple[DownloadDetails, Sequence[Union[DownloadDetails, PartitionDownloadDetails]]]
+        A tuple containing the DownloadDetails named-tuple of the file, used as a reference
+        for the post-download processes, and the list of the items to download: the file
+        itself if smaller than the multi-part threshold, or its partitions otherwise.
+    """
+    download_details = process_raw_download_info(
+        discovered_file_info,
+        path_to_data_directory,
+        partition_size_in_mib,
+    )
+    if download_details.is_partitioned is True:
+        return download_details, create_list_of_file_specific_partition_download_info(
+            download_details,
+            partition_size_in_mib,
+        )
+    return download_details, [download_details]
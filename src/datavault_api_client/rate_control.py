@@ -0,0 +1,220 @@
+"""Implements the adaptive control of the number of concurrent listing requests.
+
+The retry logic of the sessions created by connectivity.create_session treats all the
+error status codes uniformly and knows nothing about the load of the server. The
+AdaptiveConcurrencyLimiter implemented in this module controls the number of listing
+requests that the concurrent crawlers keep in flight following an additive-increase,
+multiplicative-decrease (AIMD) policy: the limit grows by one request for each window of
+requests completed while the latency stays flat, and is halved when the server responds
+with a 429 (Too Many Requests) or 503 (Service Unavailable) status code or when the
+latency spikes. When the server sends a Retry-After header, no new request is sent until
+the requested delay has elapsed.
+"""
+import datetime
+import email.utils
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+from datavault_api_client.connectivity import create_session
+
+
+RATE_LIMITING_STATUS_CODES = (429, 503)
+
+thread_local = threading.local()
+
+
+class AdaptiveConcurrencyLimiter:
+    """A thread-safe limit on the number of requests in flight, adjusted with AIMD.
+
+    Parameters
+    ----------
+    initial_limit: int
+        The number of requests allowed in flight at the beginning of the crawl. By default
+        is set equal to 4.
+    min_limit: int
+        The lowest number of requests allowed in flight. By default is set equal to 1.
+    max_limit: int
+        The highest number of requests allowed in flight. By default is set equal to 32.
+    backoff_factor: float
+        The factor by which the limit is multiplied when the server is congested. By
+        default is set equal to 0.5.
+    latency_tolerance: float
+        A request is considered a latency spike when its latency is larger than the
+        baseline latency multiplied by this tolerance. By default is set equal to 2.0.
+    latency_smoothing: float
+        The weight of each new latency in the exponential moving average that tracks the
+        baseline latency. By default is set equal to 0.1.
+    clock: Callable[[], float]
+        The monotonic clock used to time the delays. By default is time.monotonic.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        backoff_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_smoothing: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        self.clock = clock
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.resume_at = 0.0
+        self.last_backoff_at: Optional[float] = None
+        self.condition = threading.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self) -> None:
+        """Blocks until a new request can be sent, then accounts for it as in flight."""
+        with self.condition:
+            while True:
+                delay = self.resume_at - self.clock()
+                if delay > 0:
+                    self.condition.wait(delay)
+                elif self.in_flight < self.current_limit:
+                    break
+                else:
+                    self.condition.wait()
+            self.in_flight += 1
+
+    def release(
+        self,
+        latency: float,
+        status_code: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Accounts for a completed request and adjusts the limit accordingly.
+
+        Parameters
+        ----------
+        latency: float
+            The time in seconds that the request took to complete.
+        status_code: Optional[int]
+            The status code of the response, or None if no response was received, which
+            is treated as a sign of congestion.
+        retry_after: Optional[str]
+            The value of the Retry-After header of the response, if any.
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if status_code is None or status_code in RATE_LIMITING_STATUS_CODES:
+                self.back_off()
+                delay = parse_retry_after(retry_after)
+                if delay is not None:
+                    self.resume_at = max(self.resume_at, self.clock() + delay)
+            else:
+                if self.is_latency_spike(latency):
+                    self.back_off()
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.current_limit)
+                self.update_baseline_latency(latency)
+            self.condition.notify_all()
+
+    def is_latency_spike(self, latency: float) -> bool:
+        """Checks whether the latency of a request is a spike over the baseline latency.
+
+        Parameters
+        ----------
+        latency: float
+            The time in seconds that the request took to complete.
+
+        Returns
+        -------
+        bool
+            True if the latency exceeds the baseline latency times the latency tolerance,
+            False otherwise or if no baseline latency is available yet.
+        """
+        if self.baseline_latency is None:
+            return False
+        return latency > self.baseline_latency * self.latency_tolerance
+
+    def back_off(self) -> None:
+        """Multiplicatively decreases the limit.
+
+        The requests in flight when the server becomes congested all complete with a
+        congestion signal, so the limit is decreased at most once per baseline latency.
+        """
+        now = self.clock()
+        backoff_interval = self.baseline_latency or 0.0
+        if self.last_backoff_at is not None and now - self.last_backoff_at < backoff_interval:
+            return
+        self.last_backoff_at = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff_factor)
+
+    def update_baseline_latency(self, latency: float) -> None:
+        """Updates the exponential moving average of the latency.
+
+        Parameters
+        ----------
+        latency: float
+            The time in seconds that the request took to complete.
+        """
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency += self.latency_smoothing * (latency - self.baseline_latency)
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Parses the value of a Retry-After header into a delay in seconds.
+
+    Parameters
+    ----------
+    retry_after: Optional[str]
+        The value of the Retry-After header, either a number of seconds or an HTTP date.
+
+    Returns
+    -------
+    Optional[float]
+        The number of seconds to wait before sending a new request, or None if the header
+        is missing or malformed.
+    """
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def thread_get_rate_controlled_session() -> requests.Session:
+    """Creates a thread-specific session that leaves rate limiting to the crawl.
+
+    The session retries the requests failed with a 401, 500, 502 or 504 status code like
+    the other sessions of the library, but returns the 429 and 503 responses, so that the
+    AdaptiveConcurrencyLimiter can react to them.
+
+    Returns
+    -------
+    requests.Session
+        A requests.Session object.
+    """
+    if not hasattr(thread_local, "session"):
+        thread_local.session = create_session(
+            status_forcelist=(401, 500, 502, 504),
+            respect_retry_after_header=False,
+        )
+    session: requests.Session = thread_local.session
+    return session
@@ -1,12 +1,30 @@
 """Module containing the command line app."""
+import contextlib
+import datetime
 import sys
 import time
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
 import click
 
-from datavault_api_client.crawler import datavault_crawler
+from datavault_api_client.checksum_cache import PersistentChecksumCache
+from datavault_api_client.crawl_checkpoint import CrawlCheckpoint
+from datavault_api_client.data_structures import DiscoveredFileInfo, DownloadDetails
+from datavault_api_client.crawler import (
+    asynchronous_datavault_crawler,
+    columnar_datavault_crawler,
+    concurrent_datavault_crawler,
+    datavault_crawler,
+    get_high_water_mark_from_date,
+    get_selected_file_types,
+    get_selected_source_ids,
+    incremental_datavault_crawler,
+    iter_datavault_crawler,
+)
+from datavault_api_client.discovered_files_table import DiscoveredFilesTable
 from datavault_api_client.downloaders import (
     download_files_concurrently,
+    download_files_pipelined,
     download_files_synchronously,
 )
 import datavault_api_client.helpers
@@ -15,10 +33,15 @@ from datavault_api_client.helpers import (
     calculate_total_download_size,
     validate_credentials,
 )
+from datavault_api_client.high_water_marks import HighWaterMarkStore
+from datavault_api_client.listing_cache import ListingCache
+from datavault_api_client.manifest_store import ManifestStore
 from datavault_api_client.pre_download_processing import (
     pre_concurrent_download_processor,
     pre_synchronous_download_processor,
 )
+from datavault_api_client.rate_control import AdaptiveConcurrencyLimiter
+from datavault_api_client.snapshots import diff_snapshot_files, write_snapshot
 
 
 @click.group()
@@ -65,14 +88,49 @@ def datavault():
         "file at a time will be downloaded."
     ),
 )
+@click.option(
+    "--pipelined",
+    "download_type",
+    flag_value="pipelined",
+    help=(
+        "Influence the type of download executed by the program. If the flag is set to "
+        "'pipelined', the files are downloaded concurrently as soon as they are discovered, "
+        "so that the crawl of the DataVault API overlaps with the download. In this mode "
+        "the files are discovered by the 'sequential' crawler, and the --crawler, "
+        "--adaptive-crawl, --checkpoint-file and --skip-existing options are rejected."
+    ),
+)
+@click.option(
+    "--pipeline-queue-size",
+    type=click.INT,
+    default=100,
+    help=(
+        "Specify the maximum number of files and partitions waiting to be downloaded in "
+        "the pipelined download. When the limit is reached, the crawl is paused until the "
+        "download workers catch up. If omitted, it is set by default to 100."
+    ),
+)
 @click.option(
     "--source",
     "-s",
     type=click.STRING,
-    default=None,
+    multiple=True,
     help=(
         "Select a specific source ID. If set, only the data belonging to the specific "
-        "source id will be downloaded."
+        "source id will be downloaded. The option can be repeated to select multiple "
+        "sources."
+    ),
+)
+@click.option(
+    "--file-type",
+    "-t",
+    "file_types",
+    type=click.STRING,
+    multiple=True,
+    help=(
+        "Select a specific file type (e.g. COREREF, CROSSREF, WATCHLIST, REPLAY). If set, "
+        "only the files of the selected type will be downloaded. The option can be "
+        "repeated to select multiple file types."
     ),
 )
 @click.option(
@@ -107,16 +165,211 @@ def datavault():
         "attempting to download files whose download failed in first place."
     ),
 )
+@click.option(
+    "--crawler",
+    "crawler_type",
+    type=click.Choice(["sequential", "asynchronous", "concurrent"]),
+    default="sequential",
+    help=(
+        "Select the crawler used to discover the files to download. The 'sequential' "
+        "crawler lists one directory at a time, the 'asynchronous' crawler lists multiple "
+        "directories concurrently using asyncio, and the 'concurrent' crawler lists each "
+        "level of the directory tree in parallel using a pool of threads. If omitted, the "
+        "'sequential' crawler is used."
+    ),
+)
+@click.option(
+    "--max-crawl-requests",
+    type=click.INT,
+    default=10,
+    help=(
+        "Specify the maximum number of directory listing requests that the crawler can "
+        "have in flight at the same time. If omitted, it is set by default to 10. This "
+        "option is only used by the 'asynchronous' and 'concurrent' crawlers."
+    ),
+)
+@click.option(
+    "--adaptive-crawl",
+    is_flag=True,
+    default=False,
+    help=(
+        "Adapt the number of directory listing requests in flight to the load of the "
+        "DataVault API: the number grows while the latency stays flat, is halved on 429 "
+        "and 503 responses or latency spikes, and never exceeds --max-crawl-requests. "
+        "Retry-After headers are honoured. This option is only used by the 'asynchronous' "
+        "and 'concurrent' crawlers."
+    ),
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help=(
+        "Specify a directory where the crawler caches the directory listings retrieved "
+        "from the DataVault API. If omitted, no listing is cached."
+    ),
+)
+@click.option(
+    "--cache-ttl",
+    type=click.FLOAT,
+    default=0.0,
+    help=(
+        "Specify the number of seconds after which a cached listing has to be revalidated "
+        "with the DataVault API. If omitted, cached listings are always revalidated unless "
+        "immutable. This option is only used together with --cache-dir."
+    ),
+)
+@click.option(
+    "--cache-immutable-after-days",
+    type=click.INT,
+    default=None,
+    help=(
+        "Specify the number of days after which the listings of a day (and of the months "
+        "and years ending before that day) are considered immutable and are never "
+        "requested again once cached. This option is only used together with --cache-dir."
+    ),
+)
+@click.option(
+    "--from-date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help=(
+        "Select the first reference date (in the YYYY-MM-DD format) of the files to "
+        "download. If set, the crawler does not visit the directories of earlier dates."
+    ),
+)
+@click.option(
+    "--to-date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help=(
+        "Select the last reference date (in the YYYY-MM-DD format) of the files to "
+        "download. If set, the crawler does not visit the directories of later dates."
+    ),
+)
+@click.option(
+    "--checkpoint-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Specify a file where the crawler saves the state of the crawl at regular "
+        "intervals. If the crawl fails, the next invocation with the same endpoint and "
+        "filters resumes the crawl from the saved state. This option is only used by the "
+        "'sequential' crawler."
+    ),
+)
+@click.option(
+    "--checkpoint-interval",
+    type=click.INT,
+    default=100,
+    help=(
+        "Specify the number of directories listed between two consecutive saves of the "
+        "state of the crawl. If omitted, it is set by default to 100. This option is only "
+        "used together with --checkpoint-file."
+    ),
+)
+@click.option(
+    "--snapshot-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Specify a file where to save a snapshot of the files discovered by the crawl. "
+        "Two snapshots can be compared with the 'datavault diff' command."
+    ),
+)
+@click.option(
+    "--high-water-mark-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Specify a file where to store the latest reference date of the files discovered "
+        "for the endpoint, source and file type selection. If set, the next invocation "
+        "with the same selection only crawls the days since that date (see "
+        "--look-back-days)."
+    ),
+)
+@click.option(
+    "--look-back-days",
+    type=click.IntRange(min=0),
+    default=1,
+    help=(
+        "Specify the number of days before the stored high-water mark that are crawled "
+        "again, to discover files published late. If omitted, it is set by default to 1. "
+        "This option is only used together with --high-water-mark-file."
+    ),
+)
+@click.option(
+    "--manifest-db",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Specify a SQLite database where to record, alongside the JSON download manifests, "
+        "the files to download and their download status. The files still missing can "
+        "then be listed with the 'datavault missing' command."
+    ),
+)
+@click.option(
+    "--skip-existing",
+    is_flag=True,
+    default=False,
+    help=(
+        "Skip the download of the files that already sit in the root directory with the "
+        "expected size and md5sum, so that re-running a download only transfers the "
+        "missing files. This option cannot be used with the 'pipelined' download type."
+    ),
+)
+@click.option(
+    "--checksum-cache",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Specify a SQLite database where to cache the md5sum of the local files, keyed on "
+        "their inode, size and modification time. The md5sum of the files that did not "
+        "change is then looked up instead of being calculated again by the data integrity "
+        "test and by --skip-existing."
+    ),
+)
+@click.option(
+    "--direct-partition-writes",
+    is_flag=True,
+    default=False,
+    help=(
+        "Preallocate each partitioned file to its expected size and write each partition "
+        "directly at its offset in the file, instead of writing the partitions to separate "
+        "files and concatenating them. The progress of each file is recorded in a "
+        "'.ranges' file next to it. This option is not used by the 'synchronous' download "
+        "type."
+    ),
+)
 def get(
     datavault_endpoint,
     root_directory,
     username,
     password,
     download_type,
+    pipeline_queue_size,
     source,
+    file_types,
     partition_size,
     num_workers,
     max_download_attempts,
+    crawler_type,
+    max_crawl_requests,
+    adaptive_crawl,
+    cache_dir,
+    cache_ttl,
+    cache_immutable_after_days,
+    from_date,
+    to_date,
+    checkpoint_file,
+    checkpoint_interval,
+    snapshot_file,
+    high_water_mark_file,
+    look_back_days,
+    manifest_db,
+    skip_existing,
+    checksum_cache,
+    direct_partition_writes,
 ):
     """Discovers and downloads files from the DataVault API server.
 
@@ -146,7 +399,174 @@ def get(
     DATAVAULT_ENDPOINT          URL of the DataVault API endpoint to query.
     ROOT_DIRECTORY              Full path to the directory where the data will be downloaded.
     """
+    check_pipelined_download_options(
+        download_type=download_type,
+        crawler_type=crawler_type,
+        adaptive_crawl=adaptive_crawl,
+        checkpoint_file=checkpoint_file,
+        skip_existing=skip_existing,
+    )
     credentials = (username, password)
+    exit_on_invalid_credentials(credentials)
+    source_ids = get_selected_source_ids(source)
+    listing_cache = create_listing_cache(cache_dir, cache_ttl, cache_immutable_after_days)
+    concurrency_limiter = create_concurrency_limiter(adaptive_crawl, max_crawl_requests)
+    crawl_checkpoint = None
+    if checkpoint_file is not None:
+        crawl_checkpoint = CrawlCheckpoint(checkpoint_file, checkpoint_interval)
+    from_date = from_date.date() if from_date is not None else None
+    to_date = to_date.date() if to_date is not None else None
+
+    # The stores are closed on every exit, including the sys.exit calls.
+    with contextlib.ExitStack() as resources:
+        manifest_store = None
+        if manifest_db is not None:
+            manifest_store = resources.enter_context(ManifestStore(manifest_db))
+        persistent_checksum_cache = None
+        if checksum_cache is not None:
+            persistent_checksum_cache = resources.enter_context(
+                PersistentChecksumCache(checksum_cache),
+            )
+        high_water_mark_store = None
+        if high_water_mark_file is not None:
+            high_water_mark_store = HighWaterMarkStore(high_water_mark_file)
+
+        click.echo("Initialising the DataVault Crawler ...")
+        click.echo("Searching for files to download ...")
+        failed_downloads = []
+        if download_type == "pipelined":
+            download_manifest = download_files_pipelined(
+                iter_datavault_crawler(
+                    datavault_endpoint,
+                    credentials,
+                    source_id=source_ids,
+                    listing_cache=listing_cache,
+                    from_date=get_crawl_from_date(
+                        datavault_endpoint=datavault_endpoint,
+                        high_water_mark_store=high_water_mark_store,
+                        look_back_days=look_back_days,
+                        source_ids=source_ids,
+                        file_types=file_types,
+                        from_date=from_date,
+                    ),
+                    to_date=to_date,
+                    file_types=file_types,
+                ),
+                root_directory,
+                credentials,
+                partition_size_in_mib=partition_size,
+                max_number_of_workers=num_workers,
+                max_number_of_download_attempts=max_download_attempts,
+                max_queue_size=pipeline_queue_size,
+                manifest_store=manifest_store,
+                checksum_cache=persistent_checksum_cache,
+                direct_partition_writes=direct_partition_writes,
+                failed_downloads=failed_downloads,
+            )
+            discovered_files_to_download = download_manifest.files_reference_data
+            if snapshot_file is not None:
+                write_snapshot(discovered_files_to_download, snapshot_file)
+        else:
+            discovered_files_to_download = crawl_datavault(
+                datavault_endpoint=datavault_endpoint,
+                credentials=credentials,
+                crawler_type=crawler_type,
+                max_crawl_requests=max_crawl_requests,
+                source_ids=source_ids,
+                file_types=file_types,
+                from_date=from_date,
+                to_date=to_date,
+                listing_cache=listing_cache,
+                concurrency_limiter=concurrency_limiter,
+                crawl_checkpoint=crawl_checkpoint,
+                high_water_mark_store=high_water_mark_store,
+                look_back_days=look_back_days,
+            )
+            report_discovered_files(discovered_files_to_download, snapshot_file)
+            if calculate_number_of_discovered_files(discovered_files_to_download) == 0:
+                sys.exit("Process finished with exit code 0")
+            failed_downloads = download_discovered_files(
+                discovered_files=discovered_files_to_download,
+                root_directory=root_directory,
+                credentials=credentials,
+                download_type=download_type,
+                partition_size=partition_size,
+                num_workers=num_workers,
+                max_download_attempts=max_download_attempts,
+                manifest_store=manifest_store,
+                checksum_cache=persistent_checksum_cache,
+                skip_existing=skip_existing,
+                direct_partition_writes=direct_partition_writes,
+            )
+        if high_water_mark_store is not None:
+            advance_high_water_mark(
+                high_water_mark_store=high_water_mark_store,
+                datavault_endpoint=datavault_endpoint,
+                discovered_files=discovered_files_to_download,
+                failed_downloads=failed_downloads,
+                source_ids=source_ids,
+                file_types=file_types,
+            )
+        sys.exit("Process finished with exit code 0")
+
+
+def check_pipelined_download_options(
+    download_type: str,
+    crawler_type: str,
+    adaptive_crawl: bool,
+    checkpoint_file: Optional[str],
+    skip_existing: bool,
+) -> None:
+    """Rejects the options that the pipelined download does not support.
+
+    The pipelined download discovers the files with the sequential iter_datavault_crawler,
+    which has neither checkpoints nor an adaptive concurrency, and queues each discovered
+    file without looking for a local copy.
+
+    Parameters
+    ----------
+    download_type: str
+        One of "synchronous", "concurrent" and "pipelined".
+    crawler_type: str
+        One of "sequential", "asynchronous" and "concurrent".
+    adaptive_crawl: bool
+        Whether the number of concurrent crawl requests is adapted to the server.
+    checkpoint_file: Optional[str]
+        The optional file where the state of the crawl is saved.
+    skip_existing: bool
+        Whether the files already available in the data directory are skipped.
+
+    Raises
+    ------
+    click.UsageError
+        If the download type is "pipelined" and any of the unsupported options is set.
+    """
+    if download_type != "pipelined":
+        return
+    unsupported_options = [
+        option
+        for option, is_set in (
+            (f"--crawler {crawler_type}", crawler_type != "sequential"),
+            ("--adaptive-crawl", adaptive_crawl),
+            ("--checkpoint-file", checkpoint_file is not None),
+            ("--skip-existing", skip_existing),
+        )
+        if is_set
+    ]
+    if unsupported_options:
+        raise click.UsageError(
+            f"{', '.join(unsupported_options)} cannot be used with --pipelined."
+        )
+
+
+def exit_on_invalid_credentials(credentials: Tuple[str, str]) -> None:
+    """Exits the command line app if the credentials are missing or not strings.
+
+    Parameters
+    ----------
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    """
     try:
         validate_credentials(credentials)
     except datavault_api_client.helpers.MissingOnyxCredentialsError as missing_credentials_error:
@@ -156,50 +576,462 @@ def get(
         click.echo(repr(invalid_type_error))
         sys.exit("Process finished with exit code 1")
 
-    click.echo("Initialising the DataVault Crawler ...")
-    click.echo("Searching for files to download ...")
-    discovered_files_to_download = datavault_crawler(
-        datavault_endpoint,
-        credentials,
-        source_id=source,
+
+def create_listing_cache(
+    cache_dir: Optional[str],
+    cache_ttl: float,
+    cache_immutable_after_days: int,
+) -> Optional[ListingCache]:
+    """Creates the cache of the directory listings, if a cache directory is set.
+
+    Parameters
+    ----------
+    cache_dir: Optional[str]
+        The directory where the listings are cached, or None to disable the cache.
+    cache_ttl: float
+        The time-to-live in seconds of the cached listings.
+    cache_immutable_after_days: int
+        The age in days after which the listings of a day are cached without expiry.
+
+    Returns
+    -------
+    Optional[ListingCache]
+        The listing cache, or None if no cache directory is set.
+    """
+    if cache_dir is None:
+        return None
+    return ListingCache(
+        cache_dir,
+        default_ttl=cache_ttl,
+        immutable_after_days=cache_immutable_after_days,
     )
-    click.echo(
-        f"Discovered {calculate_number_of_discovered_files(discovered_files_to_download)} "
-        f"file(s) to download."
+
+
+def create_concurrency_limiter(
+    adaptive_crawl: bool,
+    max_crawl_requests: int,
+) -> Optional[AdaptiveConcurrencyLimiter]:
+    """Creates the adaptive limiter of the concurrent crawl requests, if enabled.
+
+    Parameters
+    ----------
+    adaptive_crawl: bool
+        Whether the number of concurrent crawl requests is adapted to the server.
+    max_crawl_requests: int
+        The maximum number of concurrent crawl requests.
+
+    Returns
+    -------
+    Optional[AdaptiveConcurrencyLimiter]
+        The concurrency limiter, or None if the adaptive crawl is disabled.
+    """
+    if not adaptive_crawl:
+        return None
+    return AdaptiveConcurrencyLimiter(
+        initial_limit=min(4, max_crawl_requests),
+        max_limit=max_crawl_requests,
     )
-    click.echo(
-        f"Total download size: {calculate_total_download_size(discovered_files_to_download)}"
+
+
+def get_crawl_from_date(
+    datavault_endpoint: str,
+    high_water_mark_store: Optional[HighWaterMarkStore],
+    look_back_days: int,
+    source_ids: Optional[FrozenSet[int]],
+    file_types: Optional[Iterable[str]],
+    from_date: Optional[datetime.date],
+) -> Optional[datetime.date]:
+    """Returns the first reference date of a crawl, incremental if a store is set.
+
+    Parameters
+    ----------
+    datavault_endpoint: str
+        The url of the DataVault API endpoint to crawl.
+    high_water_mark_store: Optional[HighWaterMarkStore]
+        The optional store of the high-water marks of the previous crawls.
+    look_back_days: int
+        The number of days before the high-water mark that are crawled again.
+    source_ids: Optional[FrozenSet[int]]
+        The optional source ids selected for the crawl.
+    file_types: Optional[Iterable[str]]
+        The optional file types selected for the crawl.
+    from_date: Optional[datetime.date]
+        The optional first reference date requested for the crawl.
+
+    Returns
+    -------
+    Optional[datetime.date]
+        The first reference date of the crawl.
+    """
+    if high_water_mark_store is None:
+        return from_date
+    return get_high_water_mark_from_date(
+        datavault_endpoint,
+        high_water_mark_store,
+        look_back_days=look_back_days,
+        source_id=source_ids,
+        file_types=file_types,
+        from_date=from_date,
     )
-    time.sleep(2)
 
-    if calculate_number_of_discovered_files(discovered_files_to_download) == 0:
-        sys.exit("Process finished with exit code 0")
-    else:
-        if download_type == "synchronous":
-            download_manifest = pre_synchronous_download_processor(
-                discovered_files_to_download,
-                root_directory,
+
+def crawl_datavault(
+    datavault_endpoint: str,
+    credentials: Tuple[str, str],
+    crawler_type: str,
+    max_crawl_requests: int,
+    source_ids: Optional[FrozenSet[int]],
+    file_types: Optional[Iterable[str]],
+    from_date: Optional[datetime.date],
+    to_date: Optional[datetime.date],
+    listing_cache: Optional[ListingCache],
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter],
+    crawl_checkpoint: Optional[CrawlCheckpoint],
+    high_water_mark_store: Optional[HighWaterMarkStore],
+    look_back_days: int,
+) -> DiscoveredFilesTable:
+    """Discovers the files to download with the selected crawler.
+
+    The asynchronous and the concurrent crawlers start from the incremental from-date of
+    the high-water mark store, if any, while the sequential crawl goes through
+    incremental_datavault_crawler. The high-water mark is not advanced: it is advanced by
+    the caller once the files are downloaded.
+
+    Parameters
+    ----------
+    datavault_endpoint: str
+        The url of the DataVault API endpoint to crawl.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    crawler_type: str
+        One of "sequential", "asynchronous" and "concurrent".
+    max_crawl_requests: int
+        The maximum number of concurrent crawl requests.
+    source_ids: Optional[FrozenSet[int]]
+        The optional source ids selected for the crawl.
+    file_types: Optional[Iterable[str]]
+        The optional file types selected for the crawl.
+    from_date: Optional[datetime.date]
+        The optional first reference date requested for the crawl.
+    to_date: Optional[datetime.date]
+        The optional last reference date requested for the crawl.
+    listing_cache: Optional[ListingCache]
+        The optional cache of the directory listings.
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
+        The optional adaptive limiter of the concurrent crawl requests.
+    crawl_checkpoint: Optional[CrawlCheckpoint]
+        The optional checkpoint of the sequential crawl.
+    high_water_mark_store: Optional[HighWaterMarkStore]
+        The optional store of the high-water marks of the previous crawls.
+    look_back_days: int
+        The number of days before the high-water mark that are crawled again.
+
+    Returns
+    -------
+    DiscoveredFilesTable
+        The files discovered by the crawl.
+    """
+    if crawler_type in ("asynchronous", "concurrent"):
+        crawl_from_date = get_crawl_from_date(
+            datavault_endpoint=datavault_endpoint,
+            high_water_mark_store=high_water_mark_store,
+            look_back_days=look_back_days,
+            source_ids=source_ids,
+            file_types=file_types,
+            from_date=from_date,
+        )
+        if crawler_type == "concurrent":
+            return DiscoveredFilesTable(
+                concurrent_datavault_crawler(
+                    datavault_endpoint,
+                    credentials,
+                    source_id=source_ids,
+                    max_number_of_workers=max_crawl_requests,
+                    listing_cache=listing_cache,
+                    from_date=crawl_from_date,
+                    to_date=to_date,
+                    file_types=file_types,
+                    concurrency_limiter=concurrency_limiter,
+                )
             )
-            click.echo("Initialising download ...")
-            download_files_synchronously(
-                download_manifest,
+        return DiscoveredFilesTable(
+            asynchronous_datavault_crawler(
+                datavault_endpoint,
                 credentials,
-                max_number_of_download_attempts=max_download_attempts,
+                source_id=source_ids,
+                max_concurrent_requests=max_crawl_requests,
+                listing_cache=listing_cache,
+                from_date=crawl_from_date,
+                to_date=to_date,
+                file_types=file_types,
+                concurrency_limiter=concurrency_limiter,
             )
-        else:
-            download_manifest = pre_concurrent_download_processor(
-                discovered_files_to_download,
-                path_to_data_directory=root_directory,
-                partition_size_in_mib=partition_size,
+        )
+    if high_water_mark_store is not None:
+        return DiscoveredFilesTable(
+            incremental_datavault_crawler(
+                datavault_endpoint,
+                credentials,
+                high_water_mark_store,
+                look_back_days,
+                source_id=source_ids,
+                listing_cache=listing_cache,
+                from_date=from_date,
+                to_date=to_date,
+                file_types=file_types,
+                crawl_checkpoint=crawl_checkpoint,
+                advance_high_water_mark=False,
             )
-            click.echo("Initialising download ...")
-            download_files_concurrently(
-                download_manifest,
+        )
+    if crawl_checkpoint is not None:
+        return DiscoveredFilesTable(
+            datavault_crawler(
+                datavault_endpoint,
                 credentials,
-                max_number_of_workers=num_workers,
-                max_number_of_download_attempts=max_download_attempts,
+                source_id=source_ids,
+                listing_cache=listing_cache,
+                from_date=from_date,
+                to_date=to_date,
+                file_types=file_types,
+                crawl_checkpoint=crawl_checkpoint,
             )
-        sys.exit("Process finished with exit code 0")
+        )
+    return columnar_datavault_crawler(
+        datavault_endpoint,
+        credentials,
+        source_id=source_ids,
+        listing_cache=listing_cache,
+        from_date=from_date,
+        to_date=to_date,
+        file_types=file_types,
+    )
+
+
+def report_discovered_files(
+    discovered_files: DiscoveredFilesTable,
+    snapshot_file: Optional[str],
+) -> None:
+    """Reports the number and the total size of the discovered files, and saves a snapshot.
+
+    Parameters
+    ----------
+    discovered_files: DiscoveredFilesTable
+        The files discovered by the crawl.
+    snapshot_file: Optional[str]
+        The optional file where the snapshot of the discovered files is saved.
+    """
+    click.echo(
+        f"Discovered {calculate_number_of_discovered_files(discovered_files)} "
+        f"file(s) to download."
+    )
+    if snapshot_file is not None:
+        write_snapshot(discovered_files, snapshot_file)
+    click.echo(f"Total download size: {calculate_total_download_size(discovered_files)}")
+    time.sleep(2)
+
+
+def download_discovered_files(
+    discovered_files: DiscoveredFilesTable,
+    root_directory: str,
+    credentials: Tuple[str, str],
+    download_type: str,
+    partition_size: float,
+    num_workers: Optional[int],
+    max_download_attempts: int,
+    manifest_store: Optional[ManifestStore],
+    checksum_cache: Optional[PersistentChecksumCache],
+    skip_existing: bool,
+    direct_partition_writes: bool,
+) -> List[DownloadDetails]:
+    """Generates the download manifest of the discovered files and downloads them.
+
+    Parameters
+    ----------
+    discovered_files: DiscoveredFilesTable
+        The files discovered by the crawl.
+    root_directory: str
+        The full path to the directory where the data is downloaded.
+    credentials: Tuple[str, str]
+        A tuple containing the username and password used to access the DataVault API.
+    download_type: str
+        Either "synchronous" or "concurrent".
+    partition_size: float
+        The size of the partitions in MiB of the concurrent download.
+    num_workers: Optional[int]
+        The number of workers of the concurrent download.
+    max_download_attempts: int
+        The maximum number of download attempts of the files whose download failed.
+    manifest_store: Optional[ManifestStore]
+        The optional SQLite manifest store.
+    checksum_cache: Optional[PersistentChecksumCache]
+        The optional persistent checksum cache.
+    skip_existing: bool
+        Whether the files already available in the data directory are skipped.
+    direct_partition_writes: bool
+        Whether the partitions are written at their offset in their parent file.
+
+    Returns
+    -------
+    List[DownloadDetails]
+        The files whose download still failed after the last download attempt.
+    """
+    if download_type == "synchronous":
+        synchronous_download_manifest = pre_synchronous_download_processor(
+            discovered_files,
+            root_directory,
+            manifest_store=manifest_store,
+            skip_existing=skip_existing,
+            checksum_cache=checksum_cache,
+        )
+        click.echo("Initialising download ...")
+        return download_files_synchronously(
+            synchronous_download_manifest,
+            credentials,
+            max_number_of_download_attempts=max_download_attempts,
+            manifest_store=manifest_store,
+            checksum_cache=checksum_cache,
+        )
+    download_manifest = pre_concurrent_download_processor(
+        discovered_files,
+        path_to_data_directory=root_directory,
+        partition_size_in_mib=partition_size,
+        manifest_store=manifest_store,
+        skip_existing=skip_existing,
+        checksum_cache=checksum_cache,
+    )
+    click.echo("Initialising download ...")
+    return download_files_concurrently(
+        download_manifest,
+        credentials,
+        max_number_of_workers=num_workers,
+        max_number_of_download_attempts=max_download_attempts,
+        manifest_store=manifest_store,
+        checksum_cache=checksum_cache,
+        direct_partition_writes=direct_partition_writes,
+    )
+
+
+def advance_high_water_mark(
+    high_water_mark_store: HighWaterMarkStore,
+    datavault_endpoint: str,
+    discovered_files: Sequence[DiscoveredFileInfo],
+    failed_downloads: Sequence[DownloadDetails],
+    source_ids: Optional[FrozenSet[int]],
+    file_types: Optional[Iterable[str]],
+) -> None:
+    """Advances the high-water mark of a crawl up to the last fully downloaded day.
+
+    If some downloads failed, the high-water mark is only advanced with the files whose
+    reference date precedes the earliest reference date of the failed downloads, so that
+    the next incremental crawl discovers the failed files again.
+
+    Parameters
+    ----------
+    high_water_mark_store: HighWaterMarkStore
+        The store of the high-water marks of the crawls.
+    datavault_endpoint: str
+        The url of the crawled DataVault API endpoint.
+    discovered_files: Sequence[DiscoveredFileInfo]
+        The files discovered by the crawl.
+    failed_downloads: Sequence[DownloadDetails]
+        The files whose download still failed after the last download attempt.
+    source_ids: Optional[FrozenSet[int]]
+        The optional source ids selected for the crawl.
+    file_types: Optional[Iterable[str]]
+        The optional file types selected for the crawl.
+    """
+    downloaded_files: Iterable[DiscoveredFileInfo] = discovered_files
+    if failed_downloads:
+        earliest_failed_date = min(file.reference_date for file in failed_downloads)
+        click.echo(
+            f"The high-water mark is kept before {earliest_failed_date.date()}, "
+            f"since {len(failed_downloads)} file(s) failed to download."
+        )
+        downloaded_files = (
+            file for file in discovered_files if file.reference_date < earliest_failed_date
+        )
+    high_water_mark_store.update(
+        datavault_endpoint,
+        downloaded_files,
+        source_ids,
+        get_selected_file_types(file_types),
+    )
+
+
+@datavault.command(name="diff")
+@click.argument("old_snapshot", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new_snapshot", type=click.Path(exists=True, dir_okay=False))
+def diff(old_snapshot, new_snapshot):
+    """Reports the differences between two snapshots of the discovered files.
+
+    This command compares two snapshot files saved by 'datavault get' with the
+    --snapshot-file option, and lists the download urls of the files that were added (+),
+    removed (-) or changed (~, when the md5sum or the size differ) in the new snapshot.
+
+    \b
+    Positional arguments:
+    \b
+    OLD_SNAPSHOT                Full path to the old snapshot file.
+    NEW_SNAPSHOT                Full path to the new snapshot file.
+    """
+    try:
+        snapshot_diff = diff_snapshot_files(old_snapshot, new_snapshot)
+    except ValueError as snapshot_error:
+        click.echo(repr(snapshot_error))
+        sys.exit("Process finished with exit code 1")
+    for symbol, files in zip("+-~", snapshot_diff):
+        for file in files:
+            click.echo(f"{symbol} {file.download_url}")
+    click.echo(
+        f"{len(snapshot_diff.added)} added, {len(snapshot_diff.removed)} removed, "
+        f"{len(snapshot_diff.changed)} changed."
+    )
+
+
+@datavault.command(name="missing")
+@click.argument("manifest_db", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--source",
+    "-s",
+    type=click.INT,
+    default=None,
+    help="Select the source ID of the files to list.",
+)
+@click.option(
+    "--from-date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Select the first reference date (in the YYYY-MM-DD format) of the files to list.",
+)
+@click.option(
+    "--to-date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Select the last reference date (in the YYYY-MM-DD format) of the files to list.",
+)
+def missing(manifest_db, source, from_date, to_date):
+    """Lists the files recorded in a manifest database that were not verified yet.
+
+    This command queries the SQLite database written by 'datavault get' with the
+    --manifest-db option, and lists the status (pending or failed), the reference date
+    and the path of each file that has not passed the data integrity test yet.
+
+    \b
+    Positional arguments:
+    \b
+    MANIFEST_DB                 Full path to the SQLite manifest database.
+    """
+    with ManifestStore(manifest_db) as manifest_store:
+        missing_files = manifest_store.get_missing_files(
+            source_id=source,
+            from_date=from_date.date() if from_date is not None else None,
+            to_date=to_date.date() if to_date is not None else None,
+        )
+    for file in missing_files:
+        click.echo(
+            f"{file.status:<8} {file.reference_date:%Y-%m-%d} {file.file_path.as_posix()}"
+        )
+    click.echo(f"{len(missing_files)} file(s) missing.")
 
 
 if __name__ == "__main__":
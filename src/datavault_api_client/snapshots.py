@@ -0,0 +1,187 @@
+"""Implements the snapshots of the files discovered by a crawl and their comparison.
+
+A snapshot is a compact JSON file recording, for each file discovered by a crawl, the
+fields of its DiscoveredFileInfo named-tuple (file name, download url, source id,
+reference date, size and md5sum). Comparing the snapshots of two crawls of the same
+endpoint returns the files that were added, removed or changed in between, so that the
+downstream processes can react only to the delta, without verifying the whole local
+directory tree again.
+"""
+import functools
+import json
+import pathlib
+from typing import Iterable, List, Union
+
+from datavault_api_client.data_structures import (
+    DiscoveredFileInfo,
+    DownloadDetails,
+    SnapshotDiff,
+)
+from datavault_api_client.helpers import parse_compact_date, write_file_atomically
+
+
+SNAPSHOT_VERSION = 1
+
+# A snapshot record lists the file name, download url, source id, reference date (in the
+# YYYYMMDD format), size and md5sum of a file.
+SnapshotRecord = List[Union[str, int]]
+
+
+def convert_file_to_record(file: Union[DiscoveredFileInfo, DownloadDetails]) -> SnapshotRecord:
+    """Converts the details of a discovered file into a compact snapshot record.
+
+    Parameters
+    ----------
+    file: Union[DiscoveredFileInfo, DownloadDetails]
+        A DiscoveredFileInfo or DownloadDetails named-tuple.
+
+    Returns
+    -------
+    SnapshotRecord
+        A list with the file name, download url, source id, reference date (in the
+        YYYYMMDD format), size and md5sum of the file.
+    """
+    return [
+        file.file_name,
+        file.download_url,
+        file.source_id,
+        file.reference_date.strftime("%Y%m%d"),
+        file.size,
+        file.md5sum,
+    ]
+
+
+def convert_record_to_file(record: SnapshotRecord) -> DiscoveredFileInfo:
+    """Converts a snapshot record into a DiscoveredFileInfo named-tuple.
+
+    Parameters
+    ----------
+    record: SnapshotRecord
+        A snapshot record, as created by convert_file_to_record.
+
+    Returns
+    -------
+    DiscoveredFileInfo
+        The DiscoveredFileInfo named-tuple of the recorded file.
+    """
+    file_name, download_url, source_id, reference_date, size, md5sum = record
+    return DiscoveredFileInfo(
+        file_name=str(file_name),
+        download_url=str(download_url),
+        source_id=int(source_id),
+        reference_date=parse_compact_date(str(reference_date)),
+        size=int(size),
+        md5sum=str(md5sum),
+    )
+
+
+def write_snapshot(
+    discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]],
+    path_to_snapshot: str,
+) -> None:
+    """Atomically writes the snapshot of the files discovered by a crawl.
+
+    The records are sorted by download url, so that the snapshots of identical crawls are
+    identical files.
+
+    Parameters
+    ----------
+    discovered_files: Iterable[Union[DiscoveredFileInfo, DownloadDetails]]
+        The DiscoveredFileInfo (or DownloadDetails) named-tuples of the discovered files.
+    path_to_snapshot: str
+        The full path to the snapshot file. Its parent directory is created if it does
+        not exist.
+    """
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "files": sorted(
+            (convert_file_to_record(file) for file in discovered_files),
+            key=lambda record: record[1],
+        ),
+    }
+    parent_directory = pathlib.Path(path_to_snapshot).parent
+    parent_directory.mkdir(parents=True, exist_ok=True)
+    write_file_atomically(
+        path_to_snapshot, functools.partial(json.dump, snapshot, separators=(",", ":")),
+    )
+
+
+def read_snapshot(path_to_snapshot: str) -> List[DiscoveredFileInfo]:
+    """Reads the files recorded in a snapshot.
+
+    Parameters
+    ----------
+    path_to_snapshot: str
+        The full path to the snapshot file.
+
+    Returns
+    -------
+    List[DiscoveredFileInfo]
+        The DiscoveredFileInfo named-tuples of the recorded files.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a snapshot of a supported version.
+    """
+    with open(path_to_snapshot, "r") as infile:
+        snapshot = json.load(infile)
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path_to_snapshot} is not a supported crawl snapshot.")
+    return [convert_record_to_file(record) for record in snapshot["files"]]
+
+
+def diff_snapshots(
+    old_files: Iterable[DiscoveredFileInfo],
+    new_files: Iterable[DiscoveredFileInfo],
+) -> SnapshotDiff:
+    """Compares the files recorded in two snapshots.
+
+    The files are matched by download url. A file found in both snapshots is considered
+    changed if its md5sum or its size differ.
+
+    Parameters
+    ----------
+    old_files: Iterable[DiscoveredFileInfo]
+        The files recorded in the old snapshot.
+    new_files: Iterable[DiscoveredFileInfo]
+        The files recorded in the new snapshot.
+
+    Returns
+    -------
+    SnapshotDiff
+        A SnapshotDiff named-tuple with the added, removed and changed files, each sorted
+        by download url.
+    """
+    old_files_by_url = {file.download_url: file for file in old_files}
+    new_files_by_url = {file.download_url: file for file in new_files}
+    added = [
+        new_files_by_url[url] for url in sorted(new_files_by_url.keys() - old_files_by_url.keys())
+    ]
+    removed = [
+        old_files_by_url[url] for url in sorted(old_files_by_url.keys() - new_files_by_url.keys())
+    ]
+    changed = []
+    for url in sorted(new_files_by_url.keys() & old_files_by_url.keys()):
+        new_file, old_file = new_files_by_url[url], old_files_by_url[url]
+        if (new_file.md5sum, new_file.size) != (old_file.md5sum, old_file.size):
+            changed.append(new_file)
+    return SnapshotDiff(added=added, removed=removed, changed=changed)
+
+
+def diff_snapshot_files(path_to_old_snapshot: str, path_to_new_snapshot: str) -> SnapshotDiff:
+    """Compares the files recorded in two snapshot files.
+
+    Parameters
+    ----------
+    path_to_old_snapshot: str
+        The full path to the old snapshot file.
+    path_to_new_snapshot: str
+        The full path to the new snapshot file.
+
+    Returns
+    -------
+    SnapshotDiff
+        A SnapshotDiff named-tuple with the added, removed and changed files.
+    """
+    return diff_snapshots(read_snapshot(path_to_old_snapshot), read_snapshot(path_to_new_snapshot))
@@ -0,0 +1,90 @@
+import datetime
+import hashlib
+import os
+
+from datavault_api_client import data_integrity
+from datavault_api_client.checksum_cache import PersistentChecksumCache
+from datavault_api_client.data_structures import DownloadDetails
+
+
+class TestPersistentChecksumCache:
+    def test_entries_persist_across_instances(self, tmp_path):
+        # Setup
+        path_to_database = tmp_path.joinpath("cache", "checksums.db").as_posix()
+        # Exercise
+        with PersistentChecksumCache(path_to_database, batch_size=2) as checksum_cache:
+            checksum_cache[(1, 10, 100)] = "a" * 32
+            checksum_cache[(2, 20, 200)] = "b" * 32
+            checksum_cache[(3, 30, 300)] = "c" * 32
+            pending_lookup = checksum_cache.get((3, 30, 300))
+        # Verify
+        with PersistentChecksumCache(path_to_database) as checksum_cache:
+            assert len(checksum_cache) == 3
+            assert checksum_cache[(2, 20, 200)] == "b" * 32
+            assert checksum_cache.get((2, 20, 201)) is None
+            assert set(checksum_cache) == {(1, 10, 100), (2, 20, 200), (3, 30, 300)}
+        assert pending_lookup == "c" * 32
+        # Cleanup - none
+
+    def test_deletion_of_entries(self, tmp_path):
+        # Setup
+        path_to_database = tmp_path.joinpath("checksums.db").as_posix()
+        with PersistentChecksumCache(path_to_database) as checksum_cache:
+            checksum_cache[(1, 10, 100)] = "a" * 32
+            checksum_cache.flush()
+            checksum_cache[(2, 20, 200)] = "b" * 32
+            # Exercise
+            del checksum_cache[(1, 10, 100)]
+            del checksum_cache[(2, 20, 200)]
+            # Verify
+            assert len(checksum_cache) == 0
+        # Cleanup - none
+
+
+class TestDataIntegrityTestWithChecksumCache:
+    def test_unchanged_files_are_not_hashed_again(self, monkeypatch, tmp_path):
+        # Setup
+        content = b"coreref content"
+        file_path = tmp_path.joinpath("COREREF_207_20200717.txt.bz2")
+        file_path.write_bytes(content)
+        file_download_details = DownloadDetails(
+            file_name=file_path.name,
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+                "20200717-S207_CORE_ALL_0_0"
+            ),
+            file_path=file_path,
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=len(content),
+            md5sum=hashlib.md5(content).hexdigest(),
+            is_partitioned=False,
+        )
+        path_to_database = tmp_path.joinpath("checksums.db").as_posix()
+        with PersistentChecksumCache(path_to_database) as checksum_cache:
+            data_integrity.get_list_of_failed_downloads([file_download_details], checksum_cache)
+        hashed_files = []
+        calculate_checksum = data_integrity.calculate_checksum
+        monkeypatch.setattr(
+            data_integrity,
+            "calculate_checksum",
+            lambda path_to_file: hashed_files.append(path_to_file) or calculate_checksum(
+                path_to_file,
+            ),
+        )
+        # Exercise
+        with PersistentChecksumCache(path_to_database) as checksum_cache:
+            unchanged_file_failures = data_integrity.get_list_of_failed_downloads(
+                [file_download_details], checksum_cache,
+            )
+            file_path.write_bytes(content.upper())
+            file_status = file_path.stat()
+            os.utime(file_path, ns=(file_status.st_atime_ns, file_status.st_mtime_ns + 1000))
+            modified_file_failures = data_integrity.get_list_of_failed_downloads(
+                [file_download_details], checksum_cache,
+            )
+        # Verify
+        assert unchanged_file_failures == []
+        assert modified_file_failures == [file_download_details]
+        assert hashed_files == [file_path]
+        # Cleanup - none
@@ -0,0 +1,192 @@
+import datetime
+
+import pytest
+import requests
+
+from datavault_api_client import crawler
+from datavault_api_client.crawl_checkpoint import CrawlCheckpoint, get_crawl_parameters
+from datavault_api_client.data_structures import CrawlState, DiscoveredFileInfo
+
+
+class TestCrawlCheckpoint:
+    def test_saving_and_loading_of_crawl_state(self, tmp_path):
+        # Setup
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        parameters = get_crawl_parameters({207}, None, datetime.date(2020, 7, 1), None)
+        crawl_state = CrawlState(
+            url=url,
+            parameters=parameters,
+            stack=[{'name': '2020', 'url': '/v2/list/2020', 'directory': True}],
+            visited_nodes={url},
+            leaf_nodes=[
+                DiscoveredFileInfo(
+                    file_name="COREREF_207_20200716.txt.bz2",
+                    download_url=(
+                        "https://api.icedatavault.icedataservices.com/v2/data/2020/07/16/S207/"
+                        "CORE/20200716-S207_CORE_ALL_0_0"
+                    ),
+                    source_id=207,
+                    reference_date=datetime.datetime(2020, 7, 16),
+                    size=4590,
+                    md5sum="ab1e72a1bb5ef4e3a9b2e0c8a8d3f4a2",
+                ),
+            ],
+        )
+        # Exercise
+        crawl_checkpoint.save(crawl_state)
+        loaded_crawl_state = crawl_checkpoint.load(url, parameters)
+        # Verify
+        assert loaded_crawl_state == crawl_state
+        # Cleanup - none
+
+    def test_saving_appends_only_new_records_to_journal(self, tmp_path):
+        # Setup
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        crawl_state = CrawlState(url, get_crawl_parameters(), [], {url}, [])
+        crawl_checkpoint.save(crawl_state)
+        path_to_journal = tmp_path.joinpath("crawl.json.journal")
+        journal_content = path_to_journal.read_bytes()
+        # Exercise
+        crawl_state.visited_nodes.add(f"{url}/2020")
+        crawl_state.stack.append({'name': '01', 'url': '/v2/list/2020/01', 'directory': True})
+        crawl_checkpoint.save(crawl_state)
+        # Verify
+        assert path_to_journal.read_bytes() == (
+            journal_content + b'{"visited_node": "' + f"{url}/2020".encode() + b'"}\n'
+        )
+        assert CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix()).load(
+            url, get_crawl_parameters(),
+        ) == crawl_state
+        # Cleanup - none
+
+    def test_records_of_interrupted_save_are_ignored(self, tmp_path):
+        # Setup
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        crawl_state = CrawlState(url, get_crawl_parameters(), [], {url}, [])
+        crawl_checkpoint.save(crawl_state)
+        with tmp_path.joinpath("crawl.json.journal").open("a") as journal:
+            journal.write('{"visited_node": "' + url + '/2020"}\n{"visited')
+        # Exercise
+        loaded_crawl_state = crawl_checkpoint.load(url, get_crawl_parameters())
+        crawl_checkpoint.save(loaded_crawl_state)
+        # Verify
+        assert loaded_crawl_state == crawl_state
+        assert crawl_checkpoint.load(url, get_crawl_parameters()) == crawl_state
+        # Cleanup - none
+
+    def test_loading_of_crawl_state_with_different_parameters(self, tmp_path):
+        # Setup
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        crawl_checkpoint.save(
+            CrawlState(url, get_crawl_parameters({207}), [], {url}, []),
+        )
+        # Exercise
+        loaded_crawl_state = crawl_checkpoint.load(url, get_crawl_parameters({367}))
+        # Verify
+        assert loaded_crawl_state is None
+        # Cleanup - none
+
+    def test_loading_of_missing_crawl_state(self, tmp_path):
+        # Setup
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        # Exercise
+        loaded_crawl_state = crawl_checkpoint.load(
+            "https://api.icedatavault.icedataservices.com/v2/list", get_crawl_parameters(),
+        )
+        # Verify
+        assert loaded_crawl_state is None
+        # Cleanup - none
+
+
+class TestCrawlerWithCrawlCheckpoint:
+    def test_crawler_resumes_from_checkpoint(
+        self,
+        tmp_path,
+        mocked_response,
+        mocked_datavault_api_single_source_single_day,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        number_of_requests = len(mocked_response.calls)
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        crawl_checkpoint.save(
+            CrawlState(
+                url=url_to_crawl,
+                parameters=get_crawl_parameters(),
+                stack=[{'name': '2020', 'url': '/v2/list/2020', 'directory': True}],
+                visited_nodes={url_to_crawl},
+                leaf_nodes=[],
+            ),
+        )
+        # Exercise
+        discovered_files = crawler.datavault_crawler(
+            url_to_crawl, credentials, crawl_checkpoint=crawl_checkpoint,
+        )
+        # Verify
+        assert discovered_files == expected_files
+        assert len(mocked_response.calls) == 2 * number_of_requests - 1
+        assert list(tmp_path.iterdir()) == []
+        # Cleanup - none
+
+    def test_crawler_saves_checkpoint_on_failed_request(
+        self,
+        tmp_path,
+        mocked_datavault_api_with_down_the_line_failed_request,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list/2020"
+        credentials = ("username", "password")
+        crawl_checkpoint = CrawlCheckpoint(tmp_path.joinpath("crawl.json").as_posix())
+        # Exercise
+        with pytest.raises(requests.exceptions.RequestException):
+            crawler.datavault_crawler(
+                url_to_crawl, credentials, crawl_checkpoint=crawl_checkpoint,
+            )
+        # Verify
+        crawl_state = crawl_checkpoint.load(url_to_crawl, get_crawl_parameters())
+        assert [node["url"] for node in crawl_state.stack] == ["/v2/list/2020/12"]
+        assert crawl_state.visited_nodes == {url_to_crawl}
+        # Cleanup - none
+
+    def test_crawler_saves_checkpoint_on_malformed_listing(self):
+        # Setup
+        stack = [{"name": "CORE", "url": "/v2/list/2020/07/16/S207/CORE", "directory": True}]
+        leaf_nodes = []
+        visited_nodes = set()
+        saved_states = []
+
+        def list_node(node_url):
+            return [
+                {
+                    "name": "COREREF_207_20200716.txt.bz2",
+                    "url": "/v2/data/2020/07/16/S207/CORE/20200716-S207_CORE_ALL_0_0",
+                    "size": 17104,
+                    "md5sum": "a" * 32,
+                    "directory": False,
+                },
+                {"name": "CROSSREF_207_20200716.txt.bz2", "directory": False},
+            ]
+
+        def checkpoint():
+            saved_states.append((list(stack), list(leaf_nodes), set(visited_nodes)))
+        # Exercise
+        with pytest.raises(KeyError):
+            crawler.traverse_node_listings(
+                stack, leaf_nodes, list_node, visited_nodes=visited_nodes, checkpoint=checkpoint,
+            )
+        # Verify
+        assert saved_states == [
+            (
+                [{"name": "CORE", "url": "/v2/list/2020/07/16/S207/CORE", "directory": True}],
+                [],
+                set(),
+            ),
+        ]
+        # Cleanup - none
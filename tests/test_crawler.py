@@ -4,6 +4,7 @@ import pytest
 import requests
 
 from datavault_api_client import crawler
+from datavault_api_client import helpers
 from datavault_api_client.data_structures import DiscoveredFileInfo
 
 
@@ -85,6 +86,92 @@ class TestCreateDiscoveredFileObject:
         # Cleanup - none
 
 
+class TestProcessNodeListing:
+    def test_leaf_names_parsed_once_in_filtered_crawl(self, monkeypatch):
+        # Setup
+        node_listing = [
+            {
+                'name': f'COREREF_{source_id}_20201130.txt.bz2',
+                'url': (
+                    f'/v2/data/2020/11/30/S{source_id}/CORE/'
+                    f'20201130-S{source_id}_CORE_ALL_0_0'
+                ),
+                'size': 17839,
+                'md5sum': 'd1fc1d6a4f7c0c2a0f4e5b7d3ec4e0a8',
+                'directory': False,
+            }
+            for source_id in (207, 367, 945)
+        ]
+        parsed_names = []
+
+        def parse_file_name(raw_filename):
+            parsed_names.append(raw_filename)
+            return helpers.parse_file_name(raw_filename)
+        monkeypatch.setattr(crawler, "parse_file_name", parse_file_name)
+        leaf_nodes = []
+        # Exercise
+        crawler.process_node_listing(
+            node_listing, [], leaf_nodes, selected_source_ids=frozenset({207, 945}),
+        )
+        # Verify
+        assert [leaf_node.source_id for leaf_node in leaf_nodes] == [207, 945]
+        assert parsed_names == [file_node['name'] for file_node in node_listing]
+        # Cleanup - none
+
+
+class TestIsDirectoryInDateRange:
+    @pytest.mark.parametrize(
+        "url_path, expected_result", [
+            ("/v2/list", True),
+            ("/v2/list/2019", False),
+            ("/v2/list/2020", True),
+            ("/v2/list/2020/06", False),
+            ("/v2/list/2020/07", True),
+            ("/v2/list/2020/07/16", False),
+            ("/v2/list/2020/07/17", True),
+            ("/v2/list/2020/07/20/S207", True),
+            ("/v2/list/2020/07/21/S207/CORE", False),
+        ],
+    )
+    def test_date_range_check(self, url_path, expected_result):
+        # Setup
+        directory_node = {"name": url_path.split("/")[-1], "url": url_path, "directory": True}
+        from_date = datetime.date(2020, 7, 17)
+        to_date = datetime.date(2020, 7, 20)
+        # Exercise
+        is_in_range = crawler.is_directory_in_date_range(directory_node, from_date, to_date)
+        # Verify
+        assert is_in_range is expected_result
+        # Cleanup - none
+
+
+class TestIsDirectorySelected:
+    @pytest.mark.parametrize(
+        "url_path, source_id, file_types, expected_result", [
+            ("/v2/list/2020/07/16", 207, None, True),
+            ("/v2/list/2020/07/16/S207", 207, None, True),
+            ("/v2/list/2020/07/16/S367", 207, None, False),
+            ("/v2/list/2020/07/16/S367", [207, 367], None, True),
+            ("/v2/list/2020/07/16/S367/CORE", None, ["COREREF"], True),
+            ("/v2/list/2020/07/16/S367/CROSS", None, ["COREREF"], False),
+            ("/v2/list/2020/07/16/S367/WATCHLIST", None, ["watchlist"], True),
+            ("/v2/list/2020/07/16/S367/CORE", 207, ["COREREF"], False),
+        ],
+    )
+    def test_directory_selection(self, url_path, source_id, file_types, expected_result):
+        # Setup
+        directory_node = {"name": url_path.split("/")[-1], "url": url_path, "directory": True}
+        # Exercise
+        is_selected = crawler.is_directory_selected(
+            directory_node,
+            selected_source_ids=crawler.get_selected_source_ids(source_id),
+            selected_file_types=crawler.get_selected_file_types(file_types),
+        )
+        # Verify
+        assert is_selected is expected_result
+        # Cleanup - none
+
+
 class TestInitializeSearch:
     def test_initialization_of_search_from_instrument_url(
         self,
@@ -199,6 +286,59 @@ class TestInitializeSearch:
             crawler.initialise_search(url, credentials, session)
 
 
+    def test_initialisation_of_search_records_visited_node(
+        self,
+        mocked_top_level_datavault_api,
+    ):
+        # Setup
+        session = requests.Session()
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        visited_nodes = set()
+        # Exercise
+        crawler.initialise_search(url, credentials, session, visited_nodes=visited_nodes)
+        # Verify
+        assert visited_nodes == {"https://api.icedatavault.icedataservices.com/v2/list"}
+        # Cleanup - none
+
+
+class TestCreateCanonicalNodeUrl:
+    @pytest.mark.parametrize(
+        "url_path", [
+            "/v2/list/2020/11/30/S945",
+            "/v2/list/2020/11/30/S945/",
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/11/30/S945/",
+        ],
+    )
+    def test_creation_of_canonical_node_url(self, url_path):
+        # Setup - none
+        # Exercise
+        canonical_url = crawler.create_canonical_node_url(url_path)
+        # Verify
+        assert canonical_url == (
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/11/30/S945"
+        )
+        # Cleanup - none
+
+
+class TestGetChildDirectoryUrls:
+    def test_directories_with_same_canonical_url_are_returned_once(self):
+        # Setup
+        node_listing = [
+            {"name": "S945", "url": "/v2/list/2020/11/30/S945", "directory": True},
+            {"name": "S945", "url": "/v2/list/2020/11/30/S945/", "directory": True},
+            {"name": "S207", "url": "/v2/list/2020/11/30/S207/", "directory": True},
+        ]
+        # Exercise
+        child_urls = crawler.get_child_directory_urls(node_listing)
+        # Verify
+        assert child_urls == [
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/11/30/S945",
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/11/30/S207/",
+        ]
+        # Cleanup - none
+
+
 class TestCreateNodeUrl:
     def test_creation_of_node_url(self):
         # Setup
@@ -239,9 +379,11 @@ class TestTraverseApiDirectoryTree:
 
     def test_traversal_of_api_directory_tree_with_not_matching_source_id(
         self,
+        mocked_response,
         mocked_datavault_api_single_source_single_day,
     ):
         # Setup
+        mocked_response.assert_all_requests_are_fired = False
         session = requests.Session()
         url = "https://api.icedatavault.icedataservices.com/v2/list"
         credentials = ("username", "password")
@@ -257,14 +399,17 @@ class TestTraverseApiDirectoryTree:
         )
         # Verify
         assert discovered_files == []
+        assert not any("S945" in call.request.url for call in mocked_response.calls)
         # Cleanup - none
 
     def test_traversal_of_api_directory_tree_with_matching_source_id(
         self,
+        mocked_response,
         mocked_datavault_api_multiple_sources_single_day,
         mocked_files_available_to_download_multiple_sources_single_day,
     ):
         # Setup
+        mocked_response.assert_all_requests_are_fired = False
         session = requests.Session()
         url = "https://api.icedatavault.icedataservices.com/v2/list"
         credentials = ("username", "password")
@@ -286,6 +431,7 @@ class TestTraverseApiDirectoryTree:
         ]
         expected_files.sort(key=lambda x: x.file_name)
         assert discovered_files == expected_files
+        assert not any("S207" in call.request.url for call in mocked_response.calls)
         # Cleanup - none
 
     def test_traversal_of_api_directory_tree_with_empty_stack(
@@ -378,6 +524,33 @@ class TestTraverseApiDirectoryTree:
         # Cleanup - none
 
 
+    def test_traversal_of_api_directory_skips_visited_nodes(self):
+        # Setup
+        session = requests.Session()
+        credentials = ("username", "password")
+        stack = [
+            {
+                'name': '2020',
+                'parent': '/v2/list',
+                'url': '/v2/list/2020/',
+                'size': 0,
+                'createdAt': '2020-01-01T00:00:00',
+                'updatedAt': '2020-12-02T00:00:00',
+                'writable': False,
+                'directory': True,
+            },
+        ]
+        leaf_nodes = []
+        visited_nodes = {"https://api.icedatavault.icedataservices.com/v2/list/2020"}
+        # Exercise
+        discovered_files = crawler.traverse_api_directory_tree(
+            session, credentials, stack, leaf_nodes, visited_nodes=visited_nodes
+        )
+        # Verify
+        assert discovered_files == []
+        # Cleanup - none
+
+
 class TestDatavaultCrawl:
     def test_crawler_with_instrument_level_url(
         self,
@@ -447,10 +620,12 @@ class TestDatavaultCrawl:
 
     def test_crawler_under_select_source_scenario(
         self,
+        mocked_response,
         mocked_datavault_api_multiple_sources_single_day,
         mocked_files_available_to_download_multiple_sources_single_day,
     ):
         # Setup
+        mocked_response.assert_all_requests_are_fired = False
         url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
         credentials = ("username", "password")
         # Exercise
@@ -463,4 +638,306 @@ class TestDatavaultCrawl:
         ]
         expected_files.sort(key=lambda x: x.file_name)
         assert discovered_files == expected_files
+        assert not any("S367" in call.request.url for call in mocked_response.calls)
+        # Cleanup - none
+
+    def test_crawler_with_multiple_selected_sources(
+        self,
+        mocked_datavault_api_multiple_sources_single_day,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.datavault_crawler(
+            url_to_crawl, credentials, source_id=[207, 367],
+        )
+        discovered_files.sort(key=lambda x: x.file_name)
+        # Verify
+        expected_files = mocked_files_available_to_download_multiple_sources_single_day
+        expected_files.sort(key=lambda x: x.file_name)
+        assert discovered_files == expected_files
+        # Cleanup - none
+
+    def test_crawler_with_file_types_prunes_directories(
+        self,
+        mocked_response,
+        mocked_datavault_api_multiple_sources_single_day,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.datavault_crawler(
+            url_to_crawl, credentials, file_types=["COREREF"],
+        )
+        discovered_files.sort(key=lambda x: x.file_name)
+        # Verify
+        expected_files = [
+            file for file in mocked_files_available_to_download_multiple_sources_single_day
+            if file.file_name.startswith("COREREF")
+        ]
+        expected_files.sort(key=lambda x: x.file_name)
+        assert discovered_files == expected_files
+        assert not any(
+            call.request.url.endswith(("/CROSS", "/WATCHLIST"))
+            for call in mocked_response.calls
+        )
+        # Cleanup - none
+
+    def test_crawler_with_date_range_prunes_directories(
+        self,
+        mocked_response,
+        mocked_datavault_api_single_source_multiple_days,
+        mocked_files_available_to_download_single_source_multiple_days,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.datavault_crawler(
+            url_to_crawl,
+            credentials,
+            from_date=datetime.date(2020, 7, 18),
+            to_date=datetime.date(2020, 7, 31),
+        )
+        discovered_files.sort(key=lambda x: x.file_name)
+        # Verify
+        expected_files = [
+            file for file in mocked_files_available_to_download_single_source_multiple_days
+            if file.reference_date >= datetime.datetime(2020, 7, 18)
+        ]
+        expected_files.sort(key=lambda x: x.file_name)
+        assert discovered_files == expected_files
+        assert not any("2020/07/17" in call.request.url for call in mocked_response.calls)
+        # Cleanup - none
+
+
+class TestIterDatavaultCrawler:
+    def test_crawler_output_matches_sequential_crawler(
+        self,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        # Exercise
+        discovered_files = list(crawler.iter_datavault_crawler(url_to_crawl, credentials))
+        # Verify
+        assert discovered_files == expected_files
+        # Cleanup - none
+
+    def test_first_file_is_yielded_before_the_crawl_is_completed(
+        self,
+        mocked_response,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        number_of_listings = len(mocked_response.registered())
+        # Exercise
+        discovered_file = next(crawler.iter_datavault_crawler(url_to_crawl, credentials))
+        # Verify
+        assert isinstance(discovered_file, DiscoveredFileInfo)
+        assert len(mocked_response.calls) < number_of_listings
+        # Cleanup - none
+
+    def test_crawler_under_select_source_scenario(
+        self,
+        mocked_response,
+        mocked_datavault_api_multiple_sources_single_day,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = sorted(
+            crawler.iter_datavault_crawler(url_to_crawl, credentials, source_id=207),
+            key=lambda x: x.file_name,
+        )
+        # Verify
+        expected_files = [
+            file for file in mocked_files_available_to_download_multiple_sources_single_day
+            if file.source_id == 207
+        ]
+        expected_files.sort(key=lambda x: x.file_name)
+        assert discovered_files == expected_files
+        # Cleanup - none
+
+    def test_crawler_with_failed_request_down_the_line(
+        self,
+        mocked_datavault_api_with_down_the_line_failed_request,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list/2020"
+        credentials = ("username", "password")
+        # Exercise
+        # Verify
+        with pytest.raises(requests.exceptions.RequestException):
+            list(crawler.iter_datavault_crawler(url_to_crawl, credentials))
+        # Cleanup - none
+
+
+class TestAsynchronousDatavaultCrawler:
+    def test_crawler_with_instrument_level_url(
+        self,
+        mocked_datavault_api_instrument_level,
+        mocked_files_available_to_download_single_instrument,
+    ):
+        # Setup
+        url_to_crawl = (
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/07/16/S367/WATCHLIST"
+        )
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.asynchronous_datavault_crawler(url_to_crawl, credentials)
+        # Verify
+        assert discovered_files == mocked_files_available_to_download_single_instrument
+        # Cleanup - none
+
+    def test_crawler_output_matches_sequential_crawler(
+        self,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        # Exercise
+        discovered_files = crawler.asynchronous_datavault_crawler(
+            url_to_crawl, credentials, max_concurrent_requests=4,
+        )
+        # Verify
+        assert discovered_files == expected_files
+        # Cleanup - none
+
+    def test_crawler_under_select_source_scenario(
+        self,
+        mocked_response,
+        mocked_datavault_api_multiple_sources_single_day,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.asynchronous_datavault_crawler(
+            url_to_crawl, credentials, source_id=207,
+        )
+        discovered_files.sort(key=lambda x: x.file_name)
+        # Verify
+        expected_files = [
+            file for file in mocked_files_available_to_download_multiple_sources_single_day
+            if file.source_id == 207
+        ]
+        expected_files.sort(key=lambda x: x.file_name)
+        assert discovered_files == expected_files
+        assert not any("S367" in call.request.url for call in mocked_response.calls)
+        # Cleanup - none
+
+    def test_crawler_with_failed_request_down_the_line(
+        self,
+        mocked_datavault_api_with_down_the_line_failed_request,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list/2020"
+        credentials = ("username", "password")
+        # Exercise
+        # Verify
+        with pytest.raises(requests.exceptions.RequestException):
+            crawler.asynchronous_datavault_crawler(url_to_crawl, credentials)
+        # Cleanup - none
+
+
+class TestConcurrentDatavaultCrawler:
+    def test_crawler_with_instrument_level_url(
+        self,
+        mocked_datavault_api_instrument_level,
+        mocked_files_available_to_download_single_instrument,
+    ):
+        # Setup
+        url_to_crawl = (
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/07/16/S367/WATCHLIST"
+        )
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.concurrent_datavault_crawler(url_to_crawl, credentials)
+        # Verify
+        assert discovered_files == mocked_files_available_to_download_single_instrument
+        # Cleanup - none
+
+    def test_crawler_output_matches_sequential_crawler(
+        self,
+        mocked_datavault_api_multiple_sources_single_day,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        # Exercise
+        discovered_files = crawler.concurrent_datavault_crawler(
+            url_to_crawl, credentials, max_number_of_workers=4,
+        )
+        # Verify
+        assert discovered_files == expected_files
+        # Cleanup - none
+
+    def test_crawler_with_date_range_matches_sequential_crawler(
+        self,
+        mocked_response,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        from_date = datetime.date(2020, 7, 17)
+        to_date = datetime.date(2020, 7, 17)
+        expected_files = crawler.datavault_crawler(
+            url_to_crawl, credentials, from_date=from_date, to_date=to_date,
+        )
+        # Exercise
+        discovered_files = crawler.concurrent_datavault_crawler(
+            url_to_crawl, credentials, from_date=from_date, to_date=to_date,
+        )
+        # Verify
+        assert discovered_files == expected_files
+        assert {file.reference_date for file in discovered_files} == {
+            datetime.datetime(2020, 7, 17)
+        }
+        # Cleanup - none
+
+    def test_crawler_with_repeated_node(
+        self,
+        mocked_datavault_api_with_repeated_node,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list/2020"
+        credentials = ("username", "password")
+        # Exercise
+        discovered_files = crawler.concurrent_datavault_crawler(url_to_crawl, credentials)
+        # Verify
+        assert discovered_files == [
+            DiscoveredFileInfo(
+                file_name='COREREF_945_20201201.txt.bz2',
+                download_url=(
+                    "https://api.icedatavault.icedataservices.com/v2/data/2020/12/01/S945/CORE/"
+                    "20201201-S945_CORE_ALL_0_0"
+                ),
+                source_id=945,
+                reference_date=datetime.datetime(year=2020, month=12, day=1),
+                size=15680,
+                md5sum='c9cc20020def775933be0be9690a9b5a',
+            )
+        ]
         # Cleanup - none
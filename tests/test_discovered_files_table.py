@@ -0,0 +1,156 @@
+import datetime
+
+import pytest
+
+from datavault_api_client import crawler, helpers, pre_download_processing
+from datavault_api_client.data_structures import DiscoveredFileInfo
+from datavault_api_client.discovered_files_table import (
+    convert_compact_date_to_datetime,
+    DiscoveredFilesTable,
+)
+
+
+class TestDiscoveredFilesTable:
+    def test_rows_match_discovered_files(
+        self,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        # Exercise
+        table = DiscoveredFilesTable(discovered_files)
+        # Verify
+        assert len(table) == len(discovered_files)
+        assert list(table) == discovered_files
+        assert table.to_list() == discovered_files
+        assert table[-1] == discovered_files[-1]
+        assert table[1:3] == discovered_files[1:3]
+        assert isinstance(table[0], DiscoveredFileInfo)
+        assert table[0].reference_date == discovered_files[0].reference_date
+        # Cleanup - none
+
+    def test_templates_are_interned(
+        self,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        expected_file_types = {file.file_name.split("_")[0] for file in discovered_files}
+        # Exercise
+        table = DiscoveredFilesTable(discovered_files)
+        # Verify
+        assert len(table.templates) == len(expected_file_types)
+        assert table.templates[0] == (
+            "COREREF_{source_id}_{date}.txt.bz2",
+            "https://api.icedatavault.icedataservices.com/v2/data/{date_path}/S{source_id}/CORE/"
+            "{date}-S{source_id}_CORE_ALL_0_0",
+        )
+        assert len(table.md5sums) == 16 * len(discovered_files)
+        assert table.irregular_md5sums == {}
+        # Cleanup - none
+
+    def test_names_without_date_or_source_are_preserved(self):
+        # Setup
+        discovered_file = DiscoveredFileInfo(
+            file_name="{reference}_file.txt",
+            download_url="https://api.icedatavault.icedataservices.com/v2/data/{reference}",
+            source_id=2070,
+            reference_date=datetime.datetime(2020, 7, 21),
+            size=17104,
+            md5sum="a" * 32,
+        )
+        # Exercise
+        table = DiscoveredFilesTable([discovered_file])
+        # Verify
+        assert table[0] == discovered_file
+        # Cleanup - none
+
+    def test_irregular_md5sum_is_preserved(self):
+        # Setup
+        discovered_file = DiscoveredFileInfo(
+            file_name="COREREF_207_20200721.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/21/S207/CORE/"
+                "20200721-S207_CORE_ALL_0_0"
+            ),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 21),
+            size=17104,
+            md5sum="NOT-AN-MD5",
+        )
+        # Exercise
+        table = DiscoveredFilesTable([discovered_file])
+        # Verify
+        assert table[0].md5sum == "NOT-AN-MD5"
+        assert table[0] == discovered_file
+        # Cleanup - none
+
+    def test_index_out_of_range(self):
+        # Setup
+        table = DiscoveredFilesTable()
+        # Exercise
+        # Verify
+        with pytest.raises(IndexError):
+            table[0]
+        # Cleanup - none
+
+
+class TestConvertCompactDateToDatetime:
+    def test_conversion_of_compact_date(self):
+        # Setup - none
+        # Exercise
+        converted_date = convert_compact_date_to_datetime(20200716)
+        # Verify
+        assert converted_date == datetime.datetime(2020, 7, 16)
+        # Cleanup - none
+
+
+class TestTableIntegration:
+    def test_size_helpers_accept_table(
+        self,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        table = DiscoveredFilesTable(discovered_files)
+        # Exercise
+        total_download_size = helpers.calculate_total_download_size(table)
+        number_of_files = helpers.calculate_number_of_discovered_files(table)
+        # Verify
+        assert total_download_size == helpers.calculate_total_download_size(discovered_files)
+        assert number_of_files == len(discovered_files)
+        # Cleanup - none
+
+    def test_manifest_generation_from_table(
+        self,
+        tmp_path,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        expected_manifest = pre_download_processing.process_all_discovered_files_info(
+            discovered_files, tmp_path.as_posix(), 0.1,
+        )
+        # Exercise
+        download_manifest = pre_download_processing.pre_concurrent_download_processor(
+            DiscoveredFilesTable(discovered_files),
+            tmp_path.as_posix(),
+            partition_size_in_mib=0.1,
+        )
+        # Verify
+        assert download_manifest.files_reference_data == expected_manifest
+        # Cleanup - none
+
+    def test_columnar_crawler_matches_sequential_crawler(
+        self,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        # Exercise
+        table = crawler.columnar_datavault_crawler(url_to_crawl, credentials)
+        # Verify
+        assert table.to_list() == expected_files
+        # Cleanup - none
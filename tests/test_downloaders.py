@@ -0,0 +1,214 @@
+import datetime
+import hashlib
+import queue
+import urllib.parse
+
+import pytest
+import requests
+import responses
+
+from datavault_api_client import data_integrity
+from datavault_api_client import downloaders
+from datavault_api_client import pre_download_processing
+from datavault_api_client.data_structures import (
+    ConcurrentDownloadManifest,
+    DiscoveredFileInfo,
+    DownloadDetails,
+)
+
+
+DOWNLOAD_URL = (
+    "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+    "20200717-S207_CORE_ALL_0_0"
+)
+
+
+def get_download_details(tmp_path, content):
+    return DownloadDetails(
+        file_name="COREREF_207_20200717.txt.bz2",
+        download_url=DOWNLOAD_URL,
+        file_path=tmp_path.joinpath(
+            "2020", "07", "17", "S207", "CORE", "COREREF_207_20200717.txt.bz2",
+        ),
+        source_id=207,
+        reference_date=datetime.datetime(2020, 7, 17),
+        size=len(content),
+        md5sum=hashlib.md5(content).hexdigest(),
+        is_partitioned=False,
+    )
+
+
+class TestDownloadFile:
+    def test_checksum_calculation_while_downloading(self, tmp_path, mocked_response):
+        # Setup
+        content = b"coreref content" * 1000
+        file_download_details = get_download_details(tmp_path, content)
+        mocked_response.add(responses.GET, url=DOWNLOAD_URL, body=content, status=200)
+        checksum_cache = {}
+        # Exercise
+        checksum = downloaders.download_file(
+            file_download_details, ("username", "password"), downloaders.create_session(),
+            checksum_cache,
+        )
+        # Verify
+        assert checksum == file_download_details.md5sum
+        assert file_download_details.file_path.read_bytes() == content
+        assert checksum_cache == {
+            data_integrity.get_checksum_cache_key(file_download_details.file_path.stat()):
+            checksum,
+        }
+        # Cleanup - none
+
+
+class TestDownloadFilesSynchronously:
+    def test_integrity_test_without_second_read(self, monkeypatch, tmp_path, mocked_response):
+        # Setup
+        content = b"coreref content" * 1000
+        file_download_details = get_download_details(tmp_path, content)
+        mocked_response.add(responses.GET, url=DOWNLOAD_URL, body=content, status=200)
+        hashed_files = []
+        monkeypatch.setattr(data_integrity, "calculate_checksum", hashed_files.append)
+        # Exercise
+        downloaders.download_files_synchronously(
+            [file_download_details], ("username", "password"),
+        )
+        # Verify
+        assert hashed_files == []
+        assert len(mocked_response.calls) == 1
+        # Cleanup - none
+
+    def test_failed_downloads_are_returned(self, tmp_path, mocked_response):
+        # Setup
+        content = b"coreref content" * 1000
+        file_download_details = get_download_details(tmp_path, content)
+        mocked_response.add(responses.GET, url=DOWNLOAD_URL, body=content[1:], status=200)
+        # Exercise
+        failed_downloads = downloaders.download_files_synchronously(
+            [file_download_details], ("username", "password"),
+            max_number_of_download_attempts=1,
+        )
+        # Verify
+        assert failed_downloads == [file_download_details]
+        assert len(mocked_response.calls) == 2
+        # Cleanup - none
+
+
+class TestDownloadFilesConcurrently:
+    def test_partitioned_file_verified_without_second_read(
+        self, monkeypatch, tmp_path, mocked_response,
+    ):
+        # Setup
+        content = bytes(range(256)) * 40
+        file_download_details = get_download_details(tmp_path, content)._replace(
+            is_partitioned=True,
+        )
+        partitions = pre_download_processing.plan_partitions_download_manifest(
+            [file_download_details], 1024 / (1024 * 1024),
+        )
+        for partition in partitions:
+            start = (partition.partition_index - 1) * 1024
+            mocked_response.add(
+                responses.GET,
+                url=partition.download_url,
+                body=content[start:start + 1024],
+                status=200,
+                match=[
+                    responses.matchers.query_string_matcher(
+                        urllib.parse.urlsplit(partition.download_url).query,
+                    ),
+                ],
+            )
+        hashed_files = []
+        monkeypatch.setattr(data_integrity, "calculate_checksum", hashed_files.append)
+        # Exercise
+        downloaders.download_files_concurrently(
+            ConcurrentDownloadManifest(
+                files_reference_data=[file_download_details],
+                whole_files_to_download=[],
+                partitions_to_download=partitions,
+            ),
+            ("username", "password"),
+            max_number_of_workers=4,
+        )
+        # Verify
+        assert hashed_files == []
+        assert len(mocked_response.calls) == len(partitions)
+        assert file_download_details.file_path.read_bytes() == content
+        # Cleanup - none
+
+
+class TestDownloadWorker:
+    def test_network_error_does_not_stop_worker(self, monkeypatch):
+        # Setup
+        download_queue = queue.Queue()
+        for item_to_download in ("first item", "second item", None):
+            download_queue.put(item_to_download)
+        downloaded_items = []
+
+        def thread_safe_download(item_to_download, *args):
+            downloaded_items.append(item_to_download)
+            raise requests.exceptions.ConnectionError("Connection reset")
+        monkeypatch.setattr(downloaders, "thread_safe_download", thread_safe_download)
+        worker_errors = []
+        # Exercise
+        downloaders.download_worker(
+            download_queue, ("username", "password"), worker_errors=worker_errors,
+        )
+        # Verify
+        assert downloaded_items == ["first item", "second item"]
+        assert worker_errors == []
+        # Cleanup - none
+
+    def test_programming_error_is_forwarded(self, monkeypatch):
+        # Setup
+        download_queue = queue.Queue()
+        for item_to_download in ("first item", "second item", None):
+            download_queue.put(item_to_download)
+        downloaded_items = []
+        programming_error = TypeError("Unexpected argument")
+
+        def thread_safe_download(item_to_download, *args):
+            downloaded_items.append(item_to_download)
+            raise programming_error
+        monkeypatch.setattr(downloaders, "thread_safe_download", thread_safe_download)
+        worker_errors = []
+        # Exercise
+        downloaders.download_worker(
+            download_queue, ("username", "password"), worker_errors=worker_errors,
+        )
+        # Verify
+        assert downloaded_items == ["first item"]
+        assert worker_errors == [programming_error]
+        assert download_queue.empty()
+        # Cleanup - none
+
+
+class TestDownloadFilesPipelined:
+    def test_programming_error_is_raised(self, monkeypatch, tmp_path):
+        # Setup
+        discovered_files = (
+            DiscoveredFileInfo(
+                file_name=f"COREREF_{source_id}_20200717.txt.bz2",
+                download_url=DOWNLOAD_URL,
+                source_id=source_id,
+                reference_date=datetime.datetime(2020, 7, 17),
+                size=1024,
+                md5sum="0" * 32,
+            )
+            for source_id in range(200, 220)
+        )
+
+        def thread_safe_download(*args):
+            raise TypeError("Unexpected argument")
+        monkeypatch.setattr(downloaders, "thread_safe_download", thread_safe_download)
+        # Exercise
+        # Verify
+        with pytest.raises(TypeError):
+            downloaders.download_files_pipelined(
+                discovered_files,
+                tmp_path.as_posix(),
+                ("username", "password"),
+                max_number_of_workers=2,
+                max_queue_size=1,
+            )
+        # Cleanup - none
@@ -1,5 +1,10 @@
+import datetime
+import os
+
 import pytest
 
+from datavault_api_client import crawler
+from datavault_api_client.data_structures import ParsedFileName
 import datavault_api_client.helpers as helpers
 
 
@@ -199,3 +204,126 @@ class TestCalculateTotalDownloadSize:
         expected_download_size = "0B"
         assert total_download_size == expected_download_size
         # Cleanup - none
+
+
+class TestParseFileName:
+    @pytest.mark.parametrize(
+        "raw_filename, expected_result", [
+            (
+                "COREREF_945_20201201.txt.bz2",
+                ParsedFileName("COREREF_945_20201201.txt.bz2", 945, datetime.datetime(2020, 12, 1)),
+            ),
+            (
+                "CROSSREF_207_20200716.txt.bz2",
+                ParsedFileName("CROSSREF_207_20200716.txt.bz2", 207, datetime.datetime(2020, 7, 16)),
+            ),
+            (
+                "WATCHLIST_username_367_20200716.txt.bz2",
+                ParsedFileName("WATCHLIST_367_20200716.txt.bz2", 367, datetime.datetime(2020, 7, 16)),
+            ),
+            ("COREREF_945_20201301.txt.bz2", None),
+            ("README.txt", None),
+        ],
+    )
+    def test_parsing_of_file_name(self, raw_filename, expected_result):
+        # Setup - none
+        # Exercise
+        parsed_file_name = helpers.parse_file_name(raw_filename)
+        # Verify
+        assert parsed_file_name == expected_result
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "raw_filename", [
+            "COREREF_945_20201201.txt.bz2",
+            "WATCHLIST_username_367_20200716.txt.bz2",
+            "REPLAY_673_20200723.txt.bz2",
+        ],
+    )
+    def test_parsing_matches_component_wise_parsing(self, raw_filename):
+        # Setup
+        file_name = crawler.clean_raw_filename(raw_filename)
+        # Exercise
+        parsed_file_name = helpers.parse_file_name(raw_filename)
+        # Verify
+        assert parsed_file_name.file_name == file_name
+        assert parsed_file_name.source_id == int(crawler.parse_source_from_name(file_name))
+        assert parsed_file_name.reference_date == crawler.parse_reference_date(file_name)
+        # Cleanup - none
+
+
+class TestConvertIsoDateToCompactDate:
+    def test_conversion_of_iso_date(self):
+        # Setup - none
+        # Exercise
+        compact_date = helpers.convert_iso_date_to_compact_date("2020-07-16T00:00:00")
+        # Verify
+        assert compact_date == "20200716"
+        # Cleanup - none
+
+
+class TestWriteFileAtomically:
+    def test_replacement_of_existing_file(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("state.json")
+        path_to_file.write_text("old content")
+        # Exercise
+        helpers.write_file_atomically(path_to_file, lambda outfile: outfile.write("new content"))
+        # Verify
+        assert path_to_file.read_text() == "new content"
+        assert list(tmp_path.iterdir()) == [path_to_file]
+        # Cleanup - none
+
+    def test_temporary_file_removed_on_failed_write(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("state.json")
+        path_to_file.write_text("old content")
+
+        def write_content(outfile):
+            outfile.write("partial content")
+            raise ValueError("Not serialisable")
+        # Exercise
+        with pytest.raises(ValueError):
+            helpers.write_file_atomically(path_to_file, write_content)
+        # Verify
+        assert path_to_file.read_text() == "old content"
+        assert list(tmp_path.iterdir()) == [path_to_file]
+        # Cleanup - none
+
+    def test_temporary_file_removed_on_failed_replacement(self, tmp_path):
+        # Setup
+        path_to_directory = tmp_path.joinpath("state.json")
+        path_to_directory.mkdir()
+        path_to_directory.joinpath("entry").write_text("content")
+        # Exercise
+        with pytest.raises(OSError):
+            helpers.write_file_atomically(
+                path_to_directory, lambda outfile: outfile.write("new content"),
+            )
+        # Verify
+        assert list(tmp_path.iterdir()) == [path_to_directory]
+        # Cleanup - none
+
+    def test_permissions_of_existing_file_are_kept(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("state.json")
+        path_to_file.write_text("old content")
+        path_to_file.chmod(0o640)
+        # Exercise
+        helpers.write_file_atomically(path_to_file, lambda outfile: outfile.write("new content"))
+        # Verify
+        assert path_to_file.stat().st_mode & 0o777 == 0o640
+        # Cleanup - none
+
+    def test_new_file_gets_default_permissions(self, tmp_path):
+        # Setup
+        path_to_file = tmp_path.joinpath("state.json")
+        umask = os.umask(0o022)
+        # Exercise
+        try:
+            helpers.write_file_atomically(path_to_file, lambda outfile: outfile.write("content"))
+        finally:
+            os.umask(umask)
+        # Verify
+        assert path_to_file.stat().st_mode & 0o777 == 0o644
+        # Cleanup - none
@@ -0,0 +1,152 @@
+import datetime
+
+import pytest
+
+from datavault_api_client import crawler, high_water_marks
+
+
+class TestHighWaterMarkStore:
+    def test_update_and_retrieval_of_high_water_mark(
+        self,
+        tmp_path,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        store = high_water_marks.HighWaterMarkStore(
+            tmp_path.joinpath("state", "high_water_marks.json").as_posix()
+        )
+        url = "https://api.icedatavault.icedataservices.com/v2/list/"
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        expected_high_water_mark = max(file.reference_date for file in discovered_files).date()
+        # Exercise
+        updated_high_water_mark = store.update(url, discovered_files)
+        # Verify
+        assert updated_high_water_mark == expected_high_water_mark
+        assert store.get(url.rstrip("/")) == expected_high_water_mark
+        assert store.get(url, source_ids={207}) is None
+        # Cleanup - none
+
+    def test_high_water_mark_never_moves_backwards(
+        self,
+        tmp_path,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        store = high_water_marks.HighWaterMarkStore(
+            tmp_path.joinpath("high_water_marks.json").as_posix()
+        )
+        url = "https://api.icedatavault.icedataservices.com/v2/list"
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        expected_high_water_mark = max(file.reference_date for file in discovered_files).date()
+        store.update(url, discovered_files)
+        earlier_files = [
+            file._replace(reference_date=file.reference_date - datetime.timedelta(days=10))
+            for file in discovered_files
+        ]
+        # Exercise
+        updated_high_water_mark = store.update(url, earlier_files)
+        # Verify
+        assert updated_high_water_mark == expected_high_water_mark
+        assert store.get(url) == expected_high_water_mark
+        # Cleanup - none
+
+    def test_update_without_discovered_files(self, tmp_path):
+        # Setup
+        path_to_store = tmp_path.joinpath("high_water_marks.json")
+        store = high_water_marks.HighWaterMarkStore(path_to_store.as_posix())
+        # Exercise
+        updated_high_water_mark = store.update(
+            "https://api.icedatavault.icedataservices.com/v2/list", [],
+        )
+        # Verify
+        assert updated_high_water_mark is None
+        assert not path_to_store.exists()
+        # Cleanup - none
+
+
+class TestGetIncrementalFromDate:
+    @pytest.mark.parametrize(
+        "high_water_mark, look_back_days, from_date, expected_from_date", [
+            (None, 1, None, None),
+            (None, 1, datetime.date(2020, 7, 1), datetime.date(2020, 7, 1)),
+            (datetime.date(2020, 7, 20), 1, None, datetime.date(2020, 7, 19)),
+            (datetime.date(2020, 7, 20), 0, None, datetime.date(2020, 7, 20)),
+            (
+                datetime.date(2020, 7, 20),
+                3,
+                datetime.date(2020, 7, 1),
+                datetime.date(2020, 7, 17),
+            ),
+            (
+                datetime.date(2020, 7, 20),
+                3,
+                datetime.date(2020, 7, 19),
+                datetime.date(2020, 7, 19),
+            ),
+        ],
+    )
+    def test_incremental_from_date(
+        self,
+        high_water_mark,
+        look_back_days,
+        from_date,
+        expected_from_date,
+    ):
+        # Setup - none
+        # Exercise
+        incremental_from_date = high_water_marks.get_incremental_from_date(
+            high_water_mark, look_back_days, from_date,
+        )
+        # Verify
+        assert incremental_from_date == expected_from_date
+        # Cleanup - none
+
+
+class TestIncrementalDatavaultCrawler:
+    def test_second_crawl_skips_days_before_high_water_mark(
+        self,
+        tmp_path,
+        mocked_response,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        store = high_water_marks.HighWaterMarkStore(
+            tmp_path.joinpath("high_water_marks.json").as_posix()
+        )
+        all_files = crawler.incremental_datavault_crawler(url_to_crawl, credentials, store)
+        number_of_calls = len(mocked_response.calls)
+        # Exercise
+        new_files = crawler.incremental_datavault_crawler(
+            url_to_crawl, credentials, store, look_back_days=1,
+        )
+        # Verify
+        assert store.get(url_to_crawl) == datetime.date(2020, 7, 20)
+        assert new_files == [
+            file for file in all_files if file.reference_date.date() == datetime.date(2020, 7, 20)
+        ]
+        assert len(new_files) < len(all_files)
+        second_crawl_urls = [call.request.url for call in mocked_response.calls[number_of_calls:]]
+        assert not any("/2020/07/17" in url for url in second_crawl_urls)
+        # Cleanup - none
+
+    def test_high_water_mark_left_to_the_caller(
+        self,
+        tmp_path,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        store = high_water_marks.HighWaterMarkStore(
+            tmp_path.joinpath("high_water_marks.json").as_posix()
+        )
+        # Exercise
+        discovered_files = crawler.incremental_datavault_crawler(
+            url_to_crawl, credentials, store, advance_high_water_mark=False,
+        )
+        # Verify
+        assert len(discovered_files) > 0
+        assert store.get(url_to_crawl) is None
+        # Cleanup - none
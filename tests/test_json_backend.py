@@ -0,0 +1,60 @@
+import importlib
+import sys
+
+from datavault_api_client import json_backend
+
+
+class TestDecodeJson:
+    def test_decoding_of_json_document(self):
+        # Setup
+        content = b'[{"name": "2020", "url": "/v2/list/2020", "directory": true}]'
+        # Exercise
+        decoded_document = json_backend.decode_json(content)
+        # Verify
+        assert decoded_document == [{"name": "2020", "url": "/v2/list/2020", "directory": True}]
+        # Cleanup - none
+
+    def test_fallback_to_standard_library_decoder(self, monkeypatch):
+        # Setup
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        # Exercise
+        fallback_backend = importlib.reload(json_backend)
+        # Verify
+        assert fallback_backend.JSON_BACKEND == "json"
+        assert fallback_backend.decode_json(b'{"size": 0}') == {"size": 0}
+        # Cleanup
+        monkeypatch.undo()
+        importlib.reload(json_backend)
+
+
+class TestDecodeNodeListing:
+    def test_decoding_of_node_listing(self):
+        # Setup
+        content = (
+            b'[{"name": "COREREF_945_20201201.txt.bz2", "fid": "20201201-S945_CORE_ALL_0_0",'
+            b' "url": "/v2/data/2020/12/01/S945/CORE/20201201-S945_CORE_ALL_0_0",'
+            b' "size": 17734, "md5sum": "a46a5f07b6a402d4023ef550df6a12e4",'
+            b' "directory": false},'
+            b' {"name": "CROSS", "url": "/v2/list/2020/12/01/S945/CROSS", "size": 0,'
+            b' "directory": true}]'
+        )
+        # Exercise
+        node_listing = json_backend.decode_node_listing(content)
+        # Verify
+        assert node_listing == [
+            {
+                "name": "COREREF_945_20201201.txt.bz2",
+                "fid": "20201201-S945_CORE_ALL_0_0",
+                "url": "/v2/data/2020/12/01/S945/CORE/20201201-S945_CORE_ALL_0_0",
+                "size": 17734,
+                "md5sum": "a46a5f07b6a402d4023ef550df6a12e4",
+                "directory": False,
+            },
+            {
+                "name": "CROSS",
+                "url": "/v2/list/2020/12/01/S945/CROSS",
+                "size": 0,
+                "directory": True,
+            },
+        ]
+        # Cleanup - none
@@ -0,0 +1,153 @@
+import datetime
+import time
+
+import pytest
+import responses
+
+from datavault_api_client import crawler
+from datavault_api_client.data_structures import CachedListing
+from datavault_api_client.listing_cache import get_revalidation_headers, ListingCache
+
+
+class TestListingCache:
+    def test_storage_and_loading_of_listing(self, tmp_path):
+        # Setup
+        listing_cache = ListingCache(tmp_path.as_posix())
+        url = "https://api.icedatavault.icedataservices.com/v2/list/2020/12"
+        listing = [{'name': '01', 'url': '/v2/list/2020/12/01', 'directory': True}]
+        # Exercise
+        listing_cache.store(url, listing, {"ETag": '"abc"'})
+        cached_listing = listing_cache.load(url)
+        # Verify
+        assert cached_listing.url == url
+        assert cached_listing.listing == listing
+        assert cached_listing.etag == '"abc"'
+        assert cached_listing.last_modified is None
+        # Cleanup - none
+
+    def test_loading_of_missing_listing(self, tmp_path):
+        # Setup
+        listing_cache = ListingCache(tmp_path.as_posix())
+        # Exercise
+        cached_listing = listing_cache.load(
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/12",
+        )
+        # Verify
+        assert cached_listing is None
+        # Cleanup - none
+
+    @pytest.mark.parametrize(
+        "url, expected_result", [
+            ("https://api.icedatavault.icedataservices.com/v2/list", False),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2019", True),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2020", False),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2020/11", True),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2020/12", False),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2020/12/24/S945", True),
+            ("https://api.icedatavault.icedataservices.com/v2/list/2020/12/26/S945", False),
+        ],
+    )
+    def test_immutability_of_listing(self, tmp_path, url, expected_result):
+        # Setup
+        listing_cache = ListingCache(tmp_path.as_posix(), immutable_after_days=7)
+        today = datetime.date(2021, 1, 1)
+        # Exercise
+        is_immutable = listing_cache.is_immutable(url, today=today)
+        # Verify
+        assert is_immutable is expected_result
+        # Cleanup - none
+
+    def test_freshness_by_depth(self, tmp_path):
+        # Setup
+        listing_cache = ListingCache(tmp_path.as_posix(), ttl_by_depth={3: 60.0})
+        now = time.time()
+        day_listing = CachedListing(
+            url="https://api.icedatavault.icedataservices.com/v2/list/2020/12/01",
+            listing=[],
+            fetched_at=now - 30,
+            etag=None,
+            last_modified=None,
+        )
+        month_listing = day_listing._replace(
+            url="https://api.icedatavault.icedataservices.com/v2/list/2020/12",
+        )
+        # Exercise
+        # Verify
+        assert listing_cache.is_fresh(day_listing, now=now) is True
+        assert listing_cache.is_fresh(month_listing, now=now) is False
+        # Cleanup - none
+
+
+class TestGetRevalidationHeaders:
+    def test_headers_with_validators(self):
+        # Setup
+        entry = CachedListing(
+            url="https://api.icedatavault.icedataservices.com/v2/list/2020/12",
+            listing=[],
+            fetched_at=0.0,
+            etag='"abc"',
+            last_modified="Tue, 01 Dec 2020 16:49:36 GMT",
+        )
+        # Exercise
+        headers = get_revalidation_headers(entry)
+        # Verify
+        assert headers == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Tue, 01 Dec 2020 16:49:36 GMT",
+        }
+        # Cleanup - none
+
+    def test_headers_without_cached_listing(self):
+        # Setup - none
+        # Exercise
+        headers = get_revalidation_headers(None)
+        # Verify
+        assert headers == {}
+        # Cleanup - none
+
+
+class TestCrawlerWithListingCache:
+    def test_repeated_crawl_of_immutable_tree_is_served_from_cache(
+        self,
+        tmp_path,
+        mocked_response,
+        mocked_datavault_api_single_source_single_day,
+    ):
+        # Setup
+        mocked_response.assert_all_requests_are_fired = False
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list/2020/07"
+        credentials = ("username", "password")
+        listing_cache = ListingCache(tmp_path.as_posix(), immutable_after_days=1)
+        first_crawl = crawler.datavault_crawler(
+            url_to_crawl, credentials, listing_cache=listing_cache,
+        )
+        number_of_requests = len(mocked_response.calls)
+        # Exercise
+        second_crawl = crawler.datavault_crawler(
+            url_to_crawl, credentials, listing_cache=listing_cache,
+        )
+        # Verify
+        assert second_crawl == first_crawl
+        assert len(mocked_response.calls) == number_of_requests
+        # Cleanup - none
+
+    def test_expired_listing_is_revalidated(self, tmp_path, mocked_response):
+        # Setup
+        url = "https://api.icedatavault.icedataservices.com/v2/list/2020/12/01/S945"
+        listing = [{'name': 'CORE', 'url': '/v2/list/2020/12/01/S945/CORE', 'directory': True}]
+        listing_cache = ListingCache(tmp_path.as_posix())
+        listing_cache.store(url, listing, {"ETag": '"abc"'})
+        mocked_response.add(
+            responses.GET,
+            url=url,
+            status=304,
+        )
+        # Exercise
+        node_listing = crawler.get_node_listing(
+            url, ("username", "password"), crawler.create_session(), listing_cache,
+        )
+        # Verify
+        assert node_listing == listing
+        assert len(mocked_response.calls) == 1
+        assert mocked_response.calls[0].request.headers["If-None-Match"] == '"abc"'
+        # Cleanup - none
@@ -0,0 +1,133 @@
+import datetime
+import hashlib
+
+import pytest
+
+from datavault_api_client import data_integrity
+from datavault_api_client import local_inventory
+from datavault_api_client import pre_download_processing as pdp
+from datavault_api_client.data_structures import DiscoveredFileInfo
+
+
+@pytest.fixture
+def discovered_files_with_local_copies(tmp_path):
+    contents = {
+        "COREREF_207_20200717.txt.bz2": b"coreref content",
+        "CROSSREF_207_20200717.txt.bz2": b"crossref content",
+        "PREMREF_207_20200717.txt.bz2": b"premref content",
+        "REPLAY_207_20200717.txt.bz2": b"replay content",
+    }
+    discovered_files = [
+        DiscoveredFileInfo(
+            file_name=file_name,
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/"
+                f"{file_name.split('_')[0][:5]}/20200717-S207_{file_name.split('_')[0][:5]}_ALL_0_0"
+            ),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=len(content),
+            md5sum=hashlib.md5(content).hexdigest(),
+        )
+        for file_name, content in contents.items()
+    ]
+    download_details = pdp.process_all_discovered_files_info(
+        discovered_files, tmp_path.as_posix(),
+    )
+    coreref, crossref, premref, _ = download_details
+    # A valid copy, a copy with the right size but a different content, and a truncated
+    # copy are written, while the last file is missing.
+    for file, content in (
+        (coreref, contents[coreref.file_name]),
+        (crossref, b"CROSSREF CONTENT"),
+        (premref, b"premref"),
+    ):
+        file.file_path.parent.mkdir(parents=True, exist_ok=True)
+        file.file_path.write_bytes(content)
+    return discovered_files, download_details
+
+
+class TestSplitAlreadyDownloadedFiles:
+    def test_split_of_missing_and_existing_files(self, discovered_files_with_local_copies):
+        # Setup
+        _, download_details = discovered_files_with_local_copies
+        # Exercise
+        files_to_download, existing_files = local_inventory.split_already_downloaded_files(
+            download_details,
+        )
+        # Verify
+        assert existing_files == download_details[:1]
+        assert files_to_download == download_details[1:]
+        # Cleanup - none
+
+    def test_checksum_cache_spares_checksum_calculation(
+        self,
+        monkeypatch,
+        discovered_files_with_local_copies,
+    ):
+        # Setup
+        _, download_details = discovered_files_with_local_copies
+        checksum_cache = {}
+        local_inventory.split_already_downloaded_files(download_details, checksum_cache)
+        calculated_checksums = []
+        monkeypatch.setattr(
+            data_integrity,
+            "calculate_checksum",
+            lambda path_to_file: calculated_checksums.append(path_to_file),
+        )
+        # Exercise
+        files_to_download, existing_files = local_inventory.split_already_downloaded_files(
+            download_details, checksum_cache,
+        )
+        # Verify
+        assert len(checksum_cache) == 2
+        assert calculated_checksums == []
+        assert existing_files == download_details[:1]
+        # Cleanup - none
+
+
+class TestScanDirectory:
+    def test_scan_of_missing_directory(self, tmp_path):
+        # Setup - none
+        # Exercise
+        directory_files = local_inventory.scan_directory(tmp_path.joinpath("missing"))
+        # Verify
+        assert directory_files == {}
+        # Cleanup - none
+
+
+class TestSkipExistingDownloadProcessing:
+    def test_pre_synchronous_download_processor_skips_existing_files(
+        self,
+        tmp_path,
+        discovered_files_with_local_copies,
+    ):
+        # Setup
+        discovered_files, download_details = discovered_files_with_local_copies
+        # Exercise
+        download_manifest = pdp.pre_synchronous_download_processor(
+            discovered_files, tmp_path.as_posix(), skip_existing=True,
+        )
+        # Verify
+        assert download_manifest == download_details[1:]
+        # Cleanup - none
+
+    def test_pre_concurrent_download_processor_skips_existing_files(
+        self,
+        tmp_path,
+        discovered_files_with_local_copies,
+    ):
+        # Setup
+        discovered_files, download_details = discovered_files_with_local_copies
+        # Exercise
+        download_manifest = pdp.pre_concurrent_download_processor(
+            discovered_files, tmp_path.as_posix(), skip_existing=True,
+        )
+        # Verify
+        assert [file.file_name for file in download_manifest.files_reference_data] == [
+            file.file_name for file in download_details[1:]
+        ]
+        assert [file.file_name for file in download_manifest.whole_files_to_download] == [
+            file.file_name for file in download_details[1:]
+        ]
+        # Cleanup - none
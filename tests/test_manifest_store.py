@@ -0,0 +1,105 @@
+import datetime
+
+from datavault_api_client import manifest_store
+from datavault_api_client import pre_download_processing as pdp
+from datavault_api_client.manifest_store import ManifestStore
+
+
+class TestManifestStore:
+    def test_recording_and_retrieval_of_download_details(
+        self,
+        tmp_path,
+        mocked_download_info_single_source_multiple_days_concurrent,
+    ):
+        # Setup
+        download_details = mocked_download_info_single_source_multiple_days_concurrent
+        # Exercise
+        with ManifestStore(tmp_path.joinpath("db", "manifest.db").as_posix()) as store:
+            store.record_download_details(download_details)
+            store.record_download_details(download_details)
+            records = store.get_records()
+        # Verify
+        assert len(records) == len(download_details)
+        assert {
+            manifest_store.convert_record_to_download_details(record) for record in records
+        } == set(download_details)
+        assert {record.status for record in records} == {manifest_store.PENDING}
+        # Cleanup - none
+
+    def test_range_queries(
+        self,
+        tmp_path,
+        mocked_download_info_single_source_multiple_days_concurrent,
+    ):
+        # Setup
+        download_details = mocked_download_info_single_source_multiple_days_concurrent
+        expected_files = {
+            file for file in download_details
+            if file.reference_date == datetime.datetime(2020, 7, 17)
+        }
+        # Exercise
+        with ManifestStore(tmp_path.joinpath("manifest.db").as_posix()) as store:
+            store.record_download_details(download_details)
+            day_records = store.get_records(
+                source_id=207,
+                from_date=datetime.date(2020, 7, 17),
+                to_date=datetime.date(2020, 7, 17),
+            )
+            other_source_records = store.get_records(source_id=367)
+        # Verify
+        assert {
+            manifest_store.convert_record_to_download_details(record) for record in day_records
+        } == expected_files
+        assert other_source_records == []
+        # Cleanup - none
+
+    def test_recording_of_integrity_test_results(
+        self,
+        tmp_path,
+        mocked_download_info_single_source_multiple_days_concurrent,
+    ):
+        # Setup
+        download_details = mocked_download_info_single_source_multiple_days_concurrent
+        failed_file, *verified_files = download_details
+        path_to_database = tmp_path.joinpath("manifest.db").as_posix()
+        with ManifestStore(path_to_database) as store:
+            store.record_download_details(download_details)
+            # Exercise
+            store.record_integrity_test_results(download_details, [failed_file])
+            store.record_download_details(download_details)
+        # Verify
+        with ManifestStore(path_to_database) as store:
+            missing_files = store.get_missing_files()
+            verified_records = store.get_records(status=manifest_store.VERIFIED)
+        assert [
+            manifest_store.convert_record_to_download_details(record) for record in missing_files
+        ] == [failed_file]
+        assert missing_files[0].status == manifest_store.FAILED
+        assert missing_files[0].verified_md5sum is None
+        assert len(verified_records) == len(verified_files)
+        assert all(record.verified_md5sum == record.md5sum for record in verified_records)
+        # Cleanup - none
+
+
+class TestGenerateManifestFileWithManifestStore:
+    def test_recording_without_json_manifests(
+        self,
+        tmp_path,
+        mocked_download_info_single_source_multiple_days_concurrent,
+    ):
+        # Setup
+        download_details = mocked_download_info_single_source_multiple_days_concurrent
+        # Exercise
+        with ManifestStore(tmp_path.joinpath("manifest.db").as_posix()) as store:
+            pdp.generate_manifest_file(
+                download_details,
+                manifest_store=store,
+                write_json_manifests=False,
+            )
+            records = store.get_records()
+        # Verify
+        assert len(records) == len(download_details)
+        assert not any(
+            file.file_path.parent.parent.parent.exists() for file in download_details
+        )
+        # Cleanup - none
@@ -0,0 +1,237 @@
+import datetime
+import hashlib
+import io
+
+import pytest
+
+from datavault_api_client import data_integrity
+from datavault_api_client import partition_hashing
+from datavault_api_client import post_download_processing as pdp
+from datavault_api_client import pre_download_processing
+from datavault_api_client.data_structures import ConcurrentDownloadManifest, DownloadDetails
+from datavault_api_client.partition_hashing import OrderedPartitionHasher
+
+
+PARTITIONS = [b"first partition ", b"second partition ", b"third partition ", b"fourth"]
+
+
+def download_partition(hasher, tmp_path, partition_index, chunk_size=4):
+    content = PARTITIONS[partition_index - 1]
+    path_to_partition = tmp_path.joinpath(f"COREREF_207_20200717_{partition_index}.txt")
+    output = io.BytesIO()
+    pending_chunks = hasher.write_partition(
+        partition_index,
+        (content[start:start + chunk_size] for start in range(0, len(content), chunk_size)),
+        output,
+    )
+    path_to_partition.write_bytes(output.getvalue())
+    hasher.complete_partition(partition_index, path_to_partition, pending_chunks)
+
+
+class TestOrderedPartitionHasher:
+    @pytest.mark.parametrize(
+        "completion_order, max_buffered_bytes",
+        [
+            ([1, 2, 3, 4], 1024),
+            ([4, 2, 3, 1], 1024),
+            ([3, 1, 4, 2], 4),
+            ([2, 4, 3, 1], 0),
+        ],
+    )
+    def test_digest_independent_of_completion_order(
+        self, tmp_path, completion_order, max_buffered_bytes,
+    ):
+        # Setup
+        hasher = OrderedPartitionHasher(len(PARTITIONS), max_buffered_bytes=max_buffered_bytes)
+        # Exercise
+        digests = []
+        for partition_index in completion_order:
+            digests.append(hasher.hexdigest())
+            download_partition(hasher, tmp_path, partition_index)
+        # Verify
+        assert digests == [None] * len(PARTITIONS)
+        assert hasher.hexdigest() == hashlib.md5(b"".join(PARTITIONS)).hexdigest()
+        # Cleanup - none
+
+    def test_partition_at_frontier_is_hashed_while_received(self, tmp_path):
+        # Setup
+        hasher = OrderedPartitionHasher(len(PARTITIONS), max_buffered_bytes=0)
+        download_partition(hasher, tmp_path, 1)
+        # Exercise
+        pending_chunks = hasher.write_partition(2, iter([b"second ", b"partition "]), io.BytesIO())
+        # Verify
+        assert pending_chunks == []
+        assert hasher.next_partition_index == 2
+        # Cleanup - none
+
+    def test_buffered_landed_partitions_are_not_read_back(self, monkeypatch, tmp_path):
+        # Setup
+        hasher = OrderedPartitionHasher(len(PARTITIONS), max_buffered_bytes=1024)
+        read_partitions = []
+        monkeypatch.setattr(
+            hasher, "hash_partition_file", lambda *args: read_partitions.append(args),
+        )
+        # Exercise
+        for partition_index in [4, 3, 2, 1]:
+            download_partition(hasher, tmp_path, partition_index)
+        # Verify
+        assert read_partitions == []
+        assert hasher.landed_bytes == 0
+        assert hasher.hexdigest() == hashlib.md5(b"".join(PARTITIONS)).hexdigest()
+        # Cleanup - none
+
+
+class TestIsCompleteSetOfPartitions:
+    @pytest.mark.parametrize(
+        "selected_partitions, expected_result",
+        [
+            (slice(None), True),
+            (slice(1, None), False),
+            (slice(None, -1), False),
+        ],
+    )
+    def test_detection_of_complete_set(self, tmp_path, selected_partitions, expected_result):
+        # Setup
+        file_download_details = DownloadDetails(
+            file_name="COREREF_207_20200717.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+                "20200717-S207_CORE_ALL_0_0"
+            ),
+            file_path=tmp_path.joinpath("COREREF_207_20200717.txt.bz2"),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=12 * 1024 * 1024,
+            md5sum="0" * 32,
+            is_partitioned=True,
+        )
+        partitions = pre_download_processing.plan_partitions_download_manifest(
+            [file_download_details], 5.0,
+        )
+        # Exercise
+        result = partition_hashing.is_complete_set_of_partitions(
+            file_download_details, partitions[selected_partitions],
+        )
+        # Verify
+        assert len(partitions) == 3
+        assert result is expected_result
+        # Cleanup - none
+
+
+class TestPostConcurrentDownloadProcessingWithPartitionChecksums:
+    def test_corrupt_file_is_not_concatenated(self, tmp_path):
+        # Setup
+        content = b"".join(PARTITIONS)
+        file_download_details = DownloadDetails(
+            file_name="COREREF_207_20200717.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+                "20200717-S207_CORE_ALL_0_0"
+            ),
+            file_path=tmp_path.joinpath("COREREF_207_20200717.txt.bz2"),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=len(content),
+            md5sum=hashlib.md5(content).hexdigest(),
+            is_partitioned=True,
+        )
+        partitions = pre_download_processing.plan_partitions_download_manifest(
+            [file_download_details], 16 / (1024 * 1024),
+        )
+        for partition in partitions:
+            partition.file_path.write_bytes(b"x" * 16)
+        download_manifest = ConcurrentDownloadManifest(
+            files_reference_data=[file_download_details],
+            whole_files_to_download=[],
+            partitions_to_download=partitions,
+        )
+        # Exercise
+        failed_downloads = pdp.post_concurrent_download_processing(
+            download_manifest,
+            partition_checksums={file_download_details.file_name: "1" * 32},
+        )
+        # Verify
+        assert failed_downloads.files_reference_data == [file_download_details]
+        assert failed_downloads.partitions_to_download == partitions
+        assert not file_download_details.file_path.exists()
+        # Cleanup - none
+
+    def test_concatenated_file_is_not_read_back(self, monkeypatch, tmp_path):
+        # Setup
+        content = b"".join(PARTITIONS)
+        file_download_details = DownloadDetails(
+            file_name="COREREF_207_20200717.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+                "20200717-S207_CORE_ALL_0_0"
+            ),
+            file_path=tmp_path.joinpath("COREREF_207_20200717.txt.bz2"),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=len(content),
+            md5sum=hashlib.md5(content).hexdigest(),
+            is_partitioned=True,
+        )
+        partitions = pre_download_processing.plan_partitions_download_manifest(
+            [file_download_details], 16 / (1024 * 1024),
+        )
+        for partition in partitions:
+            start = (partition.partition_index - 1) * 16
+            partition.file_path.write_bytes(content[start:start + 16])
+        download_manifest = ConcurrentDownloadManifest(
+            files_reference_data=[file_download_details],
+            whole_files_to_download=[],
+            partitions_to_download=partitions,
+        )
+        hashed_files = []
+        monkeypatch.setattr(data_integrity, "calculate_checksum", hashed_files.append)
+        # Exercise
+        failed_downloads = pdp.post_concurrent_download_processing(
+            download_manifest,
+            partition_checksums={file_download_details.file_name: file_download_details.md5sum},
+        )
+        # Verify
+        assert failed_downloads.files_reference_data == []
+        assert file_download_details.file_path.read_bytes() == content
+        assert hashed_files == []
+        # Cleanup - none
+
+    def test_checksum_not_recorded_with_stale_partition_file(self, tmp_path):
+        # Setup
+        content = b"".join(PARTITIONS)
+        file_download_details = DownloadDetails(
+            file_name="COREREF_207_20200717.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+                "20200717-S207_CORE_ALL_0_0"
+            ),
+            file_path=tmp_path.joinpath("COREREF_207_20200717.txt.bz2"),
+            source_id=207,
+            reference_date=datetime.datetime(2020, 7, 17),
+            size=len(content),
+            md5sum=hashlib.md5(content).hexdigest(),
+            is_partitioned=True,
+        )
+        partitions = pre_download_processing.plan_partitions_download_manifest(
+            [file_download_details], 16 / (1024 * 1024),
+        )
+        for partition in partitions:
+            start = (partition.partition_index - 1) * 16
+            partition.file_path.write_bytes(content[start:start + 16])
+        tmp_path.joinpath(f"COREREF_207_20200717_{len(partitions) + 1}.txt").write_bytes(b"stale")
+        download_manifest = ConcurrentDownloadManifest(
+            files_reference_data=[file_download_details],
+            whole_files_to_download=[],
+            partitions_to_download=partitions,
+        )
+        checksum_cache = {}
+        # Exercise
+        failed_downloads = pdp.post_concurrent_download_processing(
+            download_manifest,
+            checksum_cache=checksum_cache,
+            partition_checksums={file_download_details.file_name: file_download_details.md5sum},
+        )
+        # Verify
+        assert checksum_cache == {}
+        assert failed_downloads.files_reference_data == [file_download_details]
+        # Cleanup - none
@@ -0,0 +1,153 @@
+import datetime
+import hashlib
+import urllib.parse
+
+import responses
+
+from datavault_api_client import downloaders
+from datavault_api_client import partition_writes
+from datavault_api_client import pre_download_processing
+from datavault_api_client.data_structures import ConcurrentDownloadManifest, DownloadDetails
+
+
+CONTENT = bytes(range(256)) * 40
+
+
+def get_partitioned_file(tmp_path):
+    file_download_details = DownloadDetails(
+        file_name="COREREF_207_20200717.txt.bz2",
+        download_url=(
+            "https://api.icedatavault.icedataservices.com/v2/data/2020/07/17/S207/CORE/"
+            "20200717-S207_CORE_ALL_0_0"
+        ),
+        file_path=tmp_path.joinpath("COREREF_207_20200717.txt.bz2"),
+        source_id=207,
+        reference_date=datetime.datetime(2020, 7, 17),
+        size=len(CONTENT),
+        md5sum=hashlib.md5(CONTENT).hexdigest(),
+        is_partitioned=True,
+    )
+    partitions = pre_download_processing.plan_partitions_download_manifest(
+        [file_download_details], 1024 / (1024 * 1024),
+    )
+    return file_download_details, partitions
+
+
+def get_partition_content(partition):
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(partition.download_url).query)
+    return CONTENT[int(query["start"][0]):int(query["end"][0]) + 1]
+
+
+class TestWritePartitionAtOffset:
+    def test_out_of_order_writes(self, tmp_path):
+        # Setup
+        file_download_details, partitions = get_partitioned_file(tmp_path)
+        partition_writes.prepare_direct_partition_writes(file_download_details, partitions)
+        # Exercise
+        for partition in reversed(partitions):
+            partition_writes.write_partition_at_offset(
+                partition, iter([get_partition_content(partition)]),
+            )
+        # Verify
+        assert file_download_details.file_path.read_bytes() == CONTENT
+        assert partition_writes.get_missing_direct_write_partitions(
+            file_download_details, partitions,
+        ) == []
+        assert not any(partition.file_path.exists() for partition in partitions)
+        # Cleanup - none
+
+    def test_missing_partitions_from_sidecar(self, tmp_path):
+        # Setup
+        file_download_details, partitions = get_partitioned_file(tmp_path)
+        partition_writes.prepare_direct_partition_writes(file_download_details, partitions)
+        partition_writes.write_partition_at_offset(
+            partitions[0], iter([get_partition_content(partitions[0])]),
+        )
+        path_to_completed_ranges = partition_writes.get_path_to_completed_ranges(
+            file_download_details.file_path,
+        )
+        with path_to_completed_ranges.open("a") as completed_ranges:
+            completed_ranges.write(f"{partition_writes.get_partition_offset(partitions[1])} 10")
+        # Exercise
+        missing_partitions = partition_writes.get_missing_direct_write_partitions(
+            file_download_details, partitions,
+        )
+        # Verify
+        assert file_download_details.file_path.stat().st_size == len(CONTENT)
+        assert missing_partitions == partitions[1:]
+        # Cleanup - none
+
+    def test_truncated_partition_is_not_recorded(self, tmp_path):
+        # Setup
+        file_download_details, partitions = get_partitioned_file(tmp_path)
+        partition_writes.prepare_direct_partition_writes(file_download_details, partitions)
+        # Exercise
+        for partition in partitions:
+            partition_writes.write_partition_at_offset(
+                partition, iter([get_partition_content(partition)[:-1]]),
+            )
+        # Verify
+        assert partition_writes.read_completed_ranges(file_download_details.file_path) == {}
+        assert partition_writes.get_missing_direct_write_partitions(
+            file_download_details, partitions,
+        ) == partitions
+        # Cleanup - none
+
+    def test_recorded_range_with_unexpected_length_is_missing(self, tmp_path):
+        # Setup
+        file_download_details, partitions = get_partitioned_file(tmp_path)
+        partition_writes.prepare_direct_partition_writes(file_download_details, partitions)
+        for partition in partitions:
+            partition_writes.write_partition_at_offset(
+                partition, iter([get_partition_content(partition)]),
+            )
+        partition_writes.record_completed_range(
+            file_download_details.file_path, partition_writes.get_partition_offset(partitions[1]), 10,
+        )
+        # Exercise
+        missing_partitions = partition_writes.get_missing_direct_write_partitions(
+            file_download_details, partitions,
+        )
+        # Verify
+        assert missing_partitions == [partitions[1]]
+        # Cleanup - none
+
+
+class TestDownloadFilesConcurrentlyWithDirectPartitionWrites:
+    def test_download_with_retried_partition(self, tmp_path, mocked_response):
+        # Setup
+        file_download_details, partitions = get_partitioned_file(tmp_path)
+        for partition in partitions:
+            query_string_matcher = responses.matchers.query_string_matcher(
+                urllib.parse.urlsplit(partition.download_url).query,
+            )
+            if partition.partition_index == 2:
+                mocked_response.add(
+                    responses.GET,
+                    url=partition.download_url,
+                    status=404,
+                    match=[query_string_matcher],
+                )
+            mocked_response.add(
+                responses.GET,
+                url=partition.download_url,
+                body=get_partition_content(partition),
+                status=200,
+                match=[query_string_matcher],
+            )
+        # Exercise
+        downloaders.download_files_concurrently(
+            ConcurrentDownloadManifest(
+                files_reference_data=[file_download_details],
+                whole_files_to_download=[],
+                partitions_to_download=partitions,
+            ),
+            ("username", "password"),
+            max_number_of_workers=4,
+            direct_partition_writes=True,
+        )
+        # Verify
+        assert len(mocked_response.calls) == len(partitions) + 1
+        assert file_download_details.file_path.read_bytes() == CONTENT
+        assert list(tmp_path.iterdir()) == [file_download_details.file_path]
+        # Cleanup - none
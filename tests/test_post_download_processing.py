@@ -1,7 +1,10 @@
 import datetime
+import errno
 import os
 import pathlib
 
+import pytest
+
 from datavault_api_client import post_download_processing as pdp
 from datavault_api_client.data_structures import (
     ConcurrentDownloadManifest,
@@ -897,6 +900,46 @@ class TestConcatenatePartitions:
             directory.rmdir()
 
 
+class TestCopyFileContent:
+    @pytest.mark.parametrize(
+        "copy_method", ["auto", "copy_file_range", "sendfile", "userspace"],
+    )
+    def test_concatenation_with_each_copy_method(self, tmp_path, copy_method):
+        # Setup
+        contents = [os.urandom(3000), os.urandom(1), os.urandom(0), os.urandom(70000)]
+        for partition_index, content in enumerate(contents, start=1):
+            tmp_path.joinpath(f'CROSSREF_207_20200721_{partition_index}.txt').write_bytes(
+                content,
+            )
+        path_to_output_file = tmp_path / 'CROSSREF_207_20200721.txt.bz2'
+        # Exercise
+        pdp.concatenate_partitions(path_to_output_file, copy_method=copy_method)
+        # Verify
+        assert path_to_output_file.read_bytes() == b''.join(contents)
+        assert list(tmp_path.glob('*.txt')) == []
+        # Cleanup - none
+
+    def test_fallback_to_userspace_copy(self, monkeypatch, tmp_path):
+        # Setup
+        def unsupported_kernel_copy(*args, **kwargs):
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+        monkeypatch.setattr(os, 'copy_file_range', unsupported_kernel_copy, raising=False)
+        monkeypatch.setattr(os, 'sendfile', unsupported_kernel_copy, raising=False)
+        path_to_source = tmp_path / 'CROSSREF_207_20200721_1.txt'
+        path_to_source.write_bytes(b'partition content')
+        path_to_destination = tmp_path / 'CROSSREF_207_20200721.txt.bz2'
+        # Exercise
+        with path_to_destination.open('wb') as destination:
+            destination.write(b'previous ')
+            with path_to_source.open('rb') as source:
+                copy_method = pdp.copy_file_content(source, destination)
+        # Verify
+        assert copy_method == 'userspace'
+        assert path_to_destination.read_bytes() == b'previous partition content'
+        # Cleanup - none
+
+
 class TestConcatenateEachFilePartitions:
     def test_concatenation_of_all_partitions(self):
         # Setup
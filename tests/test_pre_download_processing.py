@@ -662,6 +662,82 @@ class TestUpdateManifestFile:
         pathlib.Path(path_to_manifest_file).unlink()
 
 
+    def test_merge_keyed_on_file_name_and_md5sum(self, tmp_path):
+        # Setup
+        existing_item = ItemToDownload(
+            file_name="WATCHLIST_207_20210212.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2021/02/12/S207/"
+                "WATCHLIST/20210212-S207_WATCHLIST_username_0_0"
+            ),
+            file_path="/old/2021/02/12/S207/WATCHLIST/WATCHLIST_207_20210212.txt.bz2",
+            source_id=207,
+            reference_date="2021-02-12T00:00:00",
+            size=93624504,
+            md5sum="a8edc2d1c5ed49881f7bb238631b5000",
+        )
+        moved_item = ItemToDownload(
+            existing_item,
+            file_path="/new/2021/02/12/S207/WATCHLIST/WATCHLIST_207_20210212.txt.bz2",
+        )
+        new_item = ItemToDownload(existing_item, source_id=100, md5sum="0" * 32)
+        path_to_manifest_file = tmp_path.joinpath("download_manifest_20210212.json")
+        path_to_manifest_file.write_text(json.dumps([existing_item], indent=2))
+        # Exercise
+        pdp.update_manifest_file(
+            path_to_manifest_file.as_posix(), [moved_item, new_item, moved_item],
+        )
+        # Verify
+        with path_to_manifest_file.open("r") as infile:
+            updated_file_content = json.load(infile)
+        assert updated_file_content == [new_item, moved_item]
+        assert [path.name for path in tmp_path.iterdir()] == [path_to_manifest_file.name]
+        # Cleanup - none
+
+    def test_compact_serialisation_of_manifest_file(self, tmp_path):
+        # Setup
+        item = ItemToDownload(
+            file_name="WATCHLIST_207_20210212.txt.bz2",
+            download_url=(
+                "https://api.icedatavault.icedataservices.com/v2/data/2021/02/12/S207/"
+                "WATCHLIST/20210212-S207_WATCHLIST_username_0_0"
+            ),
+            file_path="/data/2021/02/12/S207/WATCHLIST/WATCHLIST_207_20210212.txt.bz2",
+            source_id=207,
+            reference_date="2021-02-12T00:00:00",
+            size=93624504,
+            md5sum="a8edc2d1c5ed49881f7bb238631b5000",
+        )
+        path_to_manifest_file = tmp_path.joinpath("download_manifest_20210212.json")
+        # Exercise
+        pdp.write_manifest_to_json([item], path_to_manifest_file.as_posix(), compact=True)
+        # Verify
+        assert path_to_manifest_file.read_text() == json.dumps([item], separators=(",", ":"))
+        # Cleanup - none
+
+
+class TestGroupItemsByManifestPath:
+    def test_grouping_matches_date_specific_filtering(
+        self,
+        mocked_download_info_single_source_multiple_days_concurrent,
+    ):
+        # Setup
+        download_details = mocked_download_info_single_source_multiple_days_concurrent
+        unique_dates = {file.reference_date for file in download_details}
+        expected_grouping = {}
+        for date in unique_dates:
+            date_specific_items = pdp.filter_date_specific_info(download_details, date)
+            expected_grouping[pdp.generate_date_specific_path(date_specific_items[0])] = (
+                date_specific_items
+            )
+        # Exercise
+        items_by_manifest_path = pdp.group_items_by_manifest_path(download_details)
+        # Verify
+        assert len(items_by_manifest_path) == len(unique_dates)
+        assert items_by_manifest_path == expected_grouping
+        # Cleanup - none
+
+
 class TestGenerateManifestFile:
     def test_generation_of_manifest_file(
         self,
@@ -1313,6 +1389,59 @@ class TestCreateListOfFileSpecificPartitionsDownloadInfo:
         # Cleanup - none
 
 
+class TestCalculatePartitionExtremitiesInBatch:
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_batch_matches_file_specific_extremities(self, monkeypatch, use_numpy):
+        # Setup
+        if use_numpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(pdp, "numpy", None)
+        partition_size = 0.1
+        file_sizes = [0, 1, 104857, 104858, 209715, 209716, 1048576, 5000001]
+        expected_extremities = [
+            pdp.calculate_list_of_partition_extremities(size, partition_size)
+            for size in file_sizes
+        ]
+        # Exercise
+        numbers_of_partitions, lower_extremities, upper_extremities = (
+            pdp.calculate_partition_extremities_in_batch(
+                file_sizes, pdp.convert_mib_to_bytes(partition_size),
+            )
+        )
+        # Verify
+        assert list(numbers_of_partitions) == [len(item) for item in expected_extremities]
+        assert [
+            {"start": start, "end": end}
+            for start, end in zip(lower_extremities, upper_extremities)
+        ] == [extremities for item in expected_extremities for extremities in item]
+        # Cleanup - none
+
+
+class TestPlanPartitionsDownloadManifest:
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_planning_matches_file_specific_partitions(
+        self,
+        monkeypatch,
+        use_numpy,
+        mocked_whole_files_download_details_single_source_single_day,
+        mocked_partitions_download_details_single_source_single_day,
+    ):
+        # Setup
+        if use_numpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(pdp, "numpy", None)
+        files_to_partition = pdp.filter_files_to_split(
+            mocked_whole_files_download_details_single_source_single_day
+        )
+        # Exercise
+        partitions = pdp.plan_partitions_download_manifest(files_to_partition, 5.0)
+        # Verify
+        assert partitions == mocked_partitions_download_details_single_source_single_day
+        # Cleanup - none
+
+
 class TestFilterFilesToSplit:
     def test_filtering_of_files_to_split(
         self, mocked_download_details_multiple_sources_single_day
@@ -1451,6 +1580,40 @@ class TestGeneratePartitionsDownloadManifest:
         # Cleanup - none
 
 
+class TestPlanDiscoveredFileDownload:
+    def test_planning_matches_pre_concurrent_download_processing(
+        self,
+        mocked_files_available_to_download_single_source_single_day,
+        mocked_partitions_download_details_single_source_single_day,
+        mocked_whole_files_download_details_single_source_single_day,
+    ):
+        # Setup
+        discovered_files_info = mocked_files_available_to_download_single_source_single_day
+        path_to_data_directory = pathlib.Path(__file__).resolve().parent.joinpath("Data").as_posix()
+        # Exercise
+        download_plans = [
+            pdp.plan_discovered_file_download(file_info, path_to_data_directory)
+            for file_info in discovered_files_info
+        ]
+        # Verify
+        expected_reference_data = mocked_whole_files_download_details_single_source_single_day
+        expected_whole_files = [
+            file for file in expected_reference_data if file.is_partitioned is False
+        ]
+        expected_partitions = mocked_partitions_download_details_single_source_single_day
+        items_to_download = [item for _, items in download_plans for item in items]
+        assert [download_details for download_details, _ in download_plans] == (
+            expected_reference_data
+        )
+        assert [item for item in items_to_download if item in expected_whole_files] == (
+            expected_whole_files
+        )
+        assert [item for item in items_to_download if item not in expected_whole_files] == (
+            expected_partitions
+        )
+        # Cleanup - none
+
+
 class TestPreConcurrentDownloadProcessor:
     def test_pre_concurrent_download_data_processing(
         self,
@@ -0,0 +1,157 @@
+import datetime
+import email.utils
+
+import pytest
+import responses
+
+from datavault_api_client import crawler
+from datavault_api_client.rate_control import AdaptiveConcurrencyLimiter, parse_retry_after
+
+
+class MockedClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdaptiveConcurrencyLimiter:
+    def test_additive_increase_while_latency_is_flat(self):
+        # Setup
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+        # Exercise
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(0.1, 200)
+        # Verify
+        assert limiter.current_limit == 4
+        assert limiter.in_flight == 0
+        # Cleanup - none
+
+    def test_multiplicative_decrease_on_rate_limiting_response(self):
+        # Setup
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+        # Exercise
+        limiter.acquire()
+        limiter.release(0.1, 429)
+        # Verify
+        assert limiter.current_limit == 4
+        # Cleanup - none
+
+    def test_multiplicative_decrease_on_latency_spike(self):
+        # Setup
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+        limiter.acquire()
+        limiter.release(0.1, 200)
+        # Exercise
+        limiter.acquire()
+        limiter.release(1.0, 200)
+        # Verify
+        assert limiter.current_limit == 4
+        # Cleanup - none
+
+    def test_single_decrease_for_concurrent_congestion_signals(self):
+        # Setup
+        clock = MockedClock()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8, clock=clock)
+        limiter.acquire()
+        limiter.release(0.5, 200)
+        for _ in range(3):
+            limiter.acquire()
+        # Exercise
+        for _ in range(3):
+            limiter.release(0.5, 503)
+        # Verify
+        assert limiter.current_limit == 4
+        # Cleanup - none
+
+    def test_retry_after_delays_next_request(self):
+        # Setup
+        clock = MockedClock()
+        limiter = AdaptiveConcurrencyLimiter(clock=clock)
+        # Exercise
+        limiter.acquire()
+        limiter.release(0.1, 429, "7")
+        # Verify
+        assert limiter.resume_at == clock.now + 7
+        # Cleanup - none
+
+
+class TestParseRetryAfter:
+    @pytest.mark.parametrize(
+        "retry_after, expected_delay", [
+            (None, None),
+            ("120", 120.0),
+            ("-5", 0.0),
+            ("not-a-date", None),
+        ],
+    )
+    def test_parsing_of_retry_after(self, retry_after, expected_delay):
+        # Setup - none
+        # Exercise
+        delay = parse_retry_after(retry_after)
+        # Verify
+        assert delay == expected_delay
+        # Cleanup - none
+
+    def test_parsing_of_retry_after_http_date(self):
+        # Setup
+        retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+        # Exercise
+        delay = parse_retry_after(email.utils.format_datetime(retry_at, usegmt=True))
+        # Verify
+        assert 55 < delay <= 60
+        # Cleanup - none
+
+
+class TestCrawlerWithConcurrencyLimiter:
+    def test_rate_limited_listing_is_requested_again(self, mocked_response):
+        # Setup
+        url_to_crawl = (
+            "https://api.icedatavault.icedataservices.com/v2/list/2020/07/16/S367/WATCHLIST"
+        )
+        file_node = {
+            'name': 'WATCHLIST_username_367_20200716.txt.bz2',
+            'url': '/v2/data/2020/07/16/S367/WATCHLIST/20200716-S367_WATCHLIST_username_0_0',
+            'size': 72398,
+            'md5sum': 'e3f1a8f4b3d5a6e1d8c0a3b0a7f6c2d1',
+            'directory': False,
+        }
+        mocked_response.add(
+            responses.GET, url=url_to_crawl, status=429, headers={"Retry-After": "0"},
+        )
+        mocked_response.add(responses.GET, url=url_to_crawl, json=[file_node])
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        # Exercise
+        discovered_files = crawler.concurrent_datavault_crawler(
+            url_to_crawl,
+            ("username", "password"),
+            max_number_of_workers=2,
+            concurrency_limiter=limiter,
+        )
+        # Verify
+        assert discovered_files == [crawler.create_discovered_file_object(file_node)]
+        assert len(mocked_response.calls) == 2
+        assert limiter.last_backoff_at is not None
+        assert limiter.in_flight == 0
+        # Cleanup - none
+
+    def test_asynchronous_crawler_output_matches_sequential_crawler(
+        self,
+        mocked_datavault_api_single_source_multiple_days,
+    ):
+        # Setup
+        url_to_crawl = "https://api.icedatavault.icedataservices.com/v2/list"
+        credentials = ("username", "password")
+        expected_files = crawler.datavault_crawler(url_to_crawl, credentials)
+        # Exercise
+        discovered_files = crawler.asynchronous_datavault_crawler(
+            url_to_crawl,
+            credentials,
+            max_concurrent_requests=4,
+            concurrency_limiter=AdaptiveConcurrencyLimiter(max_limit=4),
+        )
+        # Verify
+        assert discovered_files == expected_files
+        # Cleanup - none
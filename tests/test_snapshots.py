@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from datavault_api_client import snapshots
+
+
+class TestWriteSnapshot:
+    def test_writing_and_reading_of_snapshot(
+        self,
+        tmp_path,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        path_to_snapshot = tmp_path.joinpath("snapshots", "crawl.json").as_posix()
+        # Exercise
+        snapshots.write_snapshot(discovered_files, path_to_snapshot)
+        recorded_files = snapshots.read_snapshot(path_to_snapshot)
+        # Verify
+        assert recorded_files == sorted(discovered_files, key=lambda x: x.download_url)
+        # Cleanup - none
+
+    def test_reading_of_unsupported_snapshot(self, tmp_path):
+        # Setup
+        path_to_snapshot = tmp_path.joinpath("crawl.json")
+        path_to_snapshot.write_text(json.dumps({"version": 0, "files": []}))
+        # Exercise
+        # Verify
+        with pytest.raises(ValueError):
+            snapshots.read_snapshot(path_to_snapshot.as_posix())
+        # Cleanup - none
+
+
+class TestDiffSnapshots:
+    def test_diff_of_snapshots(
+        self,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        old_files = sorted(
+            mocked_files_available_to_download_multiple_sources_single_day,
+            key=lambda x: x.download_url,
+        )
+        removed_file, changed_file, *unchanged_files = old_files
+        added_file = unchanged_files.pop()
+        new_files = [
+            changed_file._replace(md5sum="0" * 32),
+            *unchanged_files,
+            added_file,
+        ]
+        old_files = [removed_file, changed_file, *unchanged_files]
+        # Exercise
+        snapshot_diff = snapshots.diff_snapshots(old_files, new_files)
+        # Verify
+        assert snapshot_diff.added == [added_file]
+        assert snapshot_diff.removed == [removed_file]
+        assert snapshot_diff.changed == [changed_file._replace(md5sum="0" * 32)]
+        # Cleanup - none
+
+    def test_diff_of_identical_snapshot_files(
+        self,
+        tmp_path,
+        mocked_files_available_to_download_multiple_sources_single_day,
+    ):
+        # Setup
+        discovered_files = mocked_files_available_to_download_multiple_sources_single_day
+        path_to_old_snapshot = tmp_path.joinpath("old.json").as_posix()
+        path_to_new_snapshot = tmp_path.joinpath("new.json").as_posix()
+        snapshots.write_snapshot(discovered_files, path_to_old_snapshot)
+        snapshots.write_snapshot(discovered_files[::-1], path_to_new_snapshot)
+        # Exercise
+        snapshot_diff = snapshots.diff_snapshot_files(path_to_old_snapshot, path_to_new_snapshot)
+        # Verify
+        assert snapshot_diff == ([], [], [])
+        # Cleanup - none